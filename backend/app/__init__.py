@@ -0,0 +1 @@
+from app.settings import settings  # noqa: F401  Carrega o .env antes de qualquer módulo ler o ambiente
@@ -0,0 +1,251 @@
+"""
+Relatórios de vendas a partir de rollups diários materializados.
+
+Cada pedido conta no dia (UTC) em que foi criado, na linha do seu estado atual:
+- daily_sales: pedidos, receita e unidades por (dia, estado)
+- daily_product_sales: unidades e receita por (dia, estado, produto, tamanho, cor)
+- order_customers: um documento por cliente que já fez um pedido (_id = user_id)
+Quando um pedido é criado ou muda de estado, as linhas são ajustadas com $inc
+(sai do estado antigo, entra no novo); os relatórios agregam estas linhas em vez
+de percorrer os pedidos. "python -m app.manage rebuild-analytics" reconstrói tudo.
+"""
+import datetime
+from pymongo import ReturnDocument, UpdateOne
+from app.db import async_collection
+from app.models.analytics import DailySales, DailyProductSales, OrderCustomer
+from app.models.order import Order
+from app.models.product import Product
+
+# Estados que contam como venda (pagos) nos relatórios de receita e produtos
+REVENUE_STATUSES = ("processing", "shipped", "delivered")
+DEFAULT_RANGE_DAYS = 30
+
+def _day(value: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime(value.year, value.month, value.day)
+
+def _rollup_ops(doc: dict, status: str, sign: int):
+    """Operações que somam (sign=1) ou retiram (sign=-1) o pedido das linhas do estado"""
+    day = _day(doc.get("created_at") or datetime.datetime.utcnow())
+    items = doc.get("items") or []
+
+    sales = [UpdateOne(
+        {"day": day, "status": status},
+        {"$inc": {
+            "orders": sign,
+            "revenue": sign * (doc.get("total_amount") or 0.0),
+            "units": sign * sum(item.get("quantity", 0) for item in items),
+        }},
+        upsert=True,
+    )]
+
+    lines = {}
+    for item in items:
+        key = (item.get("product_id"), item.get("size"), item.get("color"))
+        units, revenue, _ = lines.get(key, (0, 0.0, None))
+        quantity = item.get("quantity", 0)
+        lines[key] = (units + quantity, revenue + item.get("price", 0.0) * quantity, item.get("product_name"))
+
+    products = [
+        UpdateOne(
+            {"day": day, "status": status, "product_id": product_id, "size": size, "color": color},
+            {"$inc": {"units": sign * units, "revenue": sign * revenue}, "$set": {"product_name": name}},
+            upsert=True,
+        )
+        for (product_id, size, color), (units, revenue, name) in lines.items()
+    ]
+    return sales, products
+
+def _status_change_ops(doc: dict, old_status: str, new_status: str):
+    sales, products = [], []
+    if old_status:
+        s, p = _rollup_ops(doc, old_status, -1)
+        sales += s
+        products += p
+    if new_status:
+        s, p = _rollup_ops(doc, new_status, 1)
+        sales += s
+        products += p
+    return sales, products
+
+def _customer_op(doc: dict):
+    """Regista o cliente na criação do pedido ($setOnInsert: idempotente)"""
+    return (
+        {"_id": doc["user_id"]},
+        {"$setOnInsert": {"first_order_at": doc.get("created_at") or datetime.datetime.utcnow()}},
+    )
+
+def _rollup_failed(doc: dict, error: Exception):
+    # O pedido já foi gravado: falhar aqui daria 500 e um retry duplicaria o pedido.
+    # Os rollups ficam desatualizados até "python -m app.manage rebuild-analytics".
+    print(f"Erro ao atualizar os rollups do pedido {doc.get('_id')}: {error}")
+
+def apply_status_change(doc: dict, old_status: str, new_status: str):
+    """
+    Atualiza os rollups para um pedido que passou de old_status (None se novo) para new_status.
+    Não lança exceção: uma falha fica no log e é corrigida com rebuild-analytics.
+    """
+    if old_status == new_status:
+        return
+    sales, products = _status_change_ops(doc, old_status, new_status)
+    try:
+        DailySales._get_collection().bulk_write(sales, ordered=False)
+        if products:
+            DailyProductSales._get_collection().bulk_write(products, ordered=False)
+        if old_status is None and doc.get("user_id"):
+            OrderCustomer._get_collection().update_one(*_customer_op(doc), upsert=True)
+    except Exception as e:
+        _rollup_failed(doc, e)
+
+async def apply_status_change_async(doc: dict, old_status: str, new_status: str):
+    """Versão Motor de apply_status_change (rotas async)"""
+    if old_status == new_status:
+        return
+    sales, products = _status_change_ops(doc, old_status, new_status)
+    try:
+        await async_collection(DailySales).bulk_write(sales, ordered=False)
+        if products:
+            await async_collection(DailyProductSales).bulk_write(products, ordered=False)
+        if old_status is None and doc.get("user_id"):
+            await async_collection(OrderCustomer).update_one(*_customer_op(doc), upsert=True)
+    except Exception as e:
+        _rollup_failed(doc, e)
+
+def transition_order(query: dict, new_status: str, **fields):
+    """
+    Muda o estado do pedido que satisfaz query numa única escrita atómica e ajusta os
+    rollups a partir do estado anterior. Devolve (estado_anterior, documento_atualizado)
+    ou (None, None) se nenhum pedido corresponder.
+    """
+    changes = {"status": new_status, "updated_at": datetime.datetime.utcnow(), **fields}
+    before = Order._get_collection().find_one_and_update(
+        query, {"$set": changes}, return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return None, None
+    apply_status_change(before, before.get("status"), new_status)
+    return before.get("status"), {**before, **changes}
+
+def date_range(date_from: datetime.date = None, date_to: datetime.date = None) -> dict:
+    """Filtro de dias [date_from, date_to] (inclusive); por defeito os últimos DEFAULT_RANGE_DAYS"""
+    date_to = date_to or datetime.datetime.utcnow().date()
+    date_from = date_from or date_to - datetime.timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    return {
+        "$gte": datetime.datetime.combine(date_from, datetime.time()),
+        "$lt": datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time()),
+    }
+
+async def revenue_per_day(days: dict, statuses) -> list:
+    pipeline = [
+        {"$match": {"day": days, "status": {"$in": list(statuses)}}},
+        {"$group": {
+            "_id": "$day",
+            "orders": {"$sum": "$orders"},
+            "revenue": {"$sum": "$revenue"},
+            "units": {"$sum": "$units"},
+        }},
+        {"$match": {"orders": {"$gt": 0}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return [
+        {"day": row["_id"].date(), "orders": row["orders"], "revenue": round(row["revenue"], 2), "units": row["units"]}
+        async for row in async_collection(DailySales).aggregate(pipeline)
+    ]
+
+async def orders_by_status(days: dict) -> list:
+    pipeline = [
+        {"$match": {"day": days}},
+        {"$group": {"_id": "$status", "orders": {"$sum": "$orders"}, "revenue": {"$sum": "$revenue"}}},
+        {"$match": {"orders": {"$gt": 0}}},
+        {"$sort": {"orders": -1}},
+    ]
+    return [
+        {"status": row["_id"], "orders": row["orders"], "revenue": round(row["revenue"], 2)}
+        async for row in async_collection(DailySales).aggregate(pipeline)
+    ]
+
+async def top_products(days: dict, statuses, limit: int, sort_by: str = "units") -> list:
+    pipeline = [
+        {"$match": {"day": days, "status": {"$in": list(statuses)}}},
+        {"$group": {
+            "_id": "$product_id",
+            "product_name": {"$last": "$product_name"},
+            "units": {"$sum": "$units"},
+            "revenue": {"$sum": "$revenue"},
+        }},
+        {"$match": {"units": {"$gt": 0}}},
+        {"$sort": {sort_by: -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    return [
+        {"product_id": row["_id"], "product_name": row.get("product_name"), "units": row["units"], "revenue": round(row["revenue"], 2)}
+        async for row in async_collection(DailyProductSales).aggregate(pipeline)
+    ]
+
+async def units_by_variant(days: dict, statuses, product_id: str = None) -> list:
+    match = {"day": days, "status": {"$in": list(statuses)}}
+    if product_id:
+        match["product_id"] = product_id
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": {"size": "$size", "color": "$color"}, "units": {"$sum": "$units"}}},
+        {"$match": {"units": {"$gt": 0}}},
+        {"$sort": {"units": -1}},
+    ]
+    return [
+        {"size": row["_id"].get("size"), "color": row["_id"].get("color"), "units": row["units"]}
+        async for row in async_collection(DailyProductSales).aggregate(pipeline)
+    ]
+
+async def overview() -> dict:
+    """Totais do dashboard do admin (todos os pedidos, de qualquer estado), sem ler os pedidos"""
+    totals = {"orders": 0, "revenue": 0.0}
+    pipeline = [{"$group": {"_id": None, "orders": {"$sum": "$orders"}, "revenue": {"$sum": "$revenue"}}}]
+    async for row in async_collection(DailySales).aggregate(pipeline):
+        totals = row
+    # Clientes distintos: um documento por cliente em order_customers (contagem pelos metadados)
+    customers = await async_collection(OrderCustomer).estimated_document_count()
+    return {
+        "products": await async_collection(Product).count_documents({}),
+        "orders": totals["orders"],
+        "revenue": round(totals["revenue"], 2),
+        "customers": customers,
+    }
+
+def rebuild():
+    """Reconstrói os rollups a partir de todos os pedidos (backfill ou correção)"""
+    day = {"$dateTrunc": {"date": "$created_at", "unit": "day"}}
+    orders = Order._get_collection()
+    orders.aggregate([
+        {"$group": {
+            "_id": {"day": day, "status": "$status"},
+            "orders": {"$sum": 1},
+            "revenue": {"$sum": "$total_amount"},
+            "units": {"$sum": {"$sum": "$items.quantity"}},
+        }},
+        {"$project": {
+            "_id": 0, "day": "$_id.day", "status": "$_id.status",
+            "orders": 1, "revenue": 1, "units": 1,
+        }},
+        {"$out": DailySales._get_collection_name()},
+    ])
+    orders.aggregate([
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": {
+                "day": day, "status": "$status", "product_id": "$items.product_id",
+                "size": "$items.size", "color": "$items.color",
+            },
+            "product_name": {"$last": "$items.product_name"},
+            "units": {"$sum": "$items.quantity"},
+            "revenue": {"$sum": {"$multiply": ["$items.price", "$items.quantity"]}},
+        }},
+        {"$project": {
+            "_id": 0, "day": "$_id.day", "status": "$_id.status", "product_id": "$_id.product_id",
+            "size": "$_id.size", "color": "$_id.color", "product_name": 1, "units": 1, "revenue": 1,
+        }},
+        {"$out": DailyProductSales._get_collection_name()},
+    ])
+    orders.aggregate([
+        {"$group": {"_id": "$user_id", "first_order_at": {"$min": "$created_at"}}},
+        {"$out": OrderCustomer._get_collection_name()},
+    ])
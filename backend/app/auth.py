@@ -1,13 +1,15 @@
 import os
 from datetime import datetime, timedelta
-from jose import jwt, JWTError
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from bson import ObjectId
+from bson.errors import InvalidId
+from app.cache import MemoryCache
+from app.db import async_collection
 from app.models.user import User
+from app.settings import settings
 
-#teste
-# CORREÇÃO: Lê a chave da variável de ambiente
-SECRET_KEY = os.getenv("SECRET_KEY", "YOUR_SECRET_KEY")
+SECRET_KEY = settings.secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 500
 
@@ -20,21 +22,112 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt  # Importado no primeiro uso (cold start)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-# ... (mantém o resto das funções get_current_user e require_admin iguais)
-def get_current_user(token: str = Depends(oauth2_scheme)):
+class Principal:
+    """Identidade do utilizador autenticado, sem o documento completo"""
+    __slots__ = ("id", "email", "name", "role", "token_version")
+
+    def __init__(self, id, email: str, name: str, role: str, token_version: int):
+        self.id = id
+        self.email = email
+        self.name = name
+        self.role = role
+        self.token_version = token_version
+
+# Cache curta user_id -> Principal: a autenticação deixa de ir à base de dados em cada pedido.
+# Mudanças de password/role incrementam token_version, o que revoga os tokens antigos.
+_principals = MemoryCache(
+    max_entries=int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "4096")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "30")),
+)
+
+def token_claims(user_id, role: str, token_version: int) -> dict:
+    """Claims do JWT de um utilizador (id, role e versão do token)"""
+    return {"user_id": str(user_id), "role": role, "ver": token_version or 0}
+
+def invalidate_principal(user_id):
+    """Esquece o utilizador na cache deste worker (os restantes expiram pelo TTL)"""
+    _principals.delete(str(user_id))
+
+def principal_cache_stats() -> dict:
+    return _principals.stats()
+
+def _decode_token(token: str) -> dict:
+    from jose import jwt, JWTError
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user = User.objects(id=payload.get("user_id")).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
-    except JWTError:
+        payload["_oid"] = ObjectId(payload.get("user_id"))
+        return payload
+    except (JWTError, InvalidId, TypeError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def require_admin(user: User = Depends(get_current_user)):
-    if user.role != "admin":
+async def _load_principal(oid) -> Principal:
+    doc = await async_collection(User).find_one(
+        {"_id": oid}, {"email": 1, "name": 1, "role": 1, "token_version": 1}
+    )
+    if not doc:
+        raise HTTPException(status_code=401, detail="User not found")
+    principal = Principal(
+        id=doc["_id"],
+        email=doc.get("email"),
+        name=doc.get("name"),
+        role=doc.get("role", "client"),
+        token_version=doc.get("token_version", 0),
+    )
+    _principals.set(str(oid), principal)
+    return principal
+
+async def _principal_for(payload: dict) -> Principal:
+    """Principal do token já descodificado, depois de confirmar que não foi revogado"""
+    user_id = str(payload["_oid"])
+    version = payload.get("ver", 0)
+
+    principal = _principals.get(user_id)
+    if principal is None:
+        principal = await _load_principal(payload["_oid"])
+    elif version > principal.token_version:
+        # Token mais recente que a cache (mudança feita noutro worker): recarrega da BD
+        _principals.delete(user_id)
+        principal = await _load_principal(payload["_oid"])
+
+    # Token emitido antes de uma mudança de password/role
+    if version != principal.token_version:
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return principal
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    return await _principal_for(_decode_token(token))
+
+async def get_current_user(principal: Principal = Depends(get_current_principal)):
+    """Documento completo do utilizador (só para as rotas que precisam do perfil)"""
+    doc = await async_collection(User).find_one({"_id": principal.id})
+    if not doc:
+        raise HTTPException(status_code=401, detail="User not found")
+    # Document normal do mongoengine: as rotas síncronas continuam a poder fazer save()
+    return User._from_son(doc)
+
+async def require_admin(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Decide pelo claim role do token: tokens de não-admins são recusados sem ir à base
+    de dados. Uma mudança de role incrementa token_version, por isso o claim de um token
+    não revogado é o role atual; a cache/BD só confirma a revogação.
+    """
+    payload = _decode_token(token)
+    if payload.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Admin privileges required")
-    return user
\ No newline at end of file
+    return await _principal_for(payload)
+
+async def is_admin_request(scope) -> bool:
+    """Verifica o Bearer token de um pedido ASGI fora das rotas (ex.: middleware de métricas)"""
+    headers = dict(scope.get("headers") or [])
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        await require_admin(token)
+    except HTTPException:
+        return False
+    return True
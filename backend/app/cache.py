@@ -0,0 +1,142 @@
+"""
+Cache do catálogo: payloads serializados de produtos e de páginas da listagem.
+
+O backend é substituível (set_backend) para partilhar a cache entre workers; a
+implementação por defeito é uma LRU em memória com TTL, por processo.
+As listagens são invalidadas por geração: cada escrita no catálogo incrementa
+"catalog:generation", e as chaves antigas deixam de ser lidas e saem por LRU/TTL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class CacheBackend:
+    """Interface mínima que um backend de cache tem de implementar"""
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """Incrementa atomicamente um contador (sem TTL) e devolve o novo valor"""
+        raise NotImplementedError
+
+    def get_counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+class MemoryCache(CacheBackend):
+    """LRU limitada com TTL, segura para as threads de um worker"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expira_em, valor)
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+_backend: CacheBackend = MemoryCache(
+    max_entries=int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "60")),
+)
+
+GENERATION_KEY = "catalog:generation"
+
+def get_backend() -> CacheBackend:
+    return _backend
+
+def set_backend(backend: CacheBackend):
+    """Troca o backend (ex.: um backend partilhado entre workers)"""
+    global _backend
+    _backend = backend
+
+def catalog_generation() -> int:
+    """Geração atual do catálogo; muda sempre que há uma escrita em produtos"""
+    return _backend.get_counter(GENERATION_KEY)
+
+def product_key(product_id: str) -> str:
+    return f"product:{product_id}"
+
+def listing_key(**params) -> str:
+    """Chave de uma página da listagem, dependente da geração atual do catálogo"""
+    parts = "&".join(f"{k}={params[k]}" for k in sorted(params) if params[k] is not None)
+    return f"products:{catalog_generation()}:{parts}"
+
+def invalidate_products(*product_ids):
+    """Invalida os produtos indicados e todas as páginas da listagem"""
+    for product_id in product_ids:
+        _backend.delete(product_key(str(product_id)))
+    _backend.incr(GENERATION_KEY)
+
+def cache_stats() -> dict:
+    stats = dict(_backend.stats())
+    stats["generation"] = catalog_generation()
+    return stats
@@ -0,0 +1,113 @@
+"""
+Validação e preço das linhas do carrinho (POST /orders/quote e create_order).
+
+Os produtos de todas as linhas são lidos numa única query ($in). O stock é comparado
+com a quantidade pedida somada por produto (o mesmo produto pode aparecer com vários
+tamanhos/cores). Tamanho e cor têm de estar em available_sizes / available_colors;
+uma lista vazia não restringe (produtos sem tamanhos ou cores).
+"""
+from bson import ObjectId
+from bson.errors import InvalidId
+from app.db import async_collection
+from app.models.product import Product
+from app.serializers import projection
+
+CART_FIELDS = ("name", "price", "stock", "images", "available_sizes", "available_colors")
+MAX_CART_LINES = 100
+
+# Códigos de problema de uma linha (devolvidos pelo quote)
+INVALID_PRODUCT = "invalid_product"
+NOT_FOUND = "not_found"
+INVALID_QUANTITY = "invalid_quantity"
+INSUFFICIENT_STOCK = "insufficient_stock"
+SIZE_UNAVAILABLE = "size_unavailable"
+COLOR_UNAVAILABLE = "color_unavailable"
+
+def object_ids(product_ids) -> list:
+    """ObjectIds válidos (sem repetidos) entre os ids das linhas"""
+    ids = []
+    for product_id in dict.fromkeys(product_ids):
+        try:
+            ids.append(ObjectId(product_id))
+        except (InvalidId, TypeError):
+            continue
+    return ids
+
+async def load_products(ids) -> dict:
+    """{id: doc} dos produtos indicados, numa única query"""
+    if not ids:
+        return {}
+    cursor = async_collection(Product).find({"_id": {"$in": list(ids)}}, projection(CART_FIELDS))
+    return {str(doc["_id"]): doc async for doc in cursor}
+
+def requested_quantities(items) -> dict:
+    """Quantidade pedida por produto, somada sobre as linhas"""
+    requested = {}
+    for item in items:
+        if item.quantity > 0:
+            requested[item.product_id] = requested.get(item.product_id, 0) + item.quantity
+    return requested
+
+def variant_issue(product: dict, size, color):
+    """SIZE_UNAVAILABLE / COLOR_UNAVAILABLE se a variante pedida não estiver disponível"""
+    available_sizes = product.get("available_sizes") or []
+    if available_sizes and size not in available_sizes:
+        return SIZE_UNAVAILABLE
+    available_colors = product.get("available_colors") or []
+    if available_colors and color not in available_colors:
+        return COLOR_UNAVAILABLE
+    return None
+
+def line_issues(item, product: dict, requested: dict) -> list:
+    """Problemas de uma linha do carrinho (lista vazia se puder ser encomendada)"""
+    if product is None:
+        try:
+            ObjectId(item.product_id)
+        except (InvalidId, TypeError):
+            return [INVALID_PRODUCT]
+        return [NOT_FOUND]
+
+    issues = []
+    if item.quantity <= 0:
+        issues.append(INVALID_QUANTITY)
+    stock = product.get("stock") or 0
+    if stock < requested.get(item.product_id, 0):
+        issues.append(INSUFFICIENT_STOCK)
+    variant = variant_issue(product, item.size, item.color)
+    if variant:
+        issues.append(variant)
+    return issues
+
+async def quote(items) -> dict:
+    """Preço atual, total e disponibilidade de cada linha, sem escrever nada"""
+    products = await load_products(object_ids(item.product_id for item in items))
+    requested = requested_quantities(items)
+
+    lines, subtotal, units = [], 0.0, 0
+    for item in items:
+        product = products.get(item.product_id)
+        issues = line_issues(item, product, requested)
+        price = product["price"] if product else None
+        line_total = round(price * item.quantity, 2) if product and not issues else 0.0
+        if not issues:
+            subtotal += line_total
+            units += item.quantity
+        lines.append({
+            "product_id": item.product_id,
+            "product_name": product["name"] if product else None,
+            "size": item.size,
+            "color": item.color,
+            "quantity": item.quantity,
+            "unit_price": price,
+            "line_total": line_total,
+            "stock": (product.get("stock") or 0) if product else 0,
+            "available": not issues,
+            "issues": issues,
+        })
+
+    return {
+        "items": lines,
+        "subtotal": round(subtotal, 2),
+        "item_count": units,
+        "valid": bool(lines) and all(line["available"] for line in lines),
+    }
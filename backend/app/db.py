@@ -1,8 +1,230 @@
+"""
+Ligação ao MongoDB (mongoengine para o caminho síncrono, Motor para o async).
+
+Os clientes são criados em init_db(), chamado no lifespan da app (e pelos comandos
+de app.manage), nunca ao importar: com uvicorn --workers / gunicorn cada processo
+abre o seu próprio pool depois do fork. init_db() volta a criar os clientes se
+detetar que o processo mudou (PID diferente).
+
+Pool, timeouts, compressão e read preference das leituras do catálogo vêm do
+ambiente (MONGO_*); pool_stats() mostra a ocupação dos pools deste processo.
+"""
 import os
-from mongoengine import connect
+import threading
+from mongoengine import connect, disconnect
+from pymongo import ReadPreference, monitoring
+from app.metrics import DB_LISTENER
+from app.settings import settings
+
+MONGO_URL = settings.mongo_url
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+# Compressão do protocolo, por ordem de preferência (o servidor escolhe a primeira que suportar)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "zstd,snappy,zlib")
+# Leituras do catálogo (listagem e detalhe de produtos) podem ir a secundários num replica set
+MONGO_CATALOG_READ_PREFERENCE = os.getenv("MONGO_CATALOG_READ_PREFERENCE", "primary")
+
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+def _compressor_available(name: str) -> bool:
+    try:
+        if name == "zstd":
+            import zstandard  # noqa: F401
+        elif name == "snappy":
+            import snappy  # noqa: F401
+    except ImportError:
+        return False
+    return name in ("zstd", "snappy", "zlib")
+
+def compressors() -> list:
+    """Compressores pedidos em MONGO_COMPRESSORS cujas bibliotecas estão instaladas"""
+    names = [name.strip() for name in MONGO_COMPRESSORS.split(",") if name.strip()]
+    return [name for name in names if _compressor_available(name)]
+
+def catalog_read_preference():
+    try:
+        return _READ_PREFERENCES[MONGO_CATALOG_READ_PREFERENCE]
+    except KeyError:
+        raise ValueError(
+            f"MONGO_CATALOG_READ_PREFERENCE inválido: {MONGO_CATALOG_READ_PREFERENCE} "
+            f"(opções: {', '.join(_READ_PREFERENCES)})"
+        )
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Ocupação do pool de um cliente (somada sobre os servidores do cluster)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {
+                "open": 0,
+                "in_use": 0,
+                "max_in_use": 0,
+                "waiting": 0,
+                "max_waiting": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checkout_timeouts": 0,
+                "wait_seconds_total": 0.0,
+                "max_wait_seconds": 0.0,
+                "pool_clears": 0,
+            }
+
+    def _add(self, key: str, amount: int, peak: str = None):
+        with self._lock:
+            self._stats[key] += amount
+            if peak:
+                self._stats[peak] = max(self._stats[peak], self._stats[key])
+
+    def connection_created(self, event):
+        self._add("open", 1)
+
+    def connection_closed(self, event):
+        self._add("open", -1)
+
+    def connection_check_out_started(self, event):
+        self._add("waiting", 1, peak="max_waiting")
+
+    def connection_checked_out(self, event):
+        wait = event.duration or 0.0
+        with self._lock:
+            stats = self._stats
+            stats["waiting"] -= 1
+            stats["in_use"] += 1
+            stats["max_in_use"] = max(stats["max_in_use"], stats["in_use"])
+            stats["checkouts"] += 1
+            stats["wait_seconds_total"] += wait
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._stats["waiting"] -= 1
+            self._stats["checkout_failures"] += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self._stats["checkout_timeouts"] += 1
+
+    def connection_checked_in(self, event):
+        self._add("in_use", -1)
+
+    def pool_cleared(self, event):
+        self._add("pool_clears", 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["max_pool_size"] = MONGO_MAX_POOL_SIZE
+        stats["min_pool_size"] = MONGO_MIN_POOL_SIZE
+        # Perto de 1 (ou checkout_timeouts > 0): o pool deste worker é pequeno demais
+        stats["saturation"] = stats["max_in_use"] / MONGO_MAX_POOL_SIZE if MONGO_MAX_POOL_SIZE else 0.0
+        stats["avg_wait_seconds"] = stats["wait_seconds_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+SYNC_POOL = PoolStatsListener("sync")
+ASYNC_POOL = PoolStatsListener("async")
+
+_pid = None
+_async_client = None
+_lock = threading.Lock()
+
+def client_options(pool: PoolStatsListener) -> dict:
+    """Opções comuns aos clientes pymongo e Motor"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "event_listeners": [DB_LISTENER, pool],
+        # Sem threads nem sockets até à primeira operação (seguro mesmo antes de um fork)
+        "connect": False,
+    }
+    names = compressors()
+    if names:
+        options["compressors"] = ",".join(names)
+    return options
+
+def init_db():
+    """Cria os clientes deste processo (idempotente; recria-os depois de um fork)"""
+    global _pid, _async_client
+    if _pid == os.getpid():
+        return
+    with _lock:
+        if _pid == os.getpid():
+            return
+        if _pid is not None:
+            # Processo filho: os clientes herdados pertencem ao pai
+            disconnect()
+            _async_client = None
+            SYNC_POOL.reset()
+            ASYNC_POOL.reset()
+        catalog_read_preference()  # Falha já se a configuração for inválida
+        print(f"Connecting to MongoDB...") # Log para debug
+        connect(host=MONGO_URL, **client_options(SYNC_POOL))
+        _pid = os.getpid()
+
+def close_db():
+    """Fecha os clientes deste processo (shutdown da app)"""
+    global _pid, _async_client
+    with _lock:
+        if _pid != os.getpid():
+            return
+        disconnect()
+        if _async_client is not None:
+            _async_client.close()
+        _async_client = None
+        _pid = None
+
+def get_async_db():
+    """Base de dados para o caminho async (Motor); o cliente é criado no primeiro uso"""
+    global _async_client
+    init_db()
+    if _async_client is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        _async_client = AsyncIOMotorClient(MONGO_URL, **client_options(ASYNC_POOL))
+    # Sem base de dados no URL o mongoengine usa "test"; manter o mesmo comportamento
+    return _async_client.get_default_database("test")
+
+def async_collection(model):
+    """Coleção Motor de um Document do mongoengine"""
+    return get_async_db()[model._get_collection_name()]
 
-# Vercel usa MONGODB_URI por padrão nas integrações
-MONGO_URL = os.getenv("MONGODB_URI", os.getenv("MONGO_URL", "mongodb://localhost:27017/mydatabase"))
+def catalog_collection(model):
+    """Coleção Motor para leituras do catálogo, com MONGO_CATALOG_READ_PREFERENCE"""
+    collection = async_collection(model)
+    read_preference = catalog_read_preference()
+    if read_preference == ReadPreference.PRIMARY:
+        return collection
+    return collection.with_options(read_preference=read_preference)
 
-print(f"Connecting to MongoDB...") # Log para debug
-connect(host=MONGO_URL)
\ No newline at end of file
+def pool_stats() -> dict:
+    return {"pid": os.getpid(), "sync": SYNC_POOL.stats(), "async": ASYNC_POOL.stats()}
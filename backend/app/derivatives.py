@@ -0,0 +1,101 @@
+"""
+Derivados das imagens de produto (gerados localmente com Pillow antes do upload).
+
+Cada original dá origem a versões redimensionadas por tamanho (IMAGE_SIZES) e
+formato (IMAGE_FORMATS, só os suportados pelo Pillow instalado) e a um placeholder
+LQIP: um WebP minúsculo em data URI, mostrado enquanto a imagem carrega.
+O Pillow só é importado quando há imagens para processar (worker da fila), não no
+arranque: as rotas do catálogo só usam select_variant.
+"""
+import base64
+import io
+import os
+
+def _parse_sizes(value: str) -> dict:
+    sizes = {}
+    for item in value.split(","):
+        if ":" in item:
+            name, width = item.split(":", 1)
+            sizes[name.strip()] = int(width)
+    return sizes
+
+# Nome do tamanho -> largura máxima em píxeis
+IMAGE_SIZES = _parse_sizes(os.getenv("IMAGE_SIZES", "thumbnail:160,card:480,detail:1200"))
+IMAGE_FORMATS = [f for f in os.getenv("IMAGE_FORMATS", "webp,avif").split(",") if f]
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "75"))
+PLACEHOLDER_WIDTH = 16
+
+# Formatos entre os quais a listagem escolhe a variante mais pequena
+LISTING_FORMATS = os.getenv("IMAGE_LISTING_FORMATS", "webp").split(",")
+
+_supported_formats = None
+
+def supported_formats() -> list:
+    """IMAGE_FORMATS que o Pillow instalado consegue escrever"""
+    global _supported_formats
+    if _supported_formats is None:
+        from PIL import features
+        _supported_formats = [f for f in IMAGE_FORMATS if features.check(f)]
+    return _supported_formats
+
+def _resize(image, width: int):
+    from PIL import Image
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+def _encode(image, fmt: str, quality: int = IMAGE_QUALITY) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+def build_derivatives(data: bytes, filename: str = None):
+    """
+    Devolve (meta, ficheiros): meta com width, height, placeholder e a lista de variantes
+    (sem url), e os bytes de cada variante pela mesma ordem, com o nome de ficheiro a usar.
+    Se o ficheiro não for uma imagem reconhecida devolve (None, []).
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    try:
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError):
+        return None, []
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+    stem = os.path.splitext(filename or "image")[0]
+    variants, files = [], []
+    for size, width in IMAGE_SIZES.items():
+        resized = _resize(image, width)
+        for fmt in supported_formats():
+            encoded = _encode(resized, fmt)
+            variants.append({
+                "size": size,
+                "format": fmt,
+                "width": resized.width,
+                "height": resized.height,
+                "bytes": len(encoded),
+            })
+            files.append((encoded, f"{stem}_{size}.{fmt}"))
+
+    placeholder = _encode(_resize(image, PLACEHOLDER_WIDTH), "webp", quality=30)
+    meta = {
+        "width": image.width,
+        "height": image.height,
+        "placeholder": "data:image/webp;base64," + base64.b64encode(placeholder).decode(),
+        "variants": variants,
+    }
+    return meta, files
+
+def select_variant(meta: dict, size: str, formats=None):
+    """Variante mais pequena (em bytes) do tamanho indicado, entre os formatos permitidos"""
+    formats = formats or LISTING_FORMATS
+    candidates = [
+        v for v in (meta or {}).get("variants") or []
+        if v.get("size") == size and v.get("format") in formats
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda v: v.get("bytes") or 0)
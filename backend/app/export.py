@@ -0,0 +1,72 @@
+"""
+Exportação em streaming (NDJSON ou CSV) a partir de um cursor do MongoDB.
+As linhas são geradas à medida que o cursor avança, por isso a memória usada é
+constante e os primeiros bytes saem logo.
+"""
+import csv
+import datetime
+import io
+from fastapi.responses import StreamingResponse
+from app.responses import dumps
+
+EXPORT_BATCH_SIZE = 500
+# As linhas são agrupadas em blocos deste tamanho antes de sair (menos chunks para comprimir)
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _cell(value) -> str:
+    """Valor de uma célula CSV (listas separadas por '|')"""
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "|".join(str(v) for v in value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+def ndjson_lines(docs):
+    chunk = bytearray()
+    for doc in docs:
+        doc["id"] = str(doc.pop("_id"))
+        chunk += dumps(doc) + b"\n"
+        if len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+def csv_lines(docs, columns, to_row):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for doc in docs:
+        row = to_row(doc)
+        writer.writerow([_cell(row.get(column)) for column in columns])
+        # Esvaziar o buffer a cada bloco para não acumular a exportação em memória
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def stream_export(query_set, fmt: str, filename: str, columns, to_row) -> StreamingResponse:
+    """
+    Devolve um StreamingResponse que percorre o queryset (documentos crus, em lotes
+    de EXPORT_BATCH_SIZE). Em CSV cada documento é convertido por to_row nas colunas dadas.
+    """
+    docs = query_set.as_pymongo().batch_size(EXPORT_BATCH_SIZE)
+    if fmt == "csv":
+        body = csv_lines(docs, columns, to_row)
+    else:
+        body = ndjson_lines(docs)
+
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -0,0 +1,137 @@
+"""
+Hashing e verificação de passwords (argon2) fora do event loop e da threadpool.
+
+O argon2 gasta dezenas de milissegundos de CPU por chamada; corre num pool de
+processos dedicado e limitado (HASH_POOL_WORKERS), para que uma rajada de logins
+não atrase os restantes pedidos do worker. Com HASH_POOL_WORKERS=0 (ex.: serverless)
+usa a threadpool por defeito; é o padrão na Vercel/Lambda, onde não há /dev/shm, e o
+fallback se o pool de processos não arrancar.
+
+Este módulo não importa a base de dados: é carregado pelos processos do pool.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from fastapi import HTTPException
+from app.settings import settings
+
+# Parâmetros do argon2 (hashes antigos com outros parâmetros são refeitos no login)
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+_pwd_context = None
+
+def get_pwd_context():
+    """CryptContext do argon2, criado no primeiro uso (passlib/argon2 pesam no cold start)"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            argon2__time_cost=ARGON2_TIME_COST,
+            argon2__memory_cost=ARGON2_MEMORY_COST,
+            argon2__parallelism=ARGON2_PARALLELISM,
+        )
+    return _pwd_context
+
+# Em serverless os pools de multiprocessing costumam falhar: threadpool por padrão
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", "0" if settings.serverless else "2"))
+# Pedidos de hashing em espera acima deste limite são recusados com 503
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+
+_pool = None
+_pool_disabled = False
+
+_stats = {
+    "submitted": 0,
+    "completed": 0,
+    "rejected": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "total_seconds": 0.0,
+    "max_seconds": 0.0,
+}
+
+def _hash(raw_password: str) -> str:
+    return get_pwd_context().hash(raw_password)
+
+def _verify_and_update(raw_password: str, hashed: str):
+    """(válida, novo_hash); novo_hash só vem preenchido se os parâmetros mudaram"""
+    return get_pwd_context().verify_and_update(raw_password, hashed)
+
+def _disable_pool(error: Exception):
+    """Passa a usar a threadpool até ao fim do processo"""
+    global _pool, _pool_disabled
+    print(f"Pool de hashing indisponível, a usar a threadpool: {error!r}")
+    _pool_disabled = True
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _get_pool():
+    global _pool
+    if _pool is None and HASH_POOL_WORKERS > 0 and not _pool_disabled:
+        try:
+            # spawn: os processos não herdam ligações à base de dados nem o event loop
+            _pool = ProcessPoolExecutor(max_workers=HASH_POOL_WORKERS, mp_context=get_context("spawn"))
+        except (OSError, NotImplementedError) as e:
+            _disable_pool(e)
+    return _pool
+
+async def _execute(func, *args):
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if pool is None:
+        return await loop.run_in_executor(None, func, *args)
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except (BrokenProcessPool, OSError) as e:
+        # Processos que não arrancam (sem /dev/shm, limites do sistema): repete na threadpool
+        _disable_pool(e)
+        return await loop.run_in_executor(None, func, *args)
+
+async def _run(func, *args):
+    if _stats["in_flight"] >= HASH_MAX_PENDING:
+        _stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Serviço ocupado, tenta novamente")
+
+    _stats["submitted"] += 1
+    _stats["in_flight"] += 1
+    _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    start = time.perf_counter()
+    try:
+        return await _execute(func, *args)
+    finally:
+        elapsed = time.perf_counter() - start
+        _stats["in_flight"] -= 1
+        _stats["completed"] += 1
+        _stats["total_seconds"] += elapsed
+        _stats["max_seconds"] = max(_stats["max_seconds"], elapsed)
+
+async def hash_password(raw_password: str) -> str:
+    return await _run(_hash, raw_password)
+
+async def verify_password(raw_password: str, hashed: str):
+    """Devolve (válida, novo_hash); guardar novo_hash quando não for None (rehash no login)"""
+    if not hashed:
+        return False, None
+    return await _run(_verify_and_update, raw_password, hashed)
+
+def hashing_stats() -> dict:
+    stats = dict(_stats)
+    stats["workers"] = 0 if _pool_disabled else HASH_POOL_WORKERS
+    stats["max_pending"] = HASH_MAX_PENDING
+    stats["avg_seconds"] = stats["total_seconds"] / stats["completed"] if stats["completed"] else 0.0
+    return stats
+
+def shutdown():
+    """Fecha o pool de processos (chamado no shutdown da app)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
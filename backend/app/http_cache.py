@@ -0,0 +1,73 @@
+"""
+Cache HTTP do catálogo: ETag, Last-Modified e Cache-Control.
+
+O ETag de um produto vem de (id, version); o de uma página da listagem vem dos
+(id, version) dos itens e do cursor seguinte, por isso é igual em todos os workers.
+Pedidos com If-None-Match (ou If-Modified-Since) que batem certo recebem 304 sem corpo.
+"""
+import datetime
+import hashlib
+import os
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "300"))
+
+def cache_control() -> str:
+    value = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+    if HTTP_CACHE_STALE_WHILE_REVALIDATE:
+        value += f", stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+    return value
+
+def product_etag(doc: dict) -> str:
+    return f'"{doc["_id"]}-{doc.get("version") or 0}"'
+
+def listing_etag(docs, next_cursor, view: str) -> str:
+    digest = hashlib.sha1(view.encode())
+    for doc in docs:
+        digest.update(f'|{doc["_id"]}:{doc.get("version") or 0}'.encode())
+    digest.update(f"|{next_cursor or ''}".encode())
+    return f'"{digest.hexdigest()}"'
+
+def http_date(value) -> str:
+    """Data HTTP (Last-Modified) a partir de um datetime UTC sem timezone, ou None"""
+    if not isinstance(value, datetime.datetime):
+        return None
+    return format_datetime(value.replace(tzinfo=datetime.timezone.utc, microsecond=0), usegmt=True)
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+def is_not_modified(request: Request, etag: str, last_modified: str = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def validator_headers(etag: str, last_modified: str = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control()}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+def cached_response(request: Request, entry: dict) -> Response:
+    """
+    Devolve a entrada {"etag", "last_modified", "body"} (body já em JSON) com os
+    validadores, ou um 304 vazio se o cliente já tiver esta versão.
+    """
+    headers = validator_headers(entry["etag"], entry.get("last_modified"))
+    if is_not_modified(request, entry["etag"], entry.get("last_modified")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
@@ -0,0 +1,132 @@
+"""
+Tarefas de imagens dos produtos, executadas pela fila (app.jobs).
+
+As rotas de admin só leem os ficheiros para a outbox e gravam o produto; a geração
+dos derivados (app.derivatives), o upload para o armazenamento e a remoção de
+imagens acontecem em segundo plano, com retry. Sem workers (serverless) correm no
+próprio pedido e os ficheiros só vão para a outbox se o upload falhar.
+"""
+import io
+import uuid
+from bson import Binary, ObjectId
+from fastapi import HTTPException
+from app import jobs
+from app.cache import invalidate_products
+from app.derivatives import build_derivatives
+from app.models.product import Product, versioned
+from app.uploads import get_client, upload_many
+
+# Os ficheiros viajam dentro da tarefa (limite de 16MB por documento no MongoDB)
+STAGED_MAX_BYTES = 12 * 1024 * 1024
+
+class StagedFile:
+    """Ficheiro lido da outbox, com a mesma forma que o UploadFile (file, filename)"""
+    __slots__ = ("file", "filename")
+
+    def __init__(self, data: bytes, filename: str = None):
+        self.file = io.BytesIO(data)
+        self.filename = filename
+
+def read_uploads(files) -> list:
+    """Lê os ficheiros do pedido para memória (antes de gravar o produto)"""
+    staged = []
+    for file in files:
+        data = file.file.read()
+        if len(data) > STAGED_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Imagem {file.filename} demasiado grande")
+        staged.append({"filename": file.filename, "data": Binary(data)})
+    return staged
+
+def enqueue_uploads(product_id, staged) -> int:
+    """Cria as tarefas de upload (lotes até STAGED_MAX_BYTES); devolve o número de imagens pendentes"""
+    batches, batch, size = [], [], 0
+    for item in staged:
+        if batch and size + len(item["data"]) > STAGED_MAX_BYTES:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(item)
+        size += len(item["data"])
+    if batch:
+        batches.append(batch)
+
+    pending = 0
+    for batch in batches:
+        # O id do lote torna o handler idempotente (retry depois de uma escrita já aplicada)
+        payload = {"product_id": str(product_id), "batch": uuid.uuid4().hex, "files": batch}
+        if jobs.dispatch("upload_images", payload) is not None:
+            pending += len(batch)
+    return pending
+
+def meta_urls(image_meta) -> list:
+    """URLs das variantes guardadas em image_meta (para apagar com o original)"""
+    return [v["url"] for meta in image_meta or [] for v in meta.get("variants") or [] if v.get("url")]
+
+def enqueue_deletions(urls):
+    for url in dict.fromkeys(urls):
+        jobs.dispatch("destroy_image", {"url": url})
+
+# Só se guardam os últimos lotes: um retry chega sempre muito antes de 50 novos uploads
+UPLOAD_BATCHES_KEPT = 50
+
+def _batch_applied(collection, product_id, batch) -> bool:
+    """O lote já está no produto? Na dúvida (erro na leitura) assume que sim: nunca apagar imagens em uso"""
+    if batch is None:
+        return False
+    try:
+        return collection.find_one({"_id": product_id, "upload_batches": batch}, {"_id": 1}) is not None
+    except Exception:
+        return True
+
+@jobs.handler("upload_images")
+def upload_images(payload: dict):
+    product_id = ObjectId(payload["product_id"])
+    batch = payload.get("batch")  # Ausente nas tarefas criadas antes do id de lote
+    collection = Product._get_collection()
+    product = collection.find_one({"_id": product_id}, {"upload_batches": 1})
+    if not product:
+        return  # Produto apagado entretanto
+    if batch is not None and batch in (product.get("upload_batches") or []):
+        return  # Repetição de um lote já gravado
+
+    originals = [StagedFile(f["data"], f.get("filename")) for f in payload["files"]]
+    metas, derived = [], []
+    for f in payload["files"]:
+        meta, files = build_derivatives(f["data"], f.get("filename"))
+        metas.append(meta or {"variants": []})
+        derived.extend(StagedFile(data, name) for data, name in files)
+
+    # Tudo ou nada: se falhar, nada fica no armazenamento e a tarefa é repetida
+    urls = upload_many(originals + derived)
+    image_urls, variant_urls = urls[:len(originals)], iter(urls[len(originals):])
+    for url, meta in zip(image_urls, metas):
+        meta["url"] = url
+        for variant in meta["variants"]:
+            variant["url"] = next(variant_urls)
+
+    push = {
+        "images": {"$each": image_urls},
+        "visible_images": {"$each": image_urls},
+        "image_meta": {"$each": metas},
+    }
+    query = {"_id": product_id}
+    if batch is not None:
+        push["upload_batches"] = {"$each": [batch], "$slice": -UPLOAD_BATCHES_KEPT}
+        query["upload_batches"] = {"$ne": batch}
+    try:
+        result = collection.update_one(query, versioned({"$push": push}))
+    except Exception:
+        # A escrita pode ter sido aplicada sem resposta: só apaga se o lote não ficou gravado.
+        # A tarefa é repetida e volta a enviar as imagens.
+        if not _batch_applied(collection, product_id, batch):
+            enqueue_deletions(urls)
+        raise
+    if not result.matched_count:
+        # Produto apagado, ou o lote já foi gravado por outra execução: estas cópias não são usadas
+        enqueue_deletions(urls)
+        return
+
+    invalidate_products(product_id)
+
+@jobs.handler("destroy_image")
+def destroy_image(payload: dict):
+    get_client().destroy(payload["url"])
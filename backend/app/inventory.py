@@ -0,0 +1,42 @@
+"""
+Reserva de stock com updates condicionais atómicos.
+
+Cada linha é decrementada com um único update_one filtrado por stock >= quantidade,
+por isso dois checkouts concorrentes nunca conseguem vender a mesma unidade.
+"""
+from bson import ObjectId
+from app.db import async_collection
+from app.models.product import Product, versioned
+
+class InsufficientStock(Exception):
+    """Não há stock suficiente para uma das linhas a reservar"""
+
+    def __init__(self, product_id: str, quantity: int):
+        super().__init__(f"Stock insuficiente para {product_id} (pedido: {quantity})")
+        self.product_id = product_id
+        self.quantity = quantity
+
+async def reserve_stock(lines):
+    """
+    Reserva (product_id, quantity) para cada linha. Se alguma falhar, as linhas já
+    reservadas são devolvidas e é lançado InsufficientStock.
+    Devolve a lista de linhas reservadas (para release_stock em caso de erro posterior).
+    """
+    collection = async_collection(Product)
+    reserved = []
+    for product_id, quantity in lines:
+        result = await collection.update_one(
+            {"_id": ObjectId(product_id), "stock": {"$gte": quantity}},
+            versioned({"$inc": {"stock": -quantity}}),
+        )
+        if not result.modified_count:
+            await release_stock(reserved)
+            raise InsufficientStock(product_id, quantity)
+        reserved.append((product_id, quantity))
+    return reserved
+
+async def release_stock(lines):
+    """Devolve ao stock as linhas reservadas anteriormente"""
+    collection = async_collection(Product)
+    for product_id, quantity in lines:
+        await collection.update_one({"_id": ObjectId(product_id)}, versioned({"$inc": {"stock": quantity}}))
@@ -0,0 +1,190 @@
+"""
+Fila de tarefas em segundo plano com outbox persistente no MongoDB (coleção "jobs").
+
+As rotas só gravam a tarefa (enqueue) e respondem; threads do próprio processo
+(JOB_WORKERS) reclamam as tarefas com find_one_and_update e executam o handler
+registado para o tipo. Falhas são repetidas com backoff exponencial até
+JOB_MAX_ATTEMPTS; depois a tarefa fica 'failed' para inspeção.
+Tarefas de um worker que morreu a meio voltam à fila quando o lock expira.
+
+Sem workers no processo (JOB_WORKERS=0, o padrão em serverless) as tarefas criadas
+com dispatch() correm logo no pedido; só as que falham ficam na fila, esvaziada pelo
+cron da Vercel (GET /jobs/run) ou por "python -m app.manage run-jobs".
+"""
+import datetime
+import os
+import threading
+from pymongo import ReturnDocument
+from app.models.job import Job
+from app.settings import settings
+
+# Em serverless as threads ficam congeladas entre invocações: sem workers por padrão
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0" if settings.serverless else "1"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "300"))
+JOB_LOCK_SECONDS = float(os.getenv("JOB_LOCK_SECONDS", "300"))
+# Tarefas executadas por chamada do cron (GET /jobs/run), para caber no tempo da função
+JOB_DRAIN_LIMIT = int(os.getenv("JOB_DRAIN_LIMIT", "20"))
+
+_handlers = {}
+_threads = []
+_stop = threading.Event()
+_wakeup = threading.Event()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "enqueued": 0,
+    "inline": 0,
+    "succeeded": 0,
+    "retried": 0,
+    "failed": 0,
+}
+
+def handler(kind: str):
+    """Regista a função que executa as tarefas do tipo indicado (recebe o payload)"""
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+def enqueue(kind: str, payload: dict, delay: float = 0):
+    """Grava a tarefa na outbox e acorda os workers; devolve o _id da tarefa"""
+    if kind not in _handlers:
+        raise ValueError(f"Tipo de tarefa desconhecido: {kind}")
+    job = Job(
+        kind=kind,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=delay),
+    )
+    job.validate()
+    doc = job.to_mongo().to_dict()
+    # Payload gravado tal como está: o DictField converteria bytes (ficheiros) em listas
+    doc["payload"] = payload
+    result = Job._get_collection().insert_one(doc)
+    _count("enqueued")
+    _wakeup.set()
+    return result.inserted_id
+
+def dispatch(kind: str, payload: dict):
+    """
+    Com workers no processo grava a tarefa na fila; sem workers (serverless) executa-a já.
+    Se a execução imediata falhar a tarefa vai para a fila e é repetida pelo cron.
+    Devolve o _id da tarefa em fila, ou None se já foi executada.
+    """
+    if JOB_WORKERS > 0:
+        return enqueue(kind, payload)
+    func = _handlers.get(kind)
+    if func is None:
+        raise ValueError(f"Tipo de tarefa desconhecido: {kind}")
+    try:
+        func(payload)
+    except Exception as e:
+        print(f"Tarefa {kind} falhou no pedido, fica na fila: {e}")
+        return enqueue(kind, payload)
+    _count("inline")
+    return None
+
+def backoff(attempts: int) -> float:
+    """Segundos até à próxima tentativa depois de 'attempts' falhas"""
+    return min(JOB_BACKOFF_BASE * 2 ** (attempts - 1), JOB_BACKOFF_MAX)
+
+def _claim():
+    """Reclama atomicamente a próxima tarefa pronta (ou presa com lock expirado)"""
+    now = datetime.datetime.utcnow()
+    return Job._get_collection().find_one_and_update(
+        {"$or": [
+            {"status": "pending", "run_at": {"$lte": now}},
+            {"status": "running", "locked_until": {"$lt": now}},
+        ]},
+        {
+            "$set": {
+                "status": "running",
+                "locked_until": now + datetime.timedelta(seconds=JOB_LOCK_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+def _run(doc: dict):
+    collection = Job._get_collection()
+    try:
+        func = _handlers.get(doc["kind"])
+        if func is None:
+            raise ValueError(f"Tipo de tarefa desconhecido: {doc['kind']}")
+        func(doc.get("payload") or {})
+    except Exception as e:
+        now = datetime.datetime.utcnow()
+        attempts = doc.get("attempts", 1)
+        if attempts >= doc.get("max_attempts", JOB_MAX_ATTEMPTS):
+            update = {"status": "failed", "last_error": repr(e), "updated_at": now}
+            _count("failed")
+            print(f"Tarefa {doc['kind']} {doc['_id']} falhou definitivamente: {e}")
+        else:
+            update = {
+                "status": "pending",
+                "last_error": repr(e),
+                "run_at": now + datetime.timedelta(seconds=backoff(attempts)),
+                "updated_at": now,
+            }
+            _count("retried")
+        collection.update_one({"_id": doc["_id"]}, {"$set": update, "$unset": {"locked_until": ""}})
+        return
+
+    # Concluída: sai da outbox
+    collection.delete_one({"_id": doc["_id"]})
+    _count("succeeded")
+
+def run_pending(limit: int = None) -> int:
+    """Executa as tarefas prontas até a fila esvaziar (ou até 'limit'); devolve quantas correram"""
+    processed = 0
+    while not _stop.is_set() and (limit is None or processed < limit):
+        doc = _claim()
+        if doc is None:
+            break
+        _run(doc)
+        processed += 1
+    return processed
+
+def _worker_loop():
+    while not _stop.is_set():
+        _wakeup.clear()
+        try:
+            run_pending()
+        except Exception as e:
+            print(f"Erro no worker de tarefas: {e}")
+        _wakeup.wait(JOB_POLL_INTERVAL)
+
+def start():
+    """Arranca os workers do processo (chamado no arranque da app)"""
+    if _threads or JOB_WORKERS <= 0:
+        return
+    _stop.clear()
+    for i in range(JOB_WORKERS):
+        thread = threading.Thread(target=_worker_loop, name=f"jobs-{i}", daemon=True)
+        thread.start()
+        _threads.append(thread)
+
+def stop(timeout: float = 5):
+    """Pára os workers; tarefas a meio voltam à fila quando o lock expirar"""
+    _stop.set()
+    _wakeup.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+def job_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    counts = Job._get_collection().aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+    stats["queue"] = {row["_id"]: row["count"] for row in counts}
+    stats["workers"] = len(_threads)
+    return stats
@@ -1,17 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import user, product, order, payment
-import app.db  # Conexão DB
+from app.compression import CompressionMiddleware
+from app.routes import user, product, order, payment, analytics, metrics as metrics_routes, jobs as jobs_routes
+from app import db, hashing, jobs, metrics, uploads
+from app.auth import is_admin_request, principal_cache_stats
+from app.cache import cache_stats
+from app.settings import settings
 import os
 
-# Tenta carregar dotenv, mas não falha se não existir (bom para Vercel)
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ligação ao MongoDB criada em cada worker (depois do fork), não ao importar
+    db.init_db()
+    # Workers da fila de tarefas (uploads e remoção de imagens)
+    jobs.start()
+    yield
+    jobs.stop()
+    # Fechar o pool de processos do hashing de passwords
+    hashing.shutdown()
+    db.close_db()
 
-app = FastAPI(title="Backend Mambini Store")
+app = FastAPI(title="Backend Mambini Store", lifespan=lifespan)
 
 # LISTA DE ORIGENS (Atualiza com o TEU link exato do frontend)
 origins = [
@@ -34,12 +44,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão (brotli/gzip) das respostas acima de COMPRESSION_MIN_SIZE bytes
+app.add_middleware(CompressionMiddleware)
+
+# Latência por rota, queries por pedido e ?profile=1 (admin); exposto em GET /metrics
+app.add_middleware(metrics.MetricsMiddleware, is_admin=is_admin_request)
+metrics.register_collector("cache", cache_stats)
+metrics.register_collector("principal_cache", principal_cache_stats)
+metrics.register_collector("hashing", hashing.hashing_stats)
+metrics.register_collector("uploads", uploads.upload_stats)
+metrics.register_collector("jobs", jobs.job_stats)
+metrics.register_collector("db_pool_sync", lambda: db.pool_stats()["sync"])
+metrics.register_collector("db_pool_async", lambda: db.pool_stats()["async"])
+
 # Rota de teste simples para ver se o servidor está vivo
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "Backend a funcionar!"}
 
+# Imagens guardadas localmente (UPLOAD_BACKEND=local)
+if settings.upload_backend == "local":
+    from fastapi.staticfiles import StaticFiles
+    upload_dir = os.getenv("UPLOAD_DIR", "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
+
 app.include_router(user.router)
 app.include_router(product.router)
 app.include_router(order.router)
-app.include_router(payment.router)
\ No newline at end of file
+app.include_router(payment.router)
+app.include_router(analytics.router)
+app.include_router(metrics_routes.router)
+app.include_router(jobs_routes.router)
\ No newline at end of file
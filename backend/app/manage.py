@@ -0,0 +1,153 @@
+"""
+Comandos de manutenção da base de dados.
+
+Uso (a partir da pasta backend/):
+    python -m app.manage ensure-indexes
+    python -m app.manage explain-queries
+    python -m app.manage reindex-search
+    python -m app.manage backfill-visible-images
+    python -m app.manage run-jobs
+    python -m app.manage rebuild-analytics
+"""
+import argparse
+import sys
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.db import init_db
+from app import analytics, jobs
+import app.images  # Regista os handlers das tarefas de imagens
+import app.stripe_events  # Regista os handlers dos eventos do Stripe
+from app.models.analytics import DailySales, DailyProductSales, OrderCustomer
+from app.models.job import Job
+from app.models.stripe_event import StripeEvent
+from app.models.order import Order
+from app.models.product import Product
+from app.models.user import User
+from app.search import search_tokens_for, prefix_query, text_query, TEXT_SCORE_PROJECTION, TEXT_SCORE_SORT
+
+BATCH_SIZE = 1000
+
+def reindex_search():
+    """Recalcula search_tokens de todos os produtos (produtos antigos ou importados em bulk)"""
+    collection = Product._get_collection()
+    cursor = collection.find({}, {"name": 1, "category": 1, "description": 1}, batch_size=BATCH_SIZE)
+
+    ops = []
+    updated = 0
+    for doc in cursor:
+        tokens = search_tokens_for(doc.get("name"), doc.get("category"), doc.get("description"))
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_tokens": tokens}}))
+        if len(ops) >= BATCH_SIZE:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+
+    # Garante que os índices declarados em Product.meta existem (incluindo o de texto)
+    Product.ensure_indexes()
+    print(f"search_tokens atualizados em {updated} produtos")
+
+def backfill_visible_images():
+    """Produtos antigos sem visible_images passam a mostrar todas as imagens (um único update_many)"""
+    result = Product._get_collection().update_many(
+        {
+            "$or": [{"visible_images": {"$exists": False}}, {"visible_images": {"$size": 0}}],
+            "images.0": {"$exists": True},
+        },
+        [{"$set": {
+            "visible_images": "$images",
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+            "updated_at": "$$NOW",
+        }}],
+    )
+    print(f"visible_images preenchido em {result.modified_count} produtos")
+
+def ensure_indexes():
+    """Cria (ou confirma) os índices declarados nos modelos; correr em cada deploy"""
+    for model in (Product, Order, User, Job, DailySales, DailyProductSales, OrderCustomer, StripeEvent):
+        model.ensure_indexes()
+        names = sorted(model._get_collection().index_information())
+        print(f"{model.__name__}: {', '.join(names)}")
+
+def _plan_summary(plan) -> tuple:
+    """Devolve (stages, índices) de um plano de execução, percorrendo os sub-planos"""
+    stages, indexes = [], []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append(node["stage"])
+            if "indexName" in node:
+                indexes.append(node["indexName"])
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(plan)
+    return stages, indexes
+
+def _route_queries() -> dict:
+    """Queries usadas pelas rotas, com valores de exemplo (o plano não depende deles)"""
+    sample_id = ObjectId()
+    products = Product._get_collection()
+    return {
+        "GET /products/": Product.objects().order_by("-created_at", "-id").limit(25),
+        "GET /products/?q=": products.find(text_query("camisola"), TEXT_SCORE_PROJECTION).sort(TEXT_SCORE_SORT).limit(25),
+        "GET /products/?q=&match=prefix": Product.objects(__raw__=prefix_query("cam")).order_by("-created_at", "-id").limit(25),
+        "GET /products/{id}": Product.objects(id=sample_id),
+        "GET /orders/": Order.objects(user_id=str(sample_id)).order_by("-created_at", "-id").limit(25),
+        "GET /orders/all": Order.objects().order_by("-created_at", "-id").limit(25),
+        "GET /orders/all?status=": Order.objects(status="pending").order_by("-created_at", "-id").limit(25),
+        "POST /payment/webhook": Order.objects(payment_intent_id="pi_sample"),
+        "GET /payment/intent/{id}": Order.objects(payment_intent_id="pi_sample"),
+        "GET /analytics/revenue": DailySales.objects(__raw__={"day": analytics.date_range(), "status": {"$in": list(analytics.REVENUE_STATUSES)}}),
+        "GET /analytics/top-products": DailyProductSales.objects(__raw__={"day": analytics.date_range(), "status": {"$in": list(analytics.REVENUE_STATUSES)}}),
+    }
+
+def explain_queries():
+    """Mostra o plano de cada query das rotas; termina com erro se alguma fizer COLLSCAN"""
+    regressions = []
+    for route, query_set in _route_queries().items():
+        plan = query_set.explain()
+        stages, indexes = _plan_summary(plan.get("queryPlanner", {}).get("winningPlan", plan))
+        print(f"{route:34} stages={'>'.join(stages) or '?'} indexes={','.join(indexes) or '-'}")
+        if "COLLSCAN" in stages:
+            regressions.append(route)
+
+    if regressions:
+        print(f"COLLSCAN em: {', '.join(regressions)}")
+        sys.exit(1)
+
+def run_jobs():
+    """Executa as tarefas pendentes da fila até esvaziar (alternativa ao cron GET /jobs/run)"""
+    processed = jobs.run_pending()
+    print(f"{processed} tarefas executadas")
+    print(jobs.job_stats())
+
+def rebuild_analytics():
+    """Reconstrói os rollups diários dos relatórios a partir de todos os pedidos"""
+    analytics.rebuild()
+    for model in (DailySales, DailyProductSales, OrderCustomer):
+        model.ensure_indexes()
+        print(f"{model.__name__}: {model._get_collection().estimated_document_count()} linhas")
+
+COMMANDS = {
+    "ensure-indexes": ensure_indexes,
+    "explain-queries": explain_queries,
+    "reindex-search": reindex_search,
+    "backfill-visible-images": backfill_visible_images,
+    "run-jobs": run_jobs,
+    "rebuild-analytics": rebuild_analytics,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    init_db()
+    COMMANDS[args.command]()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Métricas de desempenho em formato Prometheus (GET /metrics).
+
+- MetricsMiddleware: latência por rota (template), número e tempo das queries ao
+  MongoDB em cada pedido e cabeçalho Server-Timing
+- CommandListener do pymongo: duração de cada comando; comandos acima de
+  SLOW_QUERY_MS são registados no log "app.slow_queries" com a rota que os fez
+- external_call: duração das chamadas ao Cloudinary e ao Stripe
+- ?profile=1 (só admin): em vez da resposta devolve as stacks amostradas durante
+  o pedido em formato "collapsed" (flamegraph.pl, speedscope)
+
+Não importa a base de dados: app.db regista o listener ao criar os clientes.
+"""
+import bisect
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+from pymongo import monitoring
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+
+slow_query_log = logging.getLogger("app.slow_queries")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{self._labels(key)} {value}"
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        with self._lock:
+            values = {key: (list(state[0]), state[1], state[2]) for key, state in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{self._labels(key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{self._labels(key, le)} {count}"
+            yield f"{self.name}_sum{self._labels(key)} {total}"
+            yield f"{self.name}_count{self._labels(key)} {count}"
+
+REGISTRY = []
+# Nome -> função que devolve um dict de valores numéricos (cache, hashing, uploads, fila...)
+COLLECTORS = {}
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Latência dos pedidos HTTP", ("method", "route", "status")
+)
+db_commands_per_request = Histogram(
+    "db_commands_per_request", "Comandos MongoDB por pedido HTTP", ("route",), buckets=COUNT_BUCKETS
+)
+db_seconds_per_request = Histogram(
+    "db_seconds_per_request", "Tempo total em comandos MongoDB por pedido HTTP", ("route",)
+)
+db_command_duration = Histogram(
+    "db_command_duration_seconds", "Duração dos comandos MongoDB", ("command",)
+)
+db_command_failures = Counter(
+    "db_command_failures_total", "Comandos MongoDB que falharam", ("command",)
+)
+external_call_duration = Histogram(
+    "external_call_duration_seconds", "Duração das chamadas a serviços externos", ("service", "operation", "outcome")
+)
+
+def register_collector(name: str, func):
+    """Exporta os valores numéricos de func() como gauges mambini_<name>_<chave>"""
+    COLLECTORS[name] = func
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    for name, func in COLLECTORS.items():
+        try:
+            values = func()
+        except Exception as e:
+            slow_query_log.warning("Collector %s falhou: %s", name, e)
+            continue
+        for key, value in sorted(values.items()):
+            metric = f"mambini_{name}_{key}"
+            if isinstance(value, dict):
+                # Ex.: {"queue": {"pending": 3}} -> mambini_jobs_queue{key="pending"} 3
+                samples = [(f'{{key="{_escape(str(k))}"}}', v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))]
+            else:
+                samples = [("", value)]
+            samples = [(labels, v) for labels, v in samples if _is_number(v)]
+            if samples:
+                lines.append(f"# TYPE {metric} gauge")
+                lines.extend(f"{metric}{labels} {v}" for labels, v in samples)
+    return "\n".join(lines) + "\n"
+
+class RequestStats:
+    """Contadores do pedido em curso (partilhados com as threads do Motor e da threadpool)"""
+    __slots__ = ("route", "db_commands", "db_seconds")  # route: caminho do pedido (para o log)
+
+    def __init__(self):
+        self.route = None
+        self.db_commands = 0
+        self.db_seconds = 0.0
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+class DBCommandListener(monitoring.CommandListener):
+    def __init__(self):
+        self._started = {}
+
+    def started(self, event):
+        if SLOW_QUERY_MS >= 0:
+            collection = event.command.get(event.command_name)
+            self._started[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, failed: bool):
+        seconds = event.duration_micros / 1_000_000
+        collection = self._started.pop((event.connection_id, event.request_id), None)
+        db_command_duration.observe(seconds, command=event.command_name)
+        if failed:
+            db_command_failures.inc(command=event.command_name)
+
+        stats = _current.get()
+        if stats is not None:
+            stats.db_commands += 1
+            stats.db_seconds += seconds
+
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            slow_query_log.warning(
+                "Query lenta: %s %s.%s %.1fms (rota %s)",
+                event.command_name, event.database_name, collection, seconds * 1000,
+                stats.route if stats else "-",
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+DB_LISTENER = DBCommandListener()
+
+@contextmanager
+def external_call(service: str, operation: str):
+    """Mede uma chamada a um serviço externo (ex.: with external_call("stripe", "retrieve"))"""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        external_call_duration.observe(time.perf_counter() - start, service=service, operation=operation, outcome=outcome)
+
+class StackSampler:
+    """Amostra as stacks de todas as threads ativas enquanto o pedido corre"""
+
+    # Frames de threads paradas à espera de trabalho (não contam)
+    IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "thread.py")
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = _Tally()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own or frame.f_code.co_filename.endswith(self.IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+def _wants_profile(scope) -> bool:
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile") == ["1"]
+
+class MetricsMiddleware:
+    """Middleware ASGI: latência por rota, queries por pedido, Server-Timing e ?profile=1"""
+
+    def __init__(self, app, is_admin=None):
+        self.app = app
+        # async (scope) -> bool; decide se o pedido pode ser perfilado
+        self.is_admin = is_admin
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if _wants_profile(scope) and self.is_admin is not None and await self.is_admin(scope):
+            await self._profile(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        stats.route = scope["path"]
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                timing = f'app;dur={elapsed_ms:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_commands} queries"'
+                message.setdefault("headers", []).append((b"server-timing", timing.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = _route_template(scope)
+            http_request_duration.observe(
+                time.perf_counter() - start, method=scope["method"], route=route, status=status_code
+            )
+            db_commands_per_request.observe(stats.db_commands, route=route)
+            db_seconds_per_request.observe(stats.db_seconds, route=route)
+
+    async def _profile(self, scope, receive, send):
+        """Corre o pedido a amostrar as stacks e devolve-as em vez da resposta"""
+        stats = RequestStats()
+        stats.route = scope["path"]
+        token = _current.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def capture(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        try:
+            with StackSampler() as sampler:
+                await self.app(scope, receive, capture)
+        finally:
+            _current.reset(token)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        body = sampler.collapsed().encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-status", str(status_code).encode()),
+                (b"x-profile-samples", str(sum(sampler.samples.values())).encode()),
+                (b"server-timing", f'app;dur={elapsed_ms:.1f}, db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_commands} queries"'.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
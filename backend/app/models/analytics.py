@@ -0,0 +1,46 @@
+from mongoengine import Document, StringField, FloatField, IntField, DateTimeField
+
+class DailySales(Document):
+    """Rollup diário de pedidos por estado (mantido por app.analytics)"""
+    day = DateTimeField(required=True)  # Meia-noite UTC do dia de criação do pedido
+    status = StringField(required=True)
+    orders = IntField(default=0)
+    revenue = FloatField(default=0.0)
+    units = IntField(default=0)
+
+    meta = {
+        'collection': 'daily_sales',
+        'indexes': [
+            {'fields': ['day', 'status'], 'unique': True},
+        ],
+        'auto_create_index': False,
+    }
+
+class DailyProductSales(Document):
+    """Rollup diário de unidades vendidas por produto, tamanho, cor e estado do pedido"""
+    day = DateTimeField(required=True)
+    status = StringField(required=True)
+    product_id = StringField(required=True)
+    product_name = StringField()
+    size = StringField()
+    color = StringField()
+    units = IntField(default=0)
+    revenue = FloatField(default=0.0)
+
+    meta = {
+        'collection': 'daily_product_sales',
+        'indexes': [
+            {'fields': ['day', 'status', 'product_id', 'size', 'color'], 'unique': True},
+        ],
+        'auto_create_index': False,
+    }
+
+class OrderCustomer(Document):
+    """Um documento por cliente com pelo menos um pedido (mantido por app.analytics)"""
+    user_id = StringField(primary_key=True)
+    first_order_at = DateTimeField()
+
+    meta = {
+        'collection': 'order_customers',
+        'auto_create_index': False,
+    }
@@ -0,0 +1,33 @@
+from mongoengine import Document, StringField, IntField, DateTimeField, DictField
+import datetime
+
+class Job(Document):
+    """Tarefa em segundo plano (outbox persistente, processada por app.jobs)"""
+    STATUS_CHOICES = ('pending', 'running', 'failed')
+
+    kind = StringField(required=True)  # Nome do handler registado em app.jobs
+    payload = DictField()
+
+    status = StringField(choices=STATUS_CHOICES, default='pending')
+    attempts = IntField(default=0)
+    max_attempts = IntField(default=5)
+    last_error = StringField()
+
+    # Só é executada a partir de run_at (backoff entre tentativas)
+    run_at = DateTimeField(default=datetime.datetime.utcnow)
+    # Tarefas 'running' com o lock expirado voltam a ser reclamadas (worker morreu a meio)
+    locked_until = DateTimeField()
+
+    created_at = DateTimeField(default=datetime.datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+
+    meta = {
+        'collection': 'jobs',
+        'indexes': [
+            # Próxima tarefa a executar
+            {'fields': ['status', 'run_at']},
+            # Recuperação de tarefas presas
+            {'fields': ['status', 'locked_until']},
+        ],
+        'auto_create_index': False,
+    }
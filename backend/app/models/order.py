@@ -42,6 +42,21 @@ class Order(Document):
     # Informações de pagamento Stripe
     payment_intent_id = StringField()  # ID do PaymentIntent do Stripe
     payment_status = StringField(default='pending')  # pending, succeeded, failed, cancelled
+
+    meta = {
+        'indexes': [
+            # Webhook do Stripe e estado do pagamento (pedidos sem pagamento não entram no índice)
+            {'fields': ['payment_intent_id'], 'unique': True, 'sparse': True},
+            # Pedidos do utilizador, mais recentes primeiro (com _id para a paginação por keyset)
+            {'fields': ['user_id', '-created_at', '-id']},
+            # Listagem de admin filtrada por estado
+            {'fields': ['status', '-created_at', '-id']},
+            # Listagem de admin sem filtros
+            {'fields': ['-created_at', '-id']},
+        ],
+        # Os índices são criados no deploy (python -m app.manage ensure-indexes), não no primeiro pedido
+        'auto_create_index': False,
+    }
     
     def save(self, *args, **kwargs):
         """Atualiza updated_at ao salvar"""
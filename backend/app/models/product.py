@@ -1,12 +1,46 @@
-from mongoengine import Document, StringField, FloatField, IntField, DateTimeField, ListField, ValidationError
+from mongoengine import (
+    Document, EmbeddedDocument, StringField, FloatField, IntField, DateTimeField, ListField,
+    EmbeddedDocumentField, ValidationError
+)
+from app.search import search_tokens_for
 import datetime
 
+class ImageVariant(EmbeddedDocument):
+    """Versão redimensionada de uma imagem (ver app.derivatives)"""
+    size = StringField(required=True)  # thumbnail, card, detail
+    format = StringField(required=True)  # webp, avif
+    url = StringField(required=True)
+    width = IntField()
+    height = IntField()
+    bytes = IntField()
+
+class ImageMeta(EmbeddedDocument):
+    """Metadados de uma imagem do produto: dimensões, placeholder e derivados"""
+    url = StringField(required=True)  # URL do original (o mesmo que está em images)
+    width = IntField()
+    height = IntField()
+    placeholder = StringField()  # LQIP em data URI
+    variants = ListField(EmbeddedDocumentField(ImageVariant))
+
+def versioned(update: dict) -> dict:
+    """
+    Junta a um update cru ($set/$inc/$push...) o incremento de version e o updated_at.
+    Todas as escritas em produtos têm de passar por aqui (ou por Product.save), porque
+    version alimenta os ETags do catálogo.
+    """
+    update = {op: dict(fields) for op, fields in update.items()}
+    update.setdefault("$inc", {})["version"] = 1
+    update.setdefault("$set", {})["updated_at"] = datetime.datetime.utcnow()
+    return update
+
 class Product(Document):
     name = StringField(required=True, max_length=100)
     description = StringField()
     price = FloatField(required=True)
     stock = IntField(default=0, min_value=0)
     created_at = DateTimeField(default=datetime.datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.datetime.utcnow)
+    version = IntField(default=0)  # Incrementado em cada escrita (ETag)
     sizes = ListField(StringField())
     available_sizes = ListField(StringField())
     gender = StringField(choices=['male', 'female', 'unisex'])
@@ -15,7 +49,56 @@ class Product(Document):
     available_colors = ListField(StringField())
     images = ListField(StringField())  # Todas as imagens do produto
     visible_images = ListField(StringField())  # Imagens visíveis na loja
+    image_meta = ListField(EmbeddedDocumentField(ImageMeta))  # Derivados de cada imagem (preenchido pela fila)
+    search_tokens = ListField(StringField())  # Tokens normalizados para pesquisa por prefixo (preenchido em clean)
+    upload_batches = ListField(StringField())  # Lotes de upload já aplicados (idempotência da fila)
+
+    meta = {
+        'indexes': [
+            # Suporta a paginação por keyset da listagem (ordem -created_at, -_id)
+            {'fields': ['-created_at', '-id']},
+            # Pesquisa de texto com relevância: o nome pesa mais que a categoria e a descrição
+            {
+                'fields': ['$name', '$category', '$description'],
+                'default_language': 'portuguese',
+                'weights': {'name': 10, 'category': 5, 'description': 1},
+            },
+            # Pesquisa enquanto se escreve (regex ancorado sobre tokens normalizados)
+            'search_tokens',
+        ],
+        # Os índices são criados no deploy (python -m app.manage ensure-indexes), não no primeiro pedido
+        'auto_create_index': False,
+    }
     
+    def save(self, *args, **kwargs):
+        """
+        Incrementa version e atualiza updated_at ao salvar. Num produto já gravado o
+        incremento é um $inc no próprio update (ver _get_update_doc), como em versioned():
+        gravar o valor lido com $set perderia os incrementos feitos entretanto pelas
+        reservas de stock ou pela fila de imagens, e repetiria um ETag.
+        """
+        self.updated_at = datetime.datetime.utcnow()
+        if self._created or self.pk is None:
+            self.version = (self.version or 0) + 1
+            return super().save(*args, **kwargs)
+
+        result = super().save(*args, **kwargs)
+        # Versão efetiva depois do $inc (sem marcar o campo como alterado)
+        doc = self._get_collection().find_one({"_id": self.pk}, {"version": 1})
+        if doc:
+            self._data["version"] = doc.get("version")
+        return result
+
+    def _get_update_doc(self):
+        update_doc = super()._get_update_doc()
+        if update_doc:
+            changes = update_doc.get("$set", {})
+            changes.pop("version", None)
+            if not changes:
+                update_doc.pop("$set", None)
+            update_doc.setdefault("$inc", {})["version"] = 1
+        return update_doc
+
     def clean(self):
         """Normaliza o campo created_at se for uma string ISO e valida stock"""
         super().clean()
@@ -23,6 +106,9 @@ class Product(Document):
         # Validar stock não negativo
         if self.stock is not None and self.stock < 0:
             raise ValidationError("Stock não pode ser negativo")
+
+        # Manter os tokens de pesquisa sincronizados com o texto do produto
+        self.search_tokens = search_tokens_for(self.name, self.category, self.description)
         
         if isinstance(self.created_at, str):
             try:
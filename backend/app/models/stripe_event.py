@@ -0,0 +1,22 @@
+from mongoengine import Document, StringField, DateTimeField
+import datetime
+import os
+
+# Eventos mais antigos saem da coleção (o Stripe só repete entregas durante ~3 dias)
+STRIPE_EVENT_TTL = int(os.getenv("STRIPE_EVENT_TTL", str(30 * 24 * 3600)))
+
+class StripeEvent(Document):
+    """Evento do Stripe já recebido (idempotência do webhook)"""
+    id = StringField(primary_key=True)  # ID do evento no Stripe (evt_...)
+    type = StringField()
+    payment_intent_id = StringField()
+    received_at = DateTimeField(default=datetime.datetime.utcnow)
+    processed_at = DateTimeField()
+
+    meta = {
+        'collection': 'stripe_events',
+        'indexes': [
+            {'fields': ['received_at'], 'expireAfterSeconds': STRIPE_EVENT_TTL},
+        ],
+        'auto_create_index': False,
+    }
@@ -1,7 +1,5 @@
-from mongoengine import Document, StringField, EmailField
-from passlib.context import CryptContext
-
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+from mongoengine import Document, StringField, EmailField, IntField
+from app.hashing import get_pwd_context
 
 class User(Document):
     ROLE_CHOICES = ('client', 'admin')
@@ -9,6 +7,8 @@ class User(Document):
     name = StringField(max_length=100)
     password = StringField(required=True)
     role = StringField(choices=ROLE_CHOICES, default='client')
+    # Incrementado quando a password ou o role mudam: revoga os tokens emitidos antes
+    token_version = IntField(default=0)
     
     # Informações de endereço para entrega
     address = StringField()
@@ -18,7 +18,7 @@ class User(Document):
     phone = StringField()
 
     def set_password(self, raw_password: str):
-        self.password = pwd_context.hash(raw_password)
+        self.password = get_pwd_context().hash(raw_password)
 
     def verify_password(self, raw_password: str) -> bool:
-        return pwd_context.verify(raw_password, self.password)
\ No newline at end of file
+        return get_pwd_context().verify(raw_password, self.password)
\ No newline at end of file
@@ -0,0 +1,91 @@
+import base64
+import datetime
+import json
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+# Tamanhos de página por defeito para as listagens
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+def _encode(data: dict) -> str:
+    raw = json.dumps(data)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    if not isinstance(data, dict):
+        raise ValueError("cursor")
+    return data
+
+def encode_cursor(created_at: datetime.datetime, doc_id) -> str:
+    """Gera um cursor opaco a partir do último documento de uma página"""
+    return _encode({"c": created_at.isoformat() if created_at else None, "i": str(doc_id)})
+
+def decode_cursor(cursor: str):
+    """Devolve (created_at, ObjectId) a partir de um cursor gerado por encode_cursor"""
+    try:
+        data = _decode(cursor)
+        created_at = datetime.datetime.fromisoformat(data["c"]) if data.get("c") else None
+        return created_at, ObjectId(data["i"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+# Ordem das listagens (suportada pelos índices -created_at, -_id)
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+def keyset_query(cursor: str) -> dict:
+    """Filtro que devolve os documentos seguintes ao cursor na ordem (-created_at, -_id)"""
+    created_at, doc_id = decode_cursor(cursor)
+    if created_at is None:
+        return {"created_at": None, "_id": {"$lt": doc_id}}
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": doc_id}},
+        {"created_at": None},
+    ]}
+
+def _and(query: dict, extra: dict) -> dict:
+    return {"$and": [query, extra]} if query else extra
+
+async def paginate(collection, query: dict, projection: dict, limit: int, cursor: str = None):
+    """
+    Paginação por keyset (created_at, _id) sobre uma coleção Motor.
+    Devolve (documentos crus, next_cursor); next_cursor é None na última página.
+    """
+    if cursor:
+        query = _and(query, keyset_query(cursor))
+
+    # Pede mais um documento para saber se existe página seguinte
+    docs = await collection.find(query, projection).sort(KEYSET_SORT).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last.get("created_at"), last["_id"])
+    return docs, next_cursor
+
+async def paginate_ranked(collection, query: dict, projection: dict, sort, limit: int, cursor: str = None):
+    """
+    Paginação para resultados ordenados por relevância (pesquisa de texto), onde
+    não há chave estável para keyset. O cursor guarda o offset da página seguinte.
+    """
+    offset = 0
+    if cursor:
+        try:
+            offset = int(_decode(cursor)["o"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    docs = await collection.find(query, projection).sort(sort).skip(offset).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = _encode({"o": offset + limit})
+    return docs, next_cursor
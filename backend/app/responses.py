@@ -0,0 +1,34 @@
+"""
+Serialização JSON rápida para payloads que já foram validados.
+
+O FastAPI volta a validar o que a rota devolve contra o response_model antes de o
+serializar. Nas rotas quentes (catálogo em cache, listagens de pedidos) o payload já
+vem de um modelo Pydantic, por isso é convertido diretamente em bytes (pydantic-core
+para modelos, orjson para dicts) e devolvido num Response, sem a segunda passagem.
+"""
+import datetime
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+def dumps(content) -> bytes:
+    """JSON em bytes: modelos via pydantic-core, o resto via orjson"""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que aceita modelos Pydantic e serializa com dumps (sem nova validação)"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Query
+from app.auth import require_admin
+from app.analytics import (
+    REVENUE_STATUSES, date_range, overview, revenue_per_day, orders_by_status, top_products, units_by_variant
+)
+from app.models.order import Order
+from app.schemas.analytics import Overview, RevenueDay, StatusCount, TopProduct, VariantUnits
+from datetime import date
+from typing import List, Optional, Literal
+
+router = APIRouter(prefix="/analytics")
+
+def report_filters(
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        status: List[Literal[Order.STATUS_CHOICES]] = Query(list(REVENUE_STATUSES))
+):
+    """Intervalo de dias (por defeito os últimos 30) e estados que contam como venda"""
+    return date_range(date_from, date_to), status
+
+@router.get("/overview", response_model=Overview)
+async def get_overview(admin=Depends(require_admin)):
+    """Totais do dashboard: produtos, pedidos, valor das vendas e clientes distintos"""
+    return await overview()
+
+@router.get("/revenue", response_model=List[RevenueDay])
+async def get_revenue(filters=Depends(report_filters), admin=Depends(require_admin)):
+    """Receita, pedidos e unidades por dia (dias sem vendas são omitidos)"""
+    days, statuses = filters
+    return await revenue_per_day(days, statuses)
+
+@router.get("/orders-by-status", response_model=List[StatusCount])
+async def get_orders_by_status(
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        admin=Depends(require_admin)
+):
+    """Número de pedidos e valor por estado, criados no intervalo"""
+    return await orders_by_status(date_range(date_from, date_to))
+
+@router.get("/top-products", response_model=List[TopProduct])
+async def get_top_products(
+        filters=Depends(report_filters),
+        sort_by: Literal["units", "revenue"] = "units",
+        limit: int = Query(10, ge=1, le=100),
+        admin=Depends(require_admin)
+):
+    """Produtos mais vendidos (por unidades ou receita)"""
+    days, statuses = filters
+    return await top_products(days, statuses, limit, sort_by)
+
+@router.get("/units-by-variant", response_model=List[VariantUnits])
+async def get_units_by_variant(
+        filters=Depends(report_filters),
+        product_id: Optional[str] = None,
+        admin=Depends(require_admin)
+):
+    """Unidades vendidas por tamanho e cor (opcionalmente de um só produto)"""
+    days, statuses = filters
+    return await units_by_variant(days, statuses, product_id)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Header, HTTPException
+from typing import Optional
+import os
+from app import jobs
+
+router = APIRouter(tags=["Jobs"])
+
+# A Vercel envia "Authorization: Bearer <CRON_SECRET>" nas chamadas dos crons (vercel.json)
+CRON_SECRET = os.getenv("CRON_SECRET")
+
+@router.get("/jobs/run", include_in_schema=False)
+def run_jobs(authorization: Optional[str] = Header(None)):
+    """Executa as tarefas pendentes da fila (cron em serverless, onde não há workers)"""
+    if not CRON_SECRET:
+        raise HTTPException(status_code=503, detail="CRON_SECRET não está definida")
+    if authorization != f"Bearer {CRON_SECRET}":
+        raise HTTPException(status_code=401, detail="Invalid cron secret")
+    processed = jobs.run_pending(limit=jobs.JOB_DRAIN_LIMIT)
+    return {"processed": processed, "stats": jobs.job_stats()}
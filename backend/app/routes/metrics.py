@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import os
+from app import metrics
+from app.auth import is_admin_request
+
+router = APIRouter(tags=["Metrics"])
+
+# Se definido, /metrics exige "Authorization: Bearer <METRICS_TOKEN>" (scraper do Prometheus);
+# sem ele a rota só responde a admins (nunca fica pública)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(request: Request, authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN:
+        if authorization != f"Bearer {METRICS_TOKEN}":
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif not await is_admin_request(request.scope):
+        raise HTTPException(status_code=401, detail="Admin token or METRICS_TOKEN required")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,30 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from app.models.order import Order, OrderItem
-from app.models.product import Product
-from app.schemas.order import OrderCreate, OrderOut, OrderStatusUpdate
-from app.auth import get_current_user, require_admin
-from typing import List
-from mongoengine.errors import ValidationError
-import os
-
-# Garantir que dotenv seja carregado
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
-
-# Importar Stripe opcionalmente
-try:
-    import stripe
-    STRIPE_AVAILABLE = True
-    STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
-    if STRIPE_SECRET_KEY:
-        stripe.api_key = STRIPE_SECRET_KEY
-except ImportError:
-    STRIPE_AVAILABLE = False
-    stripe = None
-    STRIPE_SECRET_KEY = None
+from app.schemas.order import (
+    OrderCreate, OrderOut, OrderStatusUpdate, OrderPage, OrderSummaryPage, OrderQuoteRequest, OrderQuote
+)
+from app.auth import get_current_principal, require_admin
+from app.cache import invalidate_products
+from app.cart import MAX_CART_LINES, SIZE_UNAVAILABLE, load_products, quote, variant_issue
+from app.db import async_collection
+from app.inventory import reserve_stock, release_stock, InsufficientStock
+from app.analytics import apply_status_change_async, transition_order
+from app.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.serializers import ORDER_SUMMARY_FIELDS, projection, order_summary_from_doc
+from app.export import stream_export
+from app.responses import FastJSONResponse
+from app.metrics import external_call
+from app.settings import settings
+from app.stripe_client import get_stripe
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Union, Literal
 
 router = APIRouter(prefix="/orders")
 
@@ -62,82 +58,113 @@ def order_to_order_out(order: Order) -> OrderOut:
     )
 
 @router.post("/", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
-def create_order(order_data: OrderCreate, current_user=Depends(get_current_user)):
+async def create_order(order_data: OrderCreate, current_user=Depends(get_current_principal)):
     """
     Cria um novo pedido a partir do carrinho do usuário.
-    Valida quantidade e atualiza produtos.
+    Valida quantidade e reserva o stock com updates atómicos.
     """
-    # Validar quantidade e calcular total
-    total_amount = 0.0
-    validated_items = []
-    
+    if not order_data.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Carrinho vazio"
+        )
+
+    # Buscar todos os produtos do carrinho numa única query
+    try:
+        object_ids = [ObjectId(product_id) for product_id in {item.product_id for item in order_data.items}]
+    except InvalidId as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro ao validar produtos: {str(e)}"
+        )
+    products = await load_products(object_ids)
+
+    # Validar linhas e somar a quantidade pedida por produto (o mesmo produto pode
+    # aparecer em várias linhas com tamanhos/cores diferentes)
+    requested = {}
     for item in order_data.items:
-        # Buscar produto
-        try:
-            product = Product.objects(id=item.product_id).first()
-            if not product:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Produto {item.product_id} não encontrado"
-                )
-            
-            # Validar quantidade
-            if product.stock is None or product.stock < 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Produto {product.name} tem quantidade inválida"
-                )
-            
-            if product.stock < item.quantity:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Quantidade insuficiente para {product.name}. Disponível: {product.stock}, Solicitado: {item.quantity}"
-                )
-            
-            if item.quantity <= 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Quantidade deve ser maior que zero para {product.name}"
-                )
-            
-            # Calcular subtotal
-            subtotal = product.price * item.quantity
-            total_amount += subtotal
-            
-            # Criar item validado
-            validated_items.append(OrderItem(
-                product_id=str(product.id),
-                product_name=product.name,
-                price=product.price,
-                quantity=item.quantity,
-                size=item.size,
-                color=item.color,
-                image=item.image or (product.images[0] if product.images else "")
-            ))
-            
-            # Atualizar quantidade
-            product.stock -= item.quantity
-            product.save()
-            
-        except ValidationError as e:
+        product = products.get(item.product_id)
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Produto {item.product_id} não encontrado"
+            )
+
+        if item.quantity <= 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Erro ao validar produto {item.product_id}: {str(e)}"
+                detail=f"Quantidade deve ser maior que zero para {product['name']}"
             )
-    
-    if not validated_items:
+
+        # Só se vende o que está em available_sizes / available_colors (listas vazias não restringem)
+        variant = variant_issue(product, item.size, item.color)
+        if variant == SIZE_UNAVAILABLE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tamanho {item.size} indisponível para {product['name']}"
+            )
+        if variant:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cor {item.color} indisponível para {product['name']}"
+            )
+
+        requested[item.product_id] = requested.get(item.product_id, 0) + item.quantity
+
+    # Validar quantidade (uma verificação por produto)
+    for product_id, quantity in requested.items():
+        product = products[product_id]
+        stock = product.get("stock")
+        if stock is None or stock < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Produto {product['name']} tem quantidade inválida"
+            )
+
+        if stock < quantity:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantidade insuficiente para {product['name']}. Disponível: {stock}, Solicitado: {quantity}"
+            )
+
+    # Calcular total e criar itens validados
+    total_amount = 0.0
+    validated_items = []
+    for item in order_data.items:
+        product = products[item.product_id]
+        images = product.get("images") or []
+        total_amount += product["price"] * item.quantity
+        validated_items.append(OrderItem(
+            product_id=str(product["_id"]),
+            product_name=product["name"],
+            price=product["price"],
+            quantity=item.quantity,
+            size=item.size,
+            color=item.color,
+            image=item.image or (images[0] if images else "")
+        ))
+
+    # Reservar stock: cada produto só é decrementado se ainda houver quantidade suficiente
+    # (evita vender a mesma unidade em checkouts concorrentes); falhas revertem o já reservado
+    try:
+        reserved = await reserve_stock(list(requested.items()))
+    except InsufficientStock as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Carrinho vazio"
+            detail=f"Quantidade insuficiente para {products[e.product_id]['name']}"
         )
+    invalidate_products(*[product_id for product_id, _ in reserved])
     
     # Verificar status do pagamento se payment_intent_id foi fornecido
     initial_status = "pending"
     payment_status = "pending"
     
-    if order_data.payment_intent_id and STRIPE_AVAILABLE and STRIPE_SECRET_KEY:
+    stripe = get_stripe() if order_data.payment_intent_id and settings.stripe_secret_key else None
+    if stripe is not None:
         try:
-            payment_intent = stripe.PaymentIntent.retrieve(order_data.payment_intent_id)
+            # Chamada bloqueante ao Stripe fora do event loop
+            with external_call("stripe", "payment_intent.retrieve"):
+                payment_intent = await run_in_threadpool(stripe.PaymentIntent.retrieve, order_data.payment_intent_id)
             payment_status = payment_intent.status
             
             # Se o pagamento já foi confirmado, iniciar pedido como "processing"
@@ -168,39 +195,149 @@ def create_order(order_data: OrderCreate, current_user=Depends(get_current_user)
     )
     
     try:
-        order.save()
+        order.validate()
+        doc = order.to_mongo()
+        result = await async_collection(Order).insert_one(doc)
+        order.id = result.inserted_id
     except Exception as e:
+        # Devolver o stock reservado se o pedido não foi gravado
+        await release_stock(reserved)
+        invalidate_products(*[product_id for product_id, _ in reserved])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao criar pedido: {str(e)}"
         )
-    
+
+    # Rollups diários dos relatórios (app.analytics)
+    await apply_status_change_async(doc, None, order.status)
+
     return order_to_order_out(order)
 
-@router.get("/", response_model=List[OrderOut])
-def get_my_orders(current_user=Depends(get_current_user)):
-    """Lista todos os pedidos do usuário logado"""
-    orders = Order.objects(user_id=str(current_user.id)).order_by("-created_at")
-    
-    return [order_to_order_out(order) for order in orders]
+@router.post("/quote", response_model=OrderQuote)
+async def quote_order(cart: OrderQuoteRequest):
+    """
+    Valida o carrinho sem reservar stock: preço atual, total e disponibilidade de cada
+    linha (stock, tamanho e cor), com uma única query aos produtos. Não requer login.
+    """
+    if len(cart.items) > MAX_CART_LINES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O carrinho tem mais de {MAX_CART_LINES} linhas"
+        )
+    return FastJSONResponse(OrderQuote(**await quote(cart.items)))
 
-@router.get("/all", response_model=List[OrderOut])
-def get_all_orders(admin=Depends(require_admin)):
-    """Lista todos os pedidos (apenas admin)"""
-    orders = Order.objects().order_by("-created_at")
-    
-    return [order_to_order_out(order) for order in orders]
+def order_filters(
+        status_filter: Optional[str] = None,
+        payment_status: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+) -> dict:
+    """Filtro da listagem de pedidos (partilhado com a exportação)"""
+    query = {}
+    if status_filter:
+        if status_filter not in Order.STATUS_CHOICES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Status inválido. Opções: {', '.join(Order.STATUS_CHOICES)}"
+            )
+        query["status"] = status_filter
+    if payment_status:
+        query["payment_status"] = payment_status
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lt"] = created_to
+    return query
+
+async def order_page(query: dict, view: str, limit: int, cursor: Optional[str]):
+    """
+    Página de pedidos completa (OrderPage) ou resumida (OrderSummaryPage), já serializada
+    (o modelo foi validado ao ser construído; o FastAPI não o volta a validar).
+    """
+    collection = async_collection(Order)
+    if view == "summary":
+        docs, next_cursor = await paginate(collection, query, projection(ORDER_SUMMARY_FIELDS), limit, cursor)
+        page = OrderSummaryPage(items=[order_summary_from_doc(doc) for doc in docs], next_cursor=next_cursor)
+    else:
+        docs, next_cursor = await paginate(collection, query, None, limit, cursor)
+        page = OrderPage(items=[order_to_order_out(Order._from_son(doc)) for doc in docs], next_cursor=next_cursor)
+    return FastJSONResponse(page)
+
+@router.get("/", response_model=Union[OrderPage, OrderSummaryPage])
+async def get_my_orders(
+    view: Literal["full", "summary"] = "full",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user=Depends(get_current_principal)
+):
+    """Lista os pedidos do usuário logado, mais recentes primeiro (paginação por cursor)"""
+    return await order_page({"user_id": str(current_user.id)}, view, limit, cursor)
+
+@router.get("/all", response_model=Union[OrderPage, OrderSummaryPage])
+async def get_all_orders(
+    view: Literal["full", "summary"] = "summary",
+    status_filter: Optional[str] = Query(None, alias="status"),
+    payment_status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    admin=Depends(require_admin)
+):
+    """
+    Lista os pedidos (apenas admin), mais recentes primeiro, com paginação por cursor.
+    Filtros: status, payment_status e intervalo [created_from, created_to).
+    Por padrão devolve o resumo (view=summary); view=full inclui os itens completos.
+    """
+    query = order_filters(status_filter, payment_status, created_from, created_to)
+    return await order_page(query, view, limit, cursor)
+
+ORDER_EXPORT_COLUMNS = [
+    "id", "created_at", "updated_at", "user_id", "user_email", "user_name", "status",
+    "payment_status", "payment_intent_id", "total_amount", "item_count", "units",
+    "shipping_address", "shipping_city", "shipping_postal_code", "shipping_country",
+    "shipping_phone", "notes",
+]
+
+def order_export_row(doc: dict) -> dict:
+    """Uma linha CSV por pedido; os itens são resumidos em contagens"""
+    items = doc.get("items") or []
+    row = dict(doc)
+    row["id"] = str(doc["_id"])
+    row["item_count"] = len(items)
+    row["units"] = sum(item.get("quantity", 0) for item in items)
+    return row
+
+@router.get("/export")
+def export_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status_filter: Optional[str] = Query(None, alias="status"),
+    payment_status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    admin=Depends(require_admin)
+):
+    """Exporta pedidos em streaming (NDJSON ou CSV), com os mesmos filtros de /orders/all"""
+    query = order_filters(status_filter, payment_status, created_from, created_to)
+    query_set = Order.objects(__raw__=query).order_by("-created_at", "-id")
+    return stream_export(query_set, format, "orders", ORDER_EXPORT_COLUMNS, order_export_row)
 
 @router.get("/{order_id}", response_model=OrderOut)
-def get_order(order_id: str, current_user=Depends(get_current_user)):
+async def get_order(order_id: str, current_user=Depends(get_current_principal)):
     """Obtém detalhes de um pedido específico"""
-    order = Order.objects(id=order_id).first()
+    try:
+        doc = await async_collection(Order).find_one({"_id": ObjectId(order_id)})
+    except InvalidId:
+        doc = None
     
-    if not order:
+    if not doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Pedido não encontrado"
         )
+    order = Order._from_son(doc)
     
     # Usuário só pode ver seus próprios pedidos (a menos que seja admin)
     if str(current_user.id) != order.user_id and current_user.role != "admin":
@@ -218,23 +355,24 @@ def update_order_status(
     admin=Depends(require_admin)
 ):
     """Atualiza o status de um pedido (apenas admin)"""
-    order = Order.objects(id=order_id).first()
-    
-    if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Pedido não encontrado"
-        )
-    
     # Validar status
     if status_update.status not in Order.STATUS_CHOICES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Status inválido. Opções: {', '.join(Order.STATUS_CHOICES)}"
         )
-    
-    order.status = status_update.status
-    order.save()
-    
-    return order_to_order_out(order)
+
+    # Escrita atómica que também move o pedido entre as linhas dos rollups
+    try:
+        _, doc = transition_order({"_id": ObjectId(order_id)}, status_update.status)
+    except InvalidId:
+        doc = None
+
+    if not doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pedido não encontrado"
+        )
+
+    return order_to_order_out(Order._from_son(doc))
 
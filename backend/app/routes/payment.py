@@ -2,44 +2,34 @@ from fastapi import APIRouter, Depends, HTTPException, status, Header
 from starlette.requests import Request
 from pydantic import BaseModel
 from typing import Optional
-import os
-from app.auth import get_current_user
+from app.auth import get_current_principal, Principal
 from app.models.order import Order
-from app.models.product import Product
-from app.models.user import User
-
-# Garantir que dotenv seja carregado antes de ler variáveis
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    pass
-
-# Importar Stripe opcionalmente
-try:
-    import stripe
-    STRIPE_AVAILABLE = True
-    STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
-    if STRIPE_SECRET_KEY:
-        stripe.api_key = STRIPE_SECRET_KEY
-except ImportError:
-    STRIPE_AVAILABLE = False
-    stripe = None
-    STRIPE_SECRET_KEY = None
+from app import jobs
+from app.db import async_collection
+from app.models.stripe_event import StripeEvent
+from app.stripe_events import HANDLED_EVENTS
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+from app.metrics import external_call
+from app.settings import settings
+from app.stripe_client import get_stripe
 
 def check_stripe_configured():
-    """Verifica se o Stripe está configurado, lança HTTPException se não estiver"""
-    if not STRIPE_AVAILABLE:
+    """Devolve o SDK do Stripe (importado no primeiro uso); HTTPException se não estiver configurado"""
+    stripe = get_stripe()
+    if stripe is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Serviço de pagamento não disponível. Módulo 'stripe' não está instalado."
         )
-    if not STRIPE_SECRET_KEY:
+    if not settings.stripe_secret_key:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Serviço de pagamento não configurado. STRIPE_SECRET_KEY não está definida. "
                    "Configure a variável de ambiente STRIPE_SECRET_KEY no painel do Vercel (Settings > Environment Variables)."
         )
+    return stripe
 
 router = APIRouter(prefix="/payment")
 
@@ -55,13 +45,13 @@ class PaymentIntentResponse(BaseModel):
 @router.post("/create-intent", response_model=PaymentIntentResponse)
 def create_payment_intent(
     payment_data: PaymentIntentCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Cria um PaymentIntent no Stripe para iniciar o processo de pagamento.
     O cliente vai usar o client_secret para confirmar o pagamento no frontend.
     """
-    check_stripe_configured()
+    stripe = check_stripe_configured()
     try:
         # Converter para centavos (Stripe trabalha com a menor unidade da moeda)
         amount_cents = int(payment_data.amount * 100)
@@ -74,18 +64,19 @@ def create_payment_intent(
             )
         
         # Criar PaymentIntent no Stripe
-        intent = stripe.PaymentIntent.create(
-            amount=amount_cents,
-            currency=payment_data.currency.lower(),
-            metadata={
-                "user_id": str(current_user.id),
-                "user_email": current_user.email,
-                "order_id": payment_data.order_id or ""
-            },
-            automatic_payment_methods={
-                "enabled": True,
-            },
-        )
+        with external_call("stripe", "payment_intent.create"):
+            intent = stripe.PaymentIntent.create(
+                amount=amount_cents,
+                currency=payment_data.currency.lower(),
+                metadata={
+                    "user_id": str(current_user.id),
+                    "user_email": current_user.email,
+                    "order_id": payment_data.order_id or ""
+                },
+                automatic_payment_methods={
+                    "enabled": True,
+                },
+            )
         
         return PaymentIntentResponse(
             client_secret=intent.client_secret,
@@ -107,10 +98,11 @@ def create_payment_intent(
 async def stripe_webhook(request: Request, stripe_signature: str = Header(None)):
     """
     Webhook do Stripe para receber eventos de pagamento.
-    Atualiza o status do pedido quando o pagamento é confirmado.
+    Verifica a assinatura, ignora eventos repetidos e põe a atualização do pedido
+    na fila (app.stripe_events), respondendo de imediato.
     """
-    check_stripe_configured()
-    webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+    stripe = check_stripe_configured()
+    webhook_secret = settings.stripe_webhook_secret
     
     if not webhook_secret:
         raise HTTPException(
@@ -136,47 +128,44 @@ async def stripe_webhook(request: Request, stripe_signature: str = Header(None))
             detail="Assinatura do webhook inválida"
         )
     
-    # Processar eventos
-    if event["type"] == "payment_intent.succeeded":
-        payment_intent = event["data"]["object"]
-        payment_intent_id = payment_intent["id"]
-        
-        # Buscar pedido pelo payment_intent_id
-        order = Order.objects(payment_intent_id=payment_intent_id).first()
-        
-        if order:
-            # Atualizar status do pagamento e do pedido
-            order.payment_status = "succeeded"
-            order.status = "processing"  # Mudar de pending para processing
-            order.save()
-            
-            return {"status": "success", "message": "Pagamento confirmado"}
-    
-    elif event["type"] == "payment_intent.payment_failed":
-        payment_intent = event["data"]["object"]
-        payment_intent_id = payment_intent["id"]
-        
-        # Buscar pedido pelo payment_intent_id
-        order = Order.objects(payment_intent_id=payment_intent_id).first()
-        
-        if order:
-            order.payment_status = "failed"
-            order.save()
-            # Nota: O estoque não precisa ser revertido porque o pedido
-            # só é criado após confirmação de pagamento no frontend
-            return {"status": "success", "message": "Falha de pagamento registrada"}
-    
-    # Retornar sucesso para outros eventos (para evitar retries)
-    return {"status": "received"}
+    # Só interessam os eventos de pagamento; os outros são confirmados (para evitar retries)
+    task = HANDLED_EVENTS.get(event["type"])
+    if task is None:
+        return {"status": "received"}
+
+    # Idempotência: o ID do evento é a chave; entregas repetidas param aqui
+    payment_intent_id = event["data"]["object"]["id"]
+    try:
+        await async_collection(StripeEvent).insert_one({
+            "_id": event["id"],
+            "type": event["type"],
+            "payment_intent_id": payment_intent_id,
+            "received_at": datetime.utcnow(),
+        })
+    except DuplicateKeyError:
+        return {"status": "duplicate"}
+
+    # Responder já; a transição do pedido corre na fila de tarefas (no pedido, em serverless)
+    try:
+        await run_in_threadpool(
+            jobs.dispatch, task, {"event_id": event["id"], "payment_intent_id": payment_intent_id}
+        )
+    except Exception:
+        # Sem tarefa o evento não pode ficar marcado como recebido: o Stripe volta a tentar
+        await async_collection(StripeEvent).delete_one({"_id": event["id"]})
+        raise
+
+    return {"status": "queued"}
 
 @router.get("/intent/{payment_intent_id}")
-def get_payment_intent_status(payment_intent_id: str, current_user: User = Depends(get_current_user)):
+def get_payment_intent_status(payment_intent_id: str, current_user: Principal = Depends(get_current_principal)):
     """
     Verifica o status de um PaymentIntent específico.
     """
-    check_stripe_configured()
+    stripe = check_stripe_configured()
     try:
-        intent = stripe.PaymentIntent.retrieve(payment_intent_id)
+        with external_call("stripe", "payment_intent.retrieve"):
+            intent = stripe.PaymentIntent.retrieve(payment_intent_id)
         
         # Verificar se o pedido pertence ao usuário
         order = Order.objects(payment_intent_id=payment_intent_id).first()
@@ -1,62 +1,111 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Body
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Body, Query, Request
 from pydantic import BaseModel
 from app.models.product import Product
-from app.schemas.product import ProductOut
+from app.schemas.product import ProductOut, ProductPage, ProductCardPage
 from app.auth import require_admin
-from typing import List, Union, Optional
-from mongoengine import Q
-import os
-import cloudinary
-import cloudinary.uploader
-
-# Configuração SEGURA (Lê da Vercel)
-cloudinary.config(
-    cloud_name = os.getenv("Cloud_name"),
-    api_key = os.getenv("API_key"),
-    api_secret = os.getenv("API_secret"),
-    secure=True
+from app.db import catalog_collection
+from app.pagination import paginate, paginate_ranked, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.search import prefix_query, text_query, TEXT_SCORE_PROJECTION, TEXT_SCORE_SORT
+from app.export import stream_export
+from app.http_cache import product_etag, listing_etag, http_date, cached_response
+from app.responses import dumps
+from app.cache import product_key, listing_key, invalidate_products, cache_stats, get_backend
+from app.serializers import (
+    PRODUCT_FIELDS, CARD_FIELDS, projection, product_out, product_out_from_doc, product_card_from_doc
 )
-
-# ✅ REMOVIDO O OS.MAKEDIRS QUE DAVA ERRO
+from app.uploads import upload_stats
+from app.images import read_uploads, enqueue_uploads, enqueue_deletions, meta_urls
+from app.jobs import job_stats
+from typing import List, Union, Optional, Literal
+from bson import ObjectId
+from bson.errors import InvalidId
 
 router = APIRouter(prefix="/products")
 
-@router.get("/", response_model=List[ProductOut])
-def get_products(q: Optional[str] = None):
+@router.get("/", response_model=Union[ProductPage, ProductCardPage])
+async def get_products(
+        request: Request,
+        q: Optional[str] = None,
+        match: Literal["text", "prefix"] = "text",
+        view: Literal["full", "card"] = "full",
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None
+):
     """
-    Lista todos os produtos ou filtra por termo de pesquisa.
-    Parâmetro 'q' busca em nome, descrição e categoria.
+    Lista os produtos (mais recentes primeiro) ou filtra por termo de pesquisa.
+    Parâmetro 'q' busca em nome, descrição e categoria:
+    - match=text (padrão): índice de texto, resultados ordenados por relevância
+    - match=prefix: pesquisa enquanto se escreve, a última palavra conta como prefixo
+    Parâmetro 'view=card' devolve só nome, preço, primeira imagem visível e stock.
+    Paginação por cursor: usar o 'next_cursor' devolvido para pedir a página seguinte.
+    Responde com ETag e Cache-Control; If-None-Match igual devolve 304.
     """
-    # Se houver termo de pesquisa, filtrar produtos
-    if q:
-        # Busca case-insensitive em nome, descrição e categoria usando Q objects
-        query_set = Product.objects(
-            Q(name__icontains=q) | 
-            Q(description__icontains=q) | 
-            Q(category__icontains=q)
-        )
+    cache = get_backend()
+    key = listing_key(q=q, match=match, view=view, limit=limit, cursor=cursor)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached_response(request, cached)
+
+    if view == "card":
+        fields, to_item, page = CARD_FIELDS, product_card_from_doc, ProductCardPage
     else:
-        query_set = Product.objects()
-    
-    return [
-        ProductOut(
-            id=str(p.id),
-            name=p.name,
-            description=p.description,
-            price=p.price,
-            stock=p.stock,
-            sizes=p.sizes,
-            available_sizes=p.available_sizes,
-            gender=p.gender,
-            category=p.category,
-            colors=p.colors,
-            available_colors=p.available_colors,
-            images=p.images,
-            visible_images=p.visible_images if hasattr(p, 'visible_images') else (p.images if p.images else []),
-            created_at=str(p.created_at)
+        fields, page = PRODUCT_FIELDS, ProductPage
+        to_item = lambda doc: product_out_from_doc(doc, include_meta=False)
+
+    collection = catalog_collection(Product)
+    if q and match == "text":
+        docs, next_cursor = await paginate_ranked(
+            collection, text_query(q), projection(fields, TEXT_SCORE_PROJECTION), TEXT_SCORE_SORT, limit, cursor
         )
-        for p in query_set
-    ]
+    elif q:
+        query = prefix_query(q)
+        if query is None:
+            return page(items=[])
+        docs, next_cursor = await paginate(collection, query, projection(fields), limit, cursor)
+    else:
+        docs, next_cursor = await paginate(collection, {}, projection(fields), limit, cursor)
+
+    entry = {
+        "etag": listing_etag(docs, next_cursor, view),
+        # Guardado já em JSON: os hits da cache não voltam a validar nem a serializar
+        "body": dumps(page(items=[to_item(doc) for doc in docs], next_cursor=next_cursor)),
+    }
+    cache.set(key, entry)
+    return cached_response(request, entry)
+
+@router.get("/cache/stats", response_model=dict)
+def get_cache_stats(admin=Depends(require_admin)):
+    """Contadores da cache do catálogo (hits, misses, evictions) para dimensionamento"""
+    return cache_stats()
+
+@router.get("/uploads/stats", response_model=dict)
+def get_upload_stats(admin=Depends(require_admin)):
+    """Métricas dos uploads de imagens (fan-out, latência por ficheiro, bytes/s)"""
+    return upload_stats()
+
+@router.get("/jobs/stats", response_model=dict)
+def get_job_stats(admin=Depends(require_admin)):
+    """Estado da fila de tarefas de imagens (pendentes, falhadas, repetições)"""
+    return job_stats()
+
+PRODUCT_EXPORT_COLUMNS = [
+    "id", "name", "category", "gender", "price", "stock", "sizes", "available_sizes",
+    "colors", "available_colors", "images", "visible_images", "created_at", "description",
+]
+
+def product_export_row(doc: dict) -> dict:
+    row = dict(doc)
+    row["id"] = str(doc["_id"])
+    return row
+
+@router.get("/export")
+def export_products(
+        format: Literal["ndjson", "csv"] = "ndjson",
+        admin=Depends(require_admin)
+):
+    """Exporta o catálogo em streaming (NDJSON ou CSV)"""
+    query_set = Product.objects().exclude("search_tokens", "upload_batches").order_by("-created_at", "-id")
+    return stream_export(query_set, format, "products", PRODUCT_EXPORT_COLUMNS, product_export_row)
 
 @router.post("/", response_model=dict)
 def create_product(
@@ -81,19 +130,11 @@ def create_product(
     if price < 0:
         raise HTTPException(status_code=400, detail="Preço não pode ser negativo")
     
-    image_paths = []
-
-    # Lógica de Upload Cloudinary
+    # As imagens são enviadas em segundo plano (fila de tarefas) depois de gravar o produto
+    staged = []
     if files:
         files_list = files if isinstance(files, list) else [files]
-        for file in files_list:
-            try:
-                # Envia para o Cloudinary
-                upload_result = cloudinary.uploader.upload(file.file, folder="mambini_products")
-                image_paths.append(upload_result["secure_url"])
-            except Exception as e:
-                print(f"Erro no upload: {e}")
-                raise HTTPException(status_code=500, detail="Upload image failed")
+        staged = read_uploads(files_list)
 
     product = Product(
         name=name,
@@ -106,42 +147,39 @@ def create_product(
         available_sizes=available_sizes.split(",") if available_sizes else [],
         colors=colors.split(",") if colors else [],
         available_colors=available_colors.split(",") if available_colors else [],
-        images=image_paths,
-        visible_images=image_paths  # Por padrão, todas as imagens são visíveis
+        images=[],
+        visible_images=[]  # As imagens enviadas ficam visíveis por padrão quando o upload terminar
     )
     product.save()
-    return {"message": "Product created", "id": str(product.id)}
+    invalidate_products(product.id)
+    pending = enqueue_uploads(product.id, staged)
+    return {"message": "Product created", "id": str(product.id), "pending_images": pending}
 
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: str):
-    p = Product.objects(id=product_id).first()
-    if not p:
+async def get_product(product_id: str, request: Request):
+    cache = get_backend()
+    cached = cache.get(product_key(product_id))
+    if cached is not None:
+        return cached_response(request, cached)
+
+    try:
+        object_id = ObjectId(product_id)
+    except InvalidId:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # Inicializar visible_images se não existir (para produtos antigos)
-    if not hasattr(p, 'visible_images') or not p.visible_images:
-        if p.images:
-            p.visible_images = p.images
-            p.save()
-        else:
-            p.visible_images = []
+    doc = await catalog_collection(Product).find_one({"_id": object_id}, projection(PRODUCT_FIELDS))
+    if not doc:
+        raise HTTPException(status_code=404, detail="Product not found")
 
-    return ProductOut(
-        id=str(p.id),
-        name=p.name,
-        description=p.description,
-        price=p.price,
-        stock=p.stock,
-        sizes=p.sizes,
-        available_sizes=p.available_sizes,
-        gender=p.gender,
-        category=p.category,
-        colors=p.colors,
-        available_colors=p.available_colors,
-        images=p.images,
-        visible_images=p.visible_images if p.visible_images else [],
-        created_at=str(p.created_at)
-    )
+    # Só leitura: produtos antigos sem visible_images são migrados com
+    # "python -m app.manage backfill-visible-images"
+    entry = {
+        "etag": product_etag(doc),
+        "last_modified": http_date(doc.get("updated_at") or doc.get("created_at")),
+        "body": dumps(product_out_from_doc(doc)),
+    }
+    cache.set(product_key(product_id), entry)
+    return cached_response(request, entry)
 
 @router.put("/{product_id}", response_model=ProductOut)
 def update_product(
@@ -171,6 +209,11 @@ def update_product(
     if not p:
         raise HTTPException(status_code=404, detail="Product not found")
 
+    staged = []
+    if files:
+        files_list = files if isinstance(files, list) else [files]
+        staged = read_uploads(files_list)
+
     p.name = name
     p.description = description
     p.price = price
@@ -182,42 +225,12 @@ def update_product(
     p.colors = colors.split(",") if colors else []
     p.available_colors = available_colors.split(",") if available_colors else []
 
-    if files:
-        new_images = []
-        files_list = files if isinstance(files, list) else [files]
-        for file in files_list:
-            try:
-                upload_result = cloudinary.uploader.upload(file.file, folder="mambini_products")
-                new_images.append(upload_result["secure_url"])
-            except Exception as e:
-                print(f"Erro upload update: {e}")
-
-        if new_images:
-            # Adiciona novas imagens às existentes (não substitui)
-            existing_images = p.images if p.images else []
-            p.images = existing_images + new_images
-            # Adiciona novas imagens às visíveis por padrão
-            existing_visible = p.visible_images if hasattr(p, 'visible_images') and p.visible_images else existing_images
-            p.visible_images = existing_visible + new_images
-
     p.save()
+    invalidate_products(p.id)
+    # Novas imagens são acrescentadas (às existentes e às visíveis) quando o upload terminar
+    enqueue_uploads(p.id, staged)
 
-    return ProductOut(
-        id=str(p.id),
-        name=p.name,
-        description=p.description,
-        price=p.price,
-        stock=p.stock,
-        sizes=p.sizes,
-        available_sizes=p.available_sizes,
-        gender=p.gender,
-        category=p.category,
-        colors=p.colors,
-        available_colors=p.available_colors,
-        images=p.images,
-        visible_images=p.visible_images if hasattr(p, 'visible_images') and p.visible_images else (p.images if p.images else []),
-        created_at=str(p.created_at)
-    )
+    return product_out(p)
 
 @router.delete("/{product_id}/images/{image_url:path}")
 def delete_product_image(product_id: str, image_url: str, admin=Depends(require_admin)):
@@ -231,32 +244,26 @@ def delete_product_image(product_id: str, image_url: str, admin=Depends(require_
     image_url = urllib.parse.unquote(image_url)
     
     # Remove da lista de imagens
+    removed = False
     if p.images and image_url in p.images:
         p.images = [img for img in p.images if img != image_url]
+        removed = True
     
     # Remove da lista de imagens visíveis
     if hasattr(p, 'visible_images') and p.visible_images and image_url in p.visible_images:
         p.visible_images = [img for img in p.visible_images if img != image_url]
+        removed = True
     
-    # Tentar deletar do Cloudinary
-    try:
-        # Extrair public_id da URL do Cloudinary
-        if 'cloudinary.com' in image_url:
-            # Formato: https://res.cloudinary.com/cloud_name/image/upload/v1234567890/folder/filename.jpg
-            parts = image_url.split('/')
-            folder_index = -1
-            for i, part in enumerate(parts):
-                if part == 'upload':
-                    folder_index = i + 2
-                    break
-            if folder_index > 0 and folder_index < len(parts):
-                public_id = '/'.join(parts[folder_index:]).split('.')[0]  # Remove extensão
-                cloudinary.uploader.destroy(public_id)
-    except Exception as e:
-        print(f"Erro ao deletar imagem do Cloudinary: {e}")
-        # Continua mesmo se falhar no Cloudinary
-    
-    p.save()
+    # Remove os derivados da imagem
+    removed_meta = [m for m in p.image_meta if m.url == image_url]
+    p.image_meta = [m for m in p.image_meta if m.url != image_url]
+
+    # Só se apaga do armazenamento o que pertencia ao produto (nunca um URL arbitrário)
+    if removed or removed_meta:
+        p.save()
+        invalidate_products(p.id)
+        # Apagar do Cloudinary em segundo plano (com retry), incluindo os derivados
+        enqueue_deletions([image_url] + meta_urls(m.to_mongo() for m in removed_meta))
     return {"detail": "Image deleted", "images": p.images, "visible_images": p.visible_images if hasattr(p, 'visible_images') else p.images}
 
 class VisibleImagesUpdate(BaseModel):
@@ -284,23 +291,9 @@ def update_visible_images(
     # Atualizar visible_images (pode ser lista vazia)
     p.visible_images = visible_images
     p.save()
+    invalidate_products(p.id)
     
-    return ProductOut(
-        id=str(p.id),
-        name=p.name,
-        description=p.description,
-        price=p.price,
-        stock=p.stock,
-        sizes=p.sizes,
-        available_sizes=p.available_sizes,
-        gender=p.gender,
-        category=p.category,
-        colors=p.colors,
-        available_colors=p.available_colors,
-        images=p.images,
-        visible_images=p.visible_images if hasattr(p, 'visible_images') and p.visible_images else (p.images if p.images else []),
-        created_at=str(p.created_at)
-    )
+    return product_out(p)
 
 @router.delete("/{product_id}")
 def delete_product(product_id: str, admin=Depends(require_admin)):
@@ -309,4 +302,7 @@ def delete_product(product_id: str, admin=Depends(require_admin)):
         raise HTTPException(status_code=404, detail="Product not found")
 
     p.delete()
+    invalidate_products(p.id)
+    # Sem isto as imagens ficavam órfãs no Cloudinary
+    enqueue_deletions((p.images or []) + (p.visible_images or []) + meta_urls(m.to_mongo() for m in p.image_meta))
     return {"detail": "Product deleted"}
\ No newline at end of file
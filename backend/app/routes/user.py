@@ -1,15 +1,35 @@
 from fastapi import APIRouter, Depends
 from fastapi import HTTPException, status
 from typing import List
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+from app.db import async_collection
+from app.hashing import hash_password, verify_password, hashing_stats
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate, UserOut, UserLogin, Token
-from app.auth import create_access_token, get_current_user, require_admin
+from app.schemas.user import UserCreate, UserUpdate, UserOut, ProfileUpdateOut, UserLogin, Token
+from app.auth import (
+    create_access_token, token_claims, invalidate_principal, get_current_user, require_admin, Principal
+)
 
 router = APIRouter(prefix="/users")
 
+async def save_user(db_user: User):
+    """Grava o utilizador pelo caminho async (insert ou substituição completa)"""
+    db_user.validate()
+    users = async_collection(User)
+    try:
+        if db_user.id is None:
+            result = await users.insert_one(db_user.to_mongo())
+            db_user.id = result.inserted_id
+        else:
+            await users.replace_one({"_id": db_user.id}, db_user.to_mongo())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate):
-    if User.objects(email=user.email).first():
+async def register(user: UserCreate):
+    if await async_collection(User).find_one({"email": user.email}, {"_id": 1}):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     
@@ -25,8 +45,8 @@ def register(user: UserCreate):
         country=getattr(user, "country", None),
         phone=getattr(user, "phone", None)
     )
-    db_user.set_password(user.password)
-    db_user.save()
+    db_user.password = await hash_password(user.password)
+    await save_user(db_user)
     
     return UserOut(
         id=str(db_user.id),
@@ -41,12 +61,20 @@ def register(user: UserCreate):
     )
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin):  
-    db_user = User.objects(email=user.email).first()
-    if not db_user or not db_user.verify_password(user.password):
+async def login(user: UserLogin):
+    users = async_collection(User)
+    db_user = await users.find_one({"email": user.email}, {"password": 1, "role": 1, "token_version": 1})
+    valid, new_hash = await verify_password(user.password, db_user["password"] if db_user else None)
+    if not db_user or not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Hash com parâmetros antigos do argon2: guardar o novo calculado no login
+    if new_hash:
+        await users.update_one({"_id": db_user["_id"]}, {"$set": {"password": new_hash}})
     
-    token = create_access_token({"user_id": str(db_user.id), "role": db_user.role})
+    token = create_access_token(token_claims(
+        db_user["_id"], db_user.get("role", "client"), db_user.get("token_version", 0)
+    ))
     return Token(access_token=token)
 
 @router.get("/me", response_model=UserOut)
@@ -64,19 +92,20 @@ def read_users_me(current_user: User = Depends(get_current_user)):
         phone=current_user.phone
     )
 
-@router.put("/me", response_model=UserOut)
-def update_my_profile(user_update: UserUpdate, current_user: User = Depends(get_current_user)):
+@router.put("/me", response_model=ProfileUpdateOut)
+async def update_my_profile(user_update: UserUpdate, current_user: User = Depends(get_current_user)):
     """Permite ao utilizador atualizar o seu próprio perfil"""
     # Verificar se o email já existe em outro usuário
     if user_update.email != current_user.email:
-        existing_user = User.objects(email=user_update.email).first()
+        existing_user = await async_collection(User).find_one({"email": user_update.email}, {"_id": 1})
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
     
     current_user.email = user_update.email
     current_user.name = user_update.name
     if user_update.password:
-        current_user.set_password(user_update.password)
+        current_user.password = await hash_password(user_update.password)
+        current_user.token_version = (current_user.token_version or 0) + 1
     if user_update.address is not None:
         current_user.address = user_update.address
     if user_update.city is not None:
@@ -87,9 +116,17 @@ def update_my_profile(user_update: UserUpdate, current_user: User = Depends(get_
         current_user.country = user_update.country
     if user_update.phone is not None:
         current_user.phone = user_update.phone
-    current_user.save()
-    
-    return UserOut(
+    await save_user(current_user)
+    invalidate_principal(current_user.id)
+
+    # A mudança de password revoga o token atual; o cliente passa a usar este
+    access_token = None
+    if user_update.password:
+        access_token = create_access_token(
+            token_claims(current_user.id, current_user.role, current_user.token_version)
+        )
+
+    return ProfileUpdateOut(
         id=str(current_user.id),
         email=current_user.email,
         name=current_user.name,
@@ -98,11 +135,17 @@ def update_my_profile(user_update: UserUpdate, current_user: User = Depends(get_
         city=current_user.city,
         postal_code=current_user.postal_code,
         country=current_user.country,
-        phone=current_user.phone
+        phone=current_user.phone,
+        access_token=access_token,
     )
 
+@router.get("/hashing/stats", response_model=dict)
+def get_hashing_stats(admin_user: Principal = Depends(require_admin)):
+    """Fila, latência e rejeições do pool de hashing de passwords"""
+    return hashing_stats()
+
 @router.get("", response_model=List[UserOut])
-def get_all_users(admin_user: User = Depends(require_admin)):
+def get_all_users(admin_user: Principal = Depends(require_admin)):
     """Lista todos os utilizadores (apenas admin)"""
     users = User.objects.all()
     return [UserOut(
@@ -118,24 +161,35 @@ def get_all_users(admin_user: User = Depends(require_admin)):
     ) for user in users]
 
 @router.put("/{user_id}", response_model=UserOut)
-def update_user(user_id: str, user_update: UserUpdate, admin_user: User = Depends(require_admin)):
+async def update_user(user_id: str, user_update: UserUpdate, admin_user: Principal = Depends(require_admin)):
     """Atualiza um utilizador (apenas admin)"""
-    db_user = User.objects(id=user_id).first()
-    if not db_user:
+    users = async_collection(User)
+    try:
+        doc = await users.find_one({"_id": ObjectId(user_id)})
+    except InvalidId:
+        doc = None
+    if not doc:
         raise HTTPException(status_code=404, detail="User not found")
+    db_user = User._from_son(doc)
     
     # Verificar se o email já existe em outro usuário
     if user_update.email != db_user.email:
-        existing_user = User.objects(email=user_update.email).first()
+        existing_user = await users.find_one({"email": user_update.email}, {"_id": 1})
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
     
     db_user.email = user_update.email
     db_user.name = user_update.name
-    if user_update.role:
+    revoke_tokens = False
+    if user_update.role and user_update.role != db_user.role:
         db_user.role = user_update.role
+        revoke_tokens = True
     if user_update.password:
-        db_user.set_password(user_update.password)
+        db_user.password = await hash_password(user_update.password)
+        revoke_tokens = True
+    if revoke_tokens:
+        # Tokens emitidos com o role/password antigos deixam de ser aceites
+        db_user.token_version = (db_user.token_version or 0) + 1
     if user_update.address is not None:
         db_user.address = user_update.address
     if user_update.city is not None:
@@ -146,7 +200,8 @@ def update_user(user_id: str, user_update: UserUpdate, admin_user: User = Depend
         db_user.country = user_update.country
     if user_update.phone is not None:
         db_user.phone = user_update.phone
-    db_user.save()
+    await save_user(db_user)
+    invalidate_principal(db_user.id)
     
     return UserOut(
         id=str(db_user.id),
@@ -161,7 +216,7 @@ def update_user(user_id: str, user_update: UserUpdate, admin_user: User = Depend
     )
 
 @router.delete("/{user_id}")
-def delete_user(user_id: str, admin_user: User = Depends(require_admin)):
+def delete_user(user_id: str, admin_user: Principal = Depends(require_admin)):
     """Remove um utilizador (apenas admin)"""
     db_user = User.objects(id=user_id).first()
     if not db_user:
@@ -172,4 +227,5 @@ def delete_user(user_id: str, admin_user: User = Depends(require_admin)):
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
     db_user.delete()
+    invalidate_principal(db_user.id)
     return {"message": "User deleted successfully"}
\ No newline at end of file
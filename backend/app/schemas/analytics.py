@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import date
+
+class RevenueDay(BaseModel):
+    day: date
+    orders: int
+    revenue: float
+    units: int
+
+class StatusCount(BaseModel):
+    status: str
+    orders: int
+    revenue: float
+
+class TopProduct(BaseModel):
+    product_id: str
+    product_name: Optional[str] = None
+    units: int
+    revenue: float
+
+class VariantUnits(BaseModel):
+    size: Optional[str] = None
+    color: Optional[str] = None
+    units: int
+
+class Overview(BaseModel):
+    products: int
+    orders: int
+    revenue: float
+    customers: int
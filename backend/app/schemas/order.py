@@ -49,6 +49,58 @@ class OrderOut(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderPage(BaseModel):
+    items: List[OrderOut]
+    next_cursor: Optional[str] = None  # Cursor opaco para pedir a página seguinte
+
+class OrderSummary(BaseModel):
+    """Resumo de um pedido para listagens (sem os itens completos)"""
+    id: str
+    user_id: str
+    user_email: EmailStr
+    user_name: Optional[str] = None
+    item_count: int
+    product_names: List[str] = []
+    total_amount: float
+    status: str
+    payment_status: Optional[str] = None
+    shipping_city: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+class OrderSummaryPage(BaseModel):
+    items: List[OrderSummary]
+    next_cursor: Optional[str] = None
+
 class OrderStatusUpdate(BaseModel):
     status: str
 
+
+class QuoteItem(BaseModel):
+    """Linha do carrinho a cotar (o preço enviado pelo cliente é ignorado)"""
+    product_id: str
+    quantity: int
+    size: Optional[str] = None
+    color: Optional[str] = None
+
+class OrderQuoteRequest(BaseModel):
+    items: List[QuoteItem]
+
+class QuoteLine(BaseModel):
+    product_id: str
+    product_name: Optional[str] = None
+    size: Optional[str] = None
+    color: Optional[str] = None
+    quantity: int
+    unit_price: Optional[float] = None  # Preço atual do produto (None se não existir)
+    line_total: float  # 0 se a linha tiver problemas
+    stock: int
+    available: bool
+    # invalid_product, not_found, invalid_quantity, insufficient_stock, size_unavailable, color_unavailable
+    issues: List[str] = []
+
+class OrderQuote(BaseModel):
+    items: List[QuoteLine]
+    subtotal: float  # Soma das linhas disponíveis
+    item_count: int
+    valid: bool  # True se todas as linhas puderem ser encomendadas
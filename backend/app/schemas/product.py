@@ -1,6 +1,21 @@
 from pydantic import BaseModel
 from typing import List, Optional
 
+class ImageVariantOut(BaseModel):
+    size: str
+    format: str
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bytes: Optional[int] = None
+
+class ImageMetaOut(BaseModel):
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    placeholder: Optional[str] = None
+    variants: List[ImageVariantOut] = []
+
 class ProductBase(BaseModel):
     name: str
     description: Optional[str] = None
@@ -17,4 +32,26 @@ class ProductBase(BaseModel):
 
 class ProductOut(ProductBase):
     id: str
-    created_at: str
\ No newline at end of file
+    created_at: str
+    updated_at: Optional[str] = None
+    version: int = 0  # Incrementado em cada escrita (base do ETag)
+    card_image: Optional[str] = None  # Variante mais pequena da primeira imagem visível para a listagem
+    placeholder: Optional[str] = None  # LQIP da primeira imagem visível
+    image_meta: Optional[List[ImageMetaOut]] = None  # Só no detalhe (srcset / <picture>)
+
+class ProductPage(BaseModel):
+    items: List[ProductOut]
+    next_cursor: Optional[str] = None  # Cursor opaco para pedir a página seguinte
+
+class ProductCard(BaseModel):
+    """Projeção reduzida para listagens (cartões da loja)"""
+    id: str
+    name: str
+    price: float
+    image: Optional[str] = None  # Variante "card" da primeira imagem visível (ou o original)
+    placeholder: Optional[str] = None
+    in_stock: bool
+
+class ProductCardPage(BaseModel):
+    items: List[ProductCard]
+    next_cursor: Optional[str] = None
@@ -34,6 +34,10 @@ class UserOut(BaseModel):
     country: Optional[str] = None
     phone: Optional[str] = None
 
+class ProfileUpdateOut(UserOut):
+    # Novo token quando a password muda (o anterior fica revogado)
+    access_token: Optional[str] = None
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -0,0 +1,47 @@
+import re
+import unicodedata
+
+# Tokens muito curtos não ajudam a pesquisa e incham o índice
+MIN_TOKEN_LENGTH = 2
+
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos ("Calções" -> "calcoes")"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def tokenize(text: str) -> list:
+    """Parte o texto normalizado em palavras"""
+    return [t for t in _TOKEN_SPLIT.split(normalize(text)) if t]
+
+def search_tokens_for(*texts) -> list:
+    """Lista ordenada e sem duplicados de tokens indexáveis (usada em Product.search_tokens)"""
+    tokens = set()
+    for text in texts:
+        tokens.update(t for t in tokenize(text) if len(t) >= MIN_TOKEN_LENGTH)
+    return sorted(tokens)
+
+def prefix_query(q: str):
+    """
+    Filtro para pesquisa enquanto se escreve: as palavras completas têm de existir
+    em search_tokens e a última é tratada como prefixo. O regex é ancorado (^) sobre
+    tokens já normalizados, por isso usa o índice em vez de percorrer a coleção.
+    Devolve None se o termo não tiver tokens pesquisáveis.
+    """
+    terms = tokenize(q)
+    if not terms:
+        return None
+
+    *complete, last = terms
+    clauses = [{"search_tokens": term} for term in complete]
+    clauses.append({"search_tokens": {"$regex": "^" + re.escape(last)}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def text_query(q: str) -> dict:
+    """Pesquisa no índice de texto (pesos definidos em Product.meta)"""
+    return {"$text": {"$search": q}}
+
+# Relevância primeiro, depois os mais recentes
+TEXT_SCORE_PROJECTION = {"score": {"$meta": "textScore"}}
+TEXT_SCORE_SORT = [("score", {"$meta": "textScore"}), ("created_at", -1), ("_id", -1)]
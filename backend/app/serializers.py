@@ -0,0 +1,105 @@
+"""
+Conversão de documentos crus do MongoDB (as_pymongo) para os schemas de resposta.
+As leituras do catálogo projetam apenas os campos necessários e evitam instanciar
+Documents do mongoengine.
+"""
+from app.derivatives import select_variant
+from app.schemas.order import OrderSummary
+from app.schemas.product import ProductOut, ProductCard
+
+# Campos lidos para um ProductOut completo
+PRODUCT_FIELDS = (
+    "name", "description", "price", "stock", "sizes", "available_sizes", "gender",
+    "category", "colors", "available_colors", "images", "visible_images", "created_at",
+    "image_meta", "version", "updated_at",
+)
+
+# Campos lidos para um cartão de listagem (created_at é necessário para o cursor)
+CARD_FIELDS = ("name", "price", "stock", "images", "visible_images", "image_meta", "created_at", "version")
+
+def projection(fields, extra: dict = None) -> dict:
+    """Projeção do MongoDB para os campos indicados"""
+    result = {field: 1 for field in fields}
+    if extra:
+        result.update(extra)
+    return result
+
+def _visible_images(doc: dict) -> list:
+    """Produtos antigos não têm visible_images: todas as imagens são visíveis"""
+    return doc.get("visible_images") or doc.get("images") or []
+
+def _listing_image(doc: dict, visible: list):
+    """(URL, placeholder) da primeira imagem visível: a variante "card" mais pequena, se existir"""
+    if not visible:
+        return None, None
+    meta = next((m for m in doc.get("image_meta") or [] if m.get("url") == visible[0]), None)
+    variant = select_variant(meta, "card")
+    return (variant["url"] if variant else visible[0]), (meta or {}).get("placeholder")
+
+def product_out_from_doc(doc: dict, include_meta: bool = True) -> ProductOut:
+    """Converte um documento cru de produto em ProductOut (sem image_meta nas listagens)"""
+    created_at = doc.get("created_at")
+    updated_at = doc.get("updated_at")
+    visible = _visible_images(doc)
+    card_image, placeholder = _listing_image(doc, visible)
+    return ProductOut(
+        id=str(doc["_id"]),
+        name=doc.get("name"),
+        description=doc.get("description"),
+        price=doc.get("price"),
+        stock=doc.get("stock", 0),
+        sizes=doc.get("sizes", []),
+        available_sizes=doc.get("available_sizes", []),
+        gender=doc.get("gender"),
+        category=doc.get("category"),
+        colors=doc.get("colors", []),
+        available_colors=doc.get("available_colors", []),
+        images=doc.get("images", []),
+        visible_images=visible,
+        created_at=str(created_at) if created_at else "",
+        updated_at=str(updated_at) if updated_at else None,
+        version=doc.get("version") or 0,
+        card_image=card_image,
+        placeholder=placeholder,
+        image_meta=doc.get("image_meta", []) if include_meta else None
+    )
+
+def product_card_from_doc(doc: dict) -> ProductCard:
+    """Converte um documento cru de produto no cartão reduzido da listagem"""
+    image, placeholder = _listing_image(doc, _visible_images(doc))
+    return ProductCard(
+        id=str(doc["_id"]),
+        name=doc.get("name"),
+        price=doc.get("price"),
+        image=image,
+        placeholder=placeholder,
+        in_stock=(doc.get("stock") or 0) > 0
+    )
+
+def product_out(product) -> ProductOut:
+    """Converte um Product já carregado (ex.: depois de save) em ProductOut"""
+    return product_out_from_doc(product.to_mongo().to_dict())
+
+# Campos lidos para o resumo de um pedido (dos itens só o nome do produto)
+ORDER_SUMMARY_FIELDS = (
+    "user_id", "user_email", "user_name", "items.product_name", "total_amount", "status",
+    "payment_status", "shipping_city", "created_at", "updated_at",
+)
+
+def order_summary_from_doc(doc: dict) -> OrderSummary:
+    """Converte um documento cru de pedido (projeção ORDER_SUMMARY_FIELDS) em OrderSummary"""
+    items = doc.get("items") or []
+    return OrderSummary(
+        id=str(doc["_id"]),
+        user_id=doc.get("user_id"),
+        user_email=doc.get("user_email"),
+        user_name=doc.get("user_name"),
+        item_count=len(items),
+        product_names=[item.get("product_name") for item in items],
+        total_amount=doc.get("total_amount"),
+        status=doc.get("status", "pending"),
+        payment_status=doc.get("payment_status"),
+        shipping_city=doc.get("shipping_city"),
+        created_at=str(doc.get("created_at")),
+        updated_at=str(doc.get("updated_at"))
+    )
@@ -0,0 +1,56 @@
+"""
+Configuração da app, lida do ambiente uma única vez (no import do pacote app).
+
+O .env só é carregado se existir (desenvolvimento); em produção (Vercel) as variáveis
+já estão no ambiente e o python-dotenv nem chega a ser importado. Como app/__init__.py
+importa este módulo, as constantes MONGO_*, UPLOAD_*, etc. dos outros módulos já veem
+os valores do .env.
+"""
+import os
+from dataclasses import dataclass
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _load_dotenv():
+    for path in (os.path.join(os.getcwd(), ".env"), os.path.join(BACKEND_DIR, ".env")):
+        if os.path.isfile(path):
+            try:
+                from dotenv import load_dotenv
+            except ImportError:
+                return
+            # Não sobrepõe variáveis já definidas no ambiente
+            load_dotenv(path)
+            return
+
+@dataclass(frozen=True)
+class Settings:
+    mongo_url: str
+    secret_key: str
+    stripe_secret_key: str
+    stripe_webhook_secret: str
+    cloudinary_cloud_name: str
+    cloudinary_api_key: str
+    cloudinary_api_secret: str
+    upload_backend: str
+    serverless: bool
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        env = os.getenv
+        return cls(
+            # Vercel usa MONGODB_URI por padrão nas integrações
+            mongo_url=env("MONGODB_URI", env("MONGO_URL", "mongodb://localhost:27017/mydatabase")),
+            secret_key=env("SECRET_KEY", "YOUR_SECRET_KEY"),
+            stripe_secret_key=env("STRIPE_SECRET_KEY"),
+            stripe_webhook_secret=env("STRIPE_WEBHOOK_SECRET"),
+            # Nomes usados na Vercel; os CLOUDINARY_* do README_ENV.md também servem
+            cloudinary_cloud_name=env("Cloud_name") or env("CLOUDINARY_CLOUD_NAME"),
+            cloudinary_api_key=env("API_key") or env("CLOUDINARY_API_KEY"),
+            cloudinary_api_secret=env("API_secret") or env("CLOUDINARY_API_SECRET"),
+            upload_backend=env("UPLOAD_BACKEND", "cloudinary"),
+            # Vercel/Lambda: threads congeladas entre invocações e sem /dev/shm
+            serverless=bool(env("VERCEL") or env("AWS_LAMBDA_FUNCTION_NAME")),
+        )
+
+_load_dotenv()
+settings = Settings.from_env()
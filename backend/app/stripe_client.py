@@ -0,0 +1,29 @@
+"""
+SDK do Stripe carregado só no primeiro uso.
+
+Importar o stripe custa dezenas de milissegundos; num cold start que só serve páginas
+do catálogo esse tempo é desperdiçado. As rotas de pagamento chamam get_stripe().
+"""
+import threading
+from app.settings import settings
+
+_stripe = None
+_loaded = False
+_lock = threading.Lock()
+
+def get_stripe():
+    """Módulo stripe com a api_key configurada, ou None se o SDK não estiver instalado"""
+    global _stripe, _loaded
+    if _loaded:
+        return _stripe
+    with _lock:
+        if not _loaded:
+            try:
+                import stripe
+                if settings.stripe_secret_key:
+                    stripe.api_key = settings.stripe_secret_key
+                _stripe = stripe
+            except ImportError:
+                _stripe = None
+            _loaded = True
+    return _stripe
@@ -0,0 +1,51 @@
+"""
+Processamento dos eventos do webhook do Stripe.
+
+O webhook só verifica a assinatura, regista o ID do evento em stripe_events (chave
+única: entregas repetidas são ignoradas) e põe o trabalho na fila (app.jobs); os
+handlers abaixo fazem as transições do pedido com updates atómicos condicionais.
+"""
+import datetime
+from app import jobs
+from app.analytics import transition_order
+from app.models.order import Order
+from app.models.stripe_event import StripeEvent
+
+# Tipo de evento do Stripe -> tipo de tarefa
+HANDLED_EVENTS = {
+    "payment_intent.succeeded": "stripe_payment_succeeded",
+    "payment_intent.payment_failed": "stripe_payment_failed",
+}
+
+def _mark_processed(event_id: str):
+    StripeEvent._get_collection().update_one(
+        {"_id": event_id}, {"$set": {"processed_at": datetime.datetime.utcnow()}}
+    )
+
+@jobs.handler("stripe_payment_succeeded")
+def payment_succeeded(payload: dict):
+    payment_intent_id = payload["payment_intent_id"]
+    # Mudar de pending para processing (atómico; atualiza os rollups dos relatórios)
+    _, order = transition_order(
+        {"payment_intent_id": payment_intent_id, "status": "pending"},
+        "processing",
+        payment_status="succeeded",
+    )
+    if not order:
+        # Pedido já avançou (ou ainda não existe: ao ser criado verifica o pagamento)
+        Order._get_collection().update_one(
+            {"payment_intent_id": payment_intent_id},
+            {"$set": {"payment_status": "succeeded", "updated_at": datetime.datetime.utcnow()}},
+        )
+    _mark_processed(payload["event_id"])
+
+@jobs.handler("stripe_payment_failed")
+def payment_failed(payload: dict):
+    # Um "failed" atrasado não pode sobrepor-se a um pagamento já confirmado
+    Order._get_collection().update_one(
+        {"payment_intent_id": payload["payment_intent_id"], "payment_status": {"$ne": "succeeded"}},
+        {"$set": {"payment_status": "failed", "updated_at": datetime.datetime.utcnow()}},
+    )
+    # Nota: O estoque não precisa ser revertido porque o pedido
+    # só é criado após confirmação de pagamento no frontend
+    _mark_processed(payload["event_id"])
@@ -0,0 +1,211 @@
+"""
+Upload de imagens de produtos.
+
+Os ficheiros de um pedido são enviados em paralelo (pool limitado a UPLOAD_WORKERS)
+com um prazo total (UPLOAD_DEADLINE); se algum falhar, os que já foram enviados são
+apagados para não deixar imagens órfãs. O cliente de upload é substituível:
+UPLOAD_BACKEND=cloudinary (padrão) ou local (pasta UPLOAD_DIR, útil em testes).
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from app.metrics import external_call
+from app.settings import settings
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_DEADLINE = float(os.getenv("UPLOAD_DEADLINE", "30"))
+UPLOAD_FOLDER = "mambini_products"
+
+class UploadError(Exception):
+    """Falha (ou prazo excedido) no upload de uma ou mais imagens"""
+
+class UploadClient:
+    """Interface de um serviço de armazenamento de imagens"""
+
+    def upload(self, fileobj, folder: str, filename: str = None) -> str:
+        """Envia o ficheiro e devolve o URL público"""
+        raise NotImplementedError
+
+    def destroy(self, url: str):
+        """Apaga a imagem a partir do URL devolvido por upload"""
+        raise NotImplementedError
+
+class CloudinaryClient(UploadClient):
+    def __init__(self):
+        import cloudinary
+        import cloudinary.uploader
+
+        # Configuração SEGURA (Lê da Vercel)
+        cloudinary.config(
+            cloud_name=settings.cloudinary_cloud_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret,
+            secure=True
+        )
+        self._uploader = cloudinary.uploader
+
+    def upload(self, fileobj, folder: str, filename: str = None) -> str:
+        with external_call("cloudinary", "upload"):
+            return self._uploader.upload(fileobj, folder=folder)["secure_url"]
+
+    @staticmethod
+    def public_id(url: str):
+        """
+        Extrai o public_id de um URL do Cloudinary, ou None se não for do Cloudinary.
+        Formato: https://res.cloudinary.com/cloud_name/image/upload/v1234567890/folder/filename.jpg
+        """
+        if 'cloudinary.com' not in url:
+            return None
+        parts = url.split('/')
+        for i, part in enumerate(parts):
+            if part == 'upload':
+                folder_index = i + 2
+                if folder_index < len(parts):
+                    return '/'.join(parts[folder_index:]).split('.')[0]  # Remove extensão
+                return None
+        return None
+
+    def destroy(self, url: str):
+        public_id = self.public_id(url)
+        if public_id:
+            with external_call("cloudinary", "destroy"):
+                self._uploader.destroy(public_id)
+
+class LocalFilesystemClient(UploadClient):
+    """Guarda as imagens numa pasta local (desenvolvimento e testes)"""
+
+    def __init__(self, directory: str = None, base_url: str = None):
+        self.directory = directory or os.getenv("UPLOAD_DIR", "uploads")
+        self.base_url = (base_url or os.getenv("UPLOAD_BASE_URL", "/uploads")).rstrip("/")
+
+    def upload(self, fileobj, folder: str, filename: str = None) -> str:
+        extension = os.path.splitext(filename or "")[1].lower()
+        name = f"{uuid.uuid4().hex}{extension}"
+        target_dir = os.path.join(self.directory, folder)
+        os.makedirs(target_dir, exist_ok=True)
+        with open(os.path.join(target_dir, name), "wb") as out:
+            shutil.copyfileobj(fileobj, out)
+        return f"{self.base_url}/{folder}/{name}"
+
+    def destroy(self, url: str):
+        if not url.startswith(self.base_url + "/"):
+            return
+        relative = url[len(self.base_url) + 1:]
+        root = os.path.realpath(self.directory)
+        path = os.path.realpath(os.path.join(root, *relative.split("/")))
+        # Recusa caminhos fora de UPLOAD_DIR (ex.: /uploads/../../etc/x)
+        if os.path.commonpath([root, path]) != root or path == root:
+            return
+        if os.path.isfile(path):
+            os.remove(path)
+
+_client = None
+_client_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "batches": 0,
+    "files": 0,
+    "failures": 0,
+    "cleanups": 0,
+    "bytes": 0,
+    "seconds_total": 0.0,
+    "max_file_seconds": 0.0,
+    "max_fan_out": 0,
+}
+
+def get_client() -> UploadClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            if settings.upload_backend == "local":
+                _client = LocalFilesystemClient()
+            else:
+                _client = CloudinaryClient()
+        return _client
+
+def set_client(client: UploadClient):
+    """Troca o cliente de upload (ex.: LocalFilesystemClient nos testes)"""
+    global _client
+    with _client_lock:
+        _client = client
+
+def _file_size(fileobj) -> int:
+    try:
+        position = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return 0
+
+def _upload_one(client: UploadClient, file, folder: str) -> str:
+    size = _file_size(file.file)
+    start = time.perf_counter()
+    url = client.upload(file.file, folder, file.filename)
+    elapsed = time.perf_counter() - start
+    with _stats_lock:
+        _stats["files"] += 1
+        _stats["bytes"] += size
+        _stats["seconds_total"] += elapsed
+        _stats["max_file_seconds"] = max(_stats["max_file_seconds"], elapsed)
+    return url
+
+def _destroy_quietly(client: UploadClient, url: str):
+    try:
+        client.destroy(url)
+    except Exception as e:
+        print(f"Erro ao apagar imagem {url}: {e}")
+
+def upload_many(files, folder: str = UPLOAD_FOLDER) -> list:
+    """
+    Envia os ficheiros (UploadFile) em paralelo e devolve os URLs pela mesma ordem.
+    Tudo ou nada: em caso de erro ou prazo excedido apaga o que já foi enviado e lança UploadError.
+    """
+    files = list(files)
+    if not files:
+        return []
+
+    client = get_client()
+    with _stats_lock:
+        _stats["batches"] += 1
+        _stats["max_fan_out"] = max(_stats["max_fan_out"], len(files))
+
+    futures = [_executor.submit(_upload_one, client, f, folder) for f in files]
+    done, pending = wait(futures, timeout=UPLOAD_DEADLINE)
+
+    failed = bool(pending) or any(f.exception() is not None for f in done)
+    if not failed:
+        return [f.result() for f in futures]
+
+    with _stats_lock:
+        _stats["failures"] += 1
+        _stats["cleanups"] += 1
+    for f in done:
+        if f.exception() is None:
+            _destroy_quietly(client, f.result())
+    for f in pending:
+        # Uploads ainda a correr: apagar assim que terminarem
+        if not f.cancel():
+            f.add_done_callback(
+                lambda fut: fut.exception() is None and _destroy_quietly(client, fut.result())
+            )
+
+    errors = [str(f.exception()) for f in done if f.exception() is not None]
+    if pending:
+        errors.append(f"prazo de {UPLOAD_DEADLINE}s excedido")
+    raise UploadError("; ".join(errors))
+
+def upload_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["workers"] = UPLOAD_WORKERS
+    stats["deadline"] = UPLOAD_DEADLINE
+    stats["avg_file_seconds"] = stats["seconds_total"] / stats["files"] if stats["files"] else 0.0
+    stats["bytes_per_second"] = stats["bytes"] / stats["seconds_total"] if stats["seconds_total"] else 0.0
+    return stats
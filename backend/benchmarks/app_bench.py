@@ -0,0 +1,375 @@
+"""
+Benchmark reprodutível dos caminhos quentes da API, dentro do processo (ASGI, sem rede).
+
+Semeia uma base de dados com produtos, utilizadores e pedidos sintéticos (seed fixo)
+e mede cada cenário com o mesmo número de clientes simultâneos:
+- products_list:    GET /products/?view=card (listagem do catálogo, por páginas)
+- products_search:  GET /products/?q=... (índice de texto; prefixo no mongomock)
+- product_detail:   GET /products/{id}
+- login:            POST /users/login (argon2 no pool de processos)
+- checkout:         POST /orders/ (create_order com reserva de stock)
+- admin_orders:     GET /orders/all (feed de pedidos do admin)
+- webhook_burst:    POST /payment/webhook com entregas repetidas do mesmo evento
+
+O resultado (RPS, p50/p95/p99, erros e queries ao MongoDB por pedido, lidas do
+cabeçalho Server-Timing) é escrito em JSON com o commit atual, para comparar
+commits: --baseline mostra a diferença para um resultado anterior. Um cenário com
+respostas fora de 2xx fica marcado "failed" e o script termina com código 1.
+
+Uso (a partir da pasta backend/):
+    python -m benchmarks.app_bench --backend mongomock --out bench.json
+    python -m benchmarks.app_bench --backend mongo --products 5000 --concurrency 100 --baseline bench.json
+
+--backend mongo usa BENCH_MONGO_URL e APAGA as coleções dessa base de dados.
+--backend mongomock (pip install mongomock mongomock-motor) não emite eventos de
+comando, por isso db_ops_per_request fica a null; serve para medir o código da app.
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+BENCH_MONGO_URL = os.getenv("BENCH_MONGO_URL", "mongodb://localhost:27017/mambini_bench")
+BENCH_PASSWORD = "bench-password"
+WEBHOOK_SECRET = "whsec_bench"
+
+# Os módulos da app leem a configuração do ambiente ao serem importados
+os.environ["MONGODB_URI"] = BENCH_MONGO_URL
+os.environ["STRIPE_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+os.environ.setdefault("STRIPE_SECRET_KEY", "sk_test_bench")
+os.environ.setdefault("UPLOAD_BACKEND", "local")
+# JOB_WORKERS > 0 faz o dispatch enfileirar em vez de executar no pedido; como o
+# ASGITransport não corre o lifespan, nenhum worker arranca e o webhook só regista
+# o evento e grava a tarefa (é isso que se mede, sem o processamento do pedido)
+os.environ["JOB_WORKERS"] = "1"
+os.environ["SLOW_QUERY_MS"] = "-1"
+
+WORDS = [
+    "camisola", "casaco", "calças", "vestido", "saia", "camisa", "sapatilhas", "botas",
+    "algodão", "linho", "lã", "ganga", "verão", "inverno", "clássico", "slim", "oversize",
+]
+CATEGORIES = ["Tops", "Calças", "Vestidos", "Calçado", "Casacos"]
+SIZES = ["XS", "S", "M", "L", "XL"]
+COLORS = ["preto", "branco", "azul", "verde", "vermelho"]
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+
+SCENARIOS = [
+    "products_list", "products_search", "product_detail", "login",
+    "checkout", "admin_orders", "webhook_burst",
+]
+
+def seed(products: int, users: int, orders: int, rng: random.Random) -> dict:
+    """Recria as coleções com dados sintéticos; devolve os ids/credenciais usados pelos cenários"""
+    from app.hashing import get_pwd_context
+    from app.manage import ensure_indexes
+    from app.models.job import Job
+    from app.models.order import Order
+    from app.models.product import Product
+    from app.models.stripe_event import StripeEvent
+    from app.models.user import User
+    from app.models.analytics import DailySales, DailyProductSales, OrderCustomer
+    from app.search import search_tokens_for
+
+    for model in (Product, User, Order, Job, StripeEvent, DailySales, DailyProductSales, OrderCustomer):
+        model.drop_collection()
+    ensure_indexes()
+
+    now = datetime.datetime.utcnow()
+    product_docs = []
+    for i in range(products):
+        name = " ".join(rng.sample(WORDS, 3)).capitalize() + f" {i}"
+        description = " ".join(rng.choices(WORDS, k=20))
+        category = rng.choice(CATEGORIES)
+        images = [f"/uploads/mambini_products/bench_{i}_{k}.jpg" for k in range(3)]
+        product_docs.append({
+            "name": name,
+            "description": description,
+            "price": round(rng.uniform(5, 200), 2),
+            "stock": 1_000_000,
+            "sizes": SIZES,
+            "available_sizes": rng.sample(SIZES, 3),
+            "gender": rng.choice(["male", "female", "unisex"]),
+            "category": category,
+            "colors": COLORS,
+            "available_colors": rng.sample(COLORS, 2),
+            "images": images,
+            "visible_images": images,
+            "search_tokens": search_tokens_for(name, category, description),
+            "created_at": now - datetime.timedelta(minutes=i),
+            "updated_at": now,
+            "version": 1,
+        })
+    product_ids = Product._get_collection().insert_many(product_docs).inserted_ids
+
+    # Um único hash para todos: o custo do argon2 é medido no login, não na semente
+    password = get_pwd_context().hash(BENCH_PASSWORD)
+    user_docs = [{
+        "email": f"cliente{i}@bench.pt", "name": f"Cliente {i}", "password": password,
+        "role": "client", "token_version": 0,
+    } for i in range(users)]
+    user_docs.append({
+        "email": "admin@bench.pt", "name": "Admin", "password": password,
+        "role": "admin", "token_version": 0,
+    })
+    user_ids = User._get_collection().insert_many(user_docs).inserted_ids
+
+    order_docs = []
+    for i in range(orders):
+        user_index = rng.randrange(users)
+        items = []
+        for _ in range(rng.randint(1, 4)):
+            index = rng.randrange(products)
+            items.append({
+                "product_id": str(product_ids[index]),
+                "product_name": product_docs[index]["name"],
+                "price": product_docs[index]["price"],
+                "quantity": rng.randint(1, 3),
+                "size": rng.choice(product_docs[index]["available_sizes"]),
+                "color": rng.choice(product_docs[index]["available_colors"]),
+                "image": product_docs[index]["images"][0],
+            })
+        created_at = now - datetime.timedelta(minutes=i)
+        order_docs.append({
+            "user_id": str(user_ids[user_index]),
+            "user_email": user_docs[user_index]["email"],
+            "user_name": user_docs[user_index]["name"],
+            "items": items,
+            "total_amount": round(sum(item["price"] * item["quantity"] for item in items), 2),
+            "status": rng.choice(STATUSES),
+            "shipping_address": "Rua de Exemplo 123",
+            "shipping_city": "Lisboa",
+            "shipping_postal_code": "1000-001",
+            "shipping_country": "Portugal",
+            "payment_intent_id": f"pi_bench_{i}",
+            "payment_status": "pending",
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    if order_docs:
+        Order._get_collection().insert_many(order_docs)
+
+    return {
+        "product_ids": [str(_id) for _id in product_ids],
+        # Tamanhos/cores disponíveis por produto: o checkout recusa as outras variantes
+        "variants": {
+            str(_id): (doc["available_sizes"], doc["available_colors"])
+            for _id, doc in zip(product_ids, product_docs)
+        },
+        "search_terms": [doc["name"].split()[0].lower() for doc in product_docs[:50]],
+        "emails": [doc["email"] for doc in user_docs[:-1]],
+        "payment_intents": [doc["payment_intent_id"] for doc in order_docs],
+    }
+
+def signed_webhook(event: dict) -> tuple:
+    """Corpo e cabeçalho Stripe-Signature válidos para WEBHOOK_SECRET"""
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return payload, f"t={timestamp},v1={signature}"
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def db_ops(response):
+    """Número de queries do pedido, a partir de Server-Timing (db;dur=..;desc="N queries")"""
+    for part in response.headers.get("server-timing", "").split(","):
+        if part.strip().startswith("db;") and 'desc="' in part:
+            return int(part.split('desc="')[1].split()[0])
+    return None
+
+async def drive(client, name: str, make_request, requests: int, concurrency: int, count_db: bool) -> dict:
+    """Executa make_request(i) requests vezes com concurrency clientes; devolve as estatísticas"""
+    latencies, ops, statuses = [], [], {}
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, path, kwargs = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if not 200 <= response.status_code < 300:
+                errors += 1
+            queries = db_ops(response)
+            if queries is not None:
+                ops.append(queries)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        # Um cenário com respostas fora de 2xx mede recusas, não o caminho feliz
+        "failed": errors > 0,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "db_ops_per_request": round(sum(ops) / len(ops), 2) if count_db and ops else None,
+    }
+
+async def login_token(client, email: str) -> str:
+    response = await client.post("/users/login", json={"email": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def run(args, data: dict) -> list:
+    import httpx
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    product_ids = data["product_ids"]
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        client_auth = {"Authorization": f"Bearer {await login_token(client, data['emails'][0])}"}
+        admin_auth = {"Authorization": f"Bearer {await login_token(client, 'admin@bench.pt')}"}
+        search_match = "text" if args.backend == "mongo" else "prefix"
+
+        def checkout(i):
+            product_id = rng.choice(product_ids)
+            sizes, colors = data["variants"][product_id]
+            body = {
+                "items": [{"product_id": product_id, "product_name": "bench", "price": 0, "quantity": 1,
+                           "size": rng.choice(sizes), "color": rng.choice(colors)}],
+                "shipping": {"address": "Rua", "city": "Lisboa", "postal_code": "1000-001", "country": "PT"},
+            }
+            return "POST", "/orders/", {"json": body, "headers": client_auth}
+
+        def webhook(i):
+            # Cada evento é entregue args.webhook_duplicates vezes (retries do Stripe)
+            index = i // args.webhook_duplicates
+            intents = data["payment_intents"]
+            event = {
+                "id": f"evt_bench_{index}",
+                "object": "event",
+                "type": "payment_intent.succeeded",
+                "data": {"object": {"id": intents[index % len(intents)] if intents else f"pi_{index}", "object": "payment_intent"}},
+            }
+            payload, signature = signed_webhook(event)
+            return "POST", "/payment/webhook", {
+                "content": payload, "headers": {"Stripe-Signature": signature, "Content-Type": "application/json"},
+            }
+
+        scenarios = {
+            "products_list": lambda i: ("GET", "/products/", {"params": {"view": "card", "limit": [12, 24, 48][i % 3]}}),
+            "products_search": lambda i: ("GET", "/products/", {"params": {
+                "q": data["search_terms"][i % len(data["search_terms"])], "match": search_match, "view": "card",
+            }}),
+            "product_detail": lambda i: ("GET", f"/products/{rng.choice(product_ids)}", {}),
+            "login": lambda i: ("POST", "/users/login", {"json": {
+                "email": data["emails"][i % len(data["emails"])], "password": BENCH_PASSWORD,
+            }}),
+            "checkout": checkout,
+            "admin_orders": lambda i: ("GET", "/orders/all", {"params": {"limit": 50}, "headers": admin_auth}),
+            "webhook_burst": webhook,
+        }
+
+        count_db = args.backend == "mongo"
+        for name in args.scenarios:
+            requests = args.requests if name != "login" else min(args.requests, args.login_requests)
+            if args.warmup:
+                await drive(client, name, scenarios[name], args.warmup, args.concurrency, count_db)
+            result = await drive(client, name, scenarios[name], requests, args.concurrency, count_db)
+            results.append(result)
+            print(f"{name:<16} rps={result['rps']:<8} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                  f"p99={result['p99_ms']}ms db_ops={result['db_ops_per_request']} errors={result['errors']}")
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: list, baseline_path: str):
+    """Diferença relativa de RPS e p95 para um resultado anterior"""
+    with open(baseline_path) as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+    print(f"\nComparação com {baseline_path}:")
+    for r in results:
+        old = baseline.get(r["scenario"])
+        if not old:
+            continue
+        rps = (r["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0.0
+        p95 = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        print(f"  {r['scenario']:<16} rps {rps:+.1f}%  p95 {p95:+.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.app_bench")
+    parser.add_argument("--backend", choices=["mongomock", "mongo"], default="mongomock")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=500, help="Pedidos por cenário")
+    parser.add_argument("--login-requests", type=int, default=100, help="Limite de pedidos do login (argon2 é lento de propósito)")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--webhook-duplicates", type=int, default=3)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--no-cache", action="store_true", help="Desliga a cache do catálogo (mede sempre a base de dados)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Ficheiro JSON com os resultados")
+    parser.add_argument("--baseline", help="Resultado anterior (JSON) para comparar")
+    args = parser.parse_args()
+
+    if args.backend == "mongomock":
+        from benchmarks.mongomock_backend import use_mongomock
+        use_mongomock()
+    from app.db import init_db
+    init_db()
+
+    from app import cache, hashing
+    if args.no_cache:
+        cache.set_backend(cache.MemoryCache(max_entries=0))
+
+    data = seed(args.products, args.users, args.orders, random.Random(args.seed))
+    try:
+        results = asyncio.run(run(args, data))
+    finally:
+        hashing.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "dataset": {"products": args.products, "users": args.users, "orders": args.orders, "seed": args.seed},
+        "cache": not args.no_cache,
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados em {args.out}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+    failed = [r["scenario"] for r in results if r["failed"]]
+    if failed:
+        print(f"Cenários com respostas fora de 2xx: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Carga HTTP concorrente contra um servidor a correr (ex.: uvicorn app.main:app).
+Serve para comparar commits (ex.: caminho síncrono vs async) na listagem de produtos
+e no checkout com o mesmo número de clientes simultâneos.
+
+Uso (requer httpx):
+    python -m benchmarks.http_load --url http://localhost:8000 --scenario products --concurrency 500
+    python -m benchmarks.http_load --scenario checkout --token <JWT> --product-id <id>
+
+O checkout decrementa stock: usar um produto de teste com stock suficiente. O tamanho
+e a cor são lidos do produto (available_sizes / available_colors) antes da carga.
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def checkout_variant(client, product_id: str) -> dict:
+    """Tamanho e cor válidos do produto (o checkout recusa variantes fora de available_*)"""
+    response = await client.get(f"/products/{product_id}")
+    response.raise_for_status()
+    product = response.json()
+    sizes = product.get("available_sizes") or []
+    colors = product.get("available_colors") or []
+    return {"size": sizes[0] if sizes else None, "color": colors[0] if colors else None}
+
+def build_request(args, variant: dict = None):
+    if args.scenario == "products":
+        return "GET", "/products/", {"params": {"view": "card"}}
+    if args.scenario == "checkout":
+        body = {
+            "items": [{
+                "product_id": args.product_id,
+                "product_name": "bench",
+                "price": 0,
+                "quantity": 1,
+                **(variant or {}),
+            }],
+            "shipping": {"address": "Rua", "city": "Lisboa", "postal_code": "1000-001", "country": "PT"},
+        }
+        return "POST", "/orders/", {"json": body, "headers": {"Authorization": f"Bearer {args.token}"}}
+    raise SystemExit(f"Cenário desconhecido: {args.scenario}")
+
+async def run(args) -> dict:
+    latencies = []
+    errors = 0
+    remaining = args.requests
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        variant = await checkout_variant(client, args.product_id) if args.scenario == "checkout" else None
+        method, path, kwargs = build_request(args, variant)
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": args.scenario,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.http_load")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--scenario", choices=["products", "checkout"], default="products")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--token")
+    parser.add_argument("--product-id")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
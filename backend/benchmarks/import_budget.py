@@ -0,0 +1,93 @@
+"""
+Orçamento do cold start: tempo de "import app.main" num processo novo (python -X importtime).
+
+Falha (código de saída 1) se a mediana das execuções passar de --budget-ms, ou se algum
+dos módulos que devem ser carregados só no primeiro uso (Stripe, Cloudinary, passlib,
+argon2, jose, Motor, python-dotenv) for importado no arranque.
+
+Uso (a partir da pasta backend/; serve para CI ou antes de um deploy na Vercel):
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-ms 400 --runs 7 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "450"))
+
+# Carregados só quando uma rota (ou a fila) precisa deles
+LAZY_MODULES = ["stripe", "cloudinary", "passlib", "argon2", "jose", "motor", "dotenv"]
+
+PROBE = (
+    "import json, sys, app.main; "
+    f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+)
+
+def run_once() -> tuple:
+    """(ms de import app.main, [(self_us, cumulativo_us, módulo)], módulos lazy carregados)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import app.main falhou:\n{result.stderr[-2000:]}")
+
+    modules = []
+    total_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us), int(cumulative_us), name.strip()))
+        if name.strip() == "app.main":
+            total_us = int(cumulative_us)
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return total_us / 1000, modules, loaded
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_budget")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Módulos mais lentos a mostrar")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    # A primeira execução compila os .pyc; não conta
+    run_once()
+    totals, slowest, loaded = [], {}, set()
+    for _ in range(args.runs):
+        total_ms, modules, lazy_loaded = run_once()
+        totals.append(total_ms)
+        loaded.update(lazy_loaded)
+        for self_us, _, name in modules:
+            slowest[name] = slowest.get(name, 0) + self_us / args.runs
+
+    median = statistics.median(totals)
+    top = sorted(slowest.items(), key=lambda item: -item[1])[:args.top]
+    report = {
+        "median_ms": round(median, 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "budget_ms": args.budget_ms,
+        "eager_lazy_modules": sorted(loaded),
+        "slowest_self_ms": {name: round(us / 1000, 2) for name, us in top},
+    }
+    ok = median <= args.budget_ms and not loaded
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import app.main: mediana {report['median_ms']}ms (min {report['min_ms']}, max {report['max_ms']}), orçamento {args.budget_ms}ms")
+        for name, ms in report["slowest_self_ms"].items():
+            print(f"  {ms:8.2f}ms  {name}")
+        if loaded:
+            print(f"Módulos que deviam ser lazy carregados no arranque: {', '.join(sorted(loaded))}")
+        print("OK" if ok else "FALHOU")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
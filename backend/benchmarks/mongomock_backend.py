@@ -0,0 +1,37 @@
+"""
+Clientes mongomock/mongomock-motor no lugar do MongoDB (benchmarks e tests/).
+
+Não altera o ambiente nem importa a app ao ser importado: use_mongomock() tem de
+ser chamado antes do primeiro import de app.db.
+"""
+
+def use_mongomock():
+    """Substitui os clientes da app por mongomock/mongomock-motor (antes de importar a app)"""
+    try:
+        import mongomock
+        import mongomock_motor
+    except ImportError:
+        raise SystemExit("mongomock requer: pip install mongomock mongomock-motor")
+    import mongoengine
+
+    original_connect = mongoengine.connect
+
+    def connect(*args, **kwargs):
+        kwargs["mongo_client_class"] = mongomock.MongoClient
+        kwargs.pop("event_listeners", None)
+        return original_connect(*args, **kwargs)
+
+    mongoengine.connect = connect
+    import app.db
+    app.db.init_db()
+    client = mongomock_motor.AsyncMongoMockClient(mock_mongo_client=mongoengine.get_connection())
+    app.db.get_async_db = lambda: client[mongoengine.get_db().name]
+
+    # O pymongo recente passa "sort" ao UpdateOne; versões do mongomock não o aceitam
+    import inspect
+    from mongomock.collection import BulkOperationBuilder
+    original_add_update = BulkOperationBuilder.add_update
+    if "sort" not in inspect.signature(original_add_update).parameters:
+        def add_update(self, *args, sort=None, **kwargs):
+            return original_add_update(self, *args, **kwargs)
+        BulkOperationBuilder.add_update = add_update
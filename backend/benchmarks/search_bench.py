@@ -0,0 +1,105 @@
+"""
+Benchmark da pesquisa de produtos: regex icontains (caminho antigo) vs índice de
+texto vs prefixo sobre search_tokens, numa coleção sintética.
+
+Uso (a partir da pasta backend/, com um MongoDB local):
+    python -m benchmarks.search_bench --products 100000 --repeat 20
+
+ATENÇÃO: usa a base de dados indicada em BENCH_MONGO_URL e apaga a coleção de produtos.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from mongoengine import connect, Q
+from app.models.product import Product
+from app.search import search_tokens_for, prefix_query, text_query, TEXT_SCORE_PROJECTION, TEXT_SCORE_SORT
+
+BENCH_MONGO_URL = os.getenv("BENCH_MONGO_URL", "mongodb://localhost:27017/mambini_bench")
+
+WORDS = [
+    "camisola", "casaco", "calças", "calções", "vestido", "saia", "camisa", "t-shirt",
+    "sapatilhas", "botas", "algodão", "linho", "lã", "ganga", "verão", "inverno",
+    "clássico", "slim", "oversize", "riscas", "básico", "desportivo", "elegante", "bordado",
+]
+CATEGORIES = ["Tops", "Calças", "Vestidos", "Calçado", "Acessórios", "Casacos"]
+QUERIES = ["camisola", "linho verão", "calç", "bordado elegante", "zzz"]
+
+def seed(n: int):
+    """Recria a coleção com n produtos sintéticos"""
+    collection = Product._get_collection()
+    collection.drop()
+    rng = random.Random(42)
+    batch = []
+    for i in range(n):
+        name = " ".join(rng.sample(WORDS, 3)).capitalize() + f" {i}"
+        description = " ".join(rng.choices(WORDS, k=12))
+        category = rng.choice(CATEGORIES)
+        batch.append({
+            "name": name,
+            "description": description,
+            "category": category,
+            "price": round(rng.uniform(5, 150), 2),
+            "stock": rng.randint(0, 50),
+            "search_tokens": search_tokens_for(name, category, description),
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+    Product.ensure_indexes()
+
+def regex_query(q: str):
+    return Product.objects(Q(name__icontains=q) | Q(description__icontains=q) | Q(category__icontains=q))
+
+def text_index_query(q: str):
+    return Product._get_collection().find(text_query(q), TEXT_SCORE_PROJECTION).sort(TEXT_SCORE_SORT)
+
+def prefix_index_query(q: str):
+    return Product._get_collection().find(prefix_query(q) or {"_id": None})
+
+def docs_examined(query_set) -> int:
+    try:
+        return query_set.explain()["executionStats"]["totalDocsExamined"]
+    except (KeyError, TypeError):
+        return -1
+
+def measure(build, q: str, limit: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(build(q).limit(limit))
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+        "docs_examined": docs_examined(build(q).limit(limit)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.search_bench")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=24)
+    parser.add_argument("--skip-seed", action="store_true")
+    args = parser.parse_args()
+
+    connect(host=BENCH_MONGO_URL)
+    if not args.skip_seed:
+        seed(args.products)
+
+    results = {}
+    for q in QUERIES:
+        results[q] = {
+            "regex": measure(regex_query, q, args.limit, args.repeat),
+            "text": measure(text_index_query, q, args.limit, args.repeat),
+            "prefix": measure(prefix_index_query, q, args.limit, args.repeat),
+        }
+    print(json.dumps({"products": args.products, "limit": args.limit, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
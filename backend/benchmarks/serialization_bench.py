@@ -0,0 +1,151 @@
+"""
+Benchmark da serialização e compressão de respostas grandes (1k produtos / 1k pedidos).
+
+Compara, para a mesma página já construída:
+- stdlib:      jsonable_encoder + json.dumps (JSONResponse clássico)
+- revalidate:  o caminho do FastAPI quando a rota devolve o modelo/dict (nova validação
+               contra o response_model + dump_json do pydantic-core)
+- direct:      app.responses.dumps sobre o modelo já validado (o que as rotas fazem agora)
+e o tamanho do corpo sem compressão, com gzip e com brotli (CompressionMiddleware).
+
+Não precisa de base de dados. Uso (a partir da pasta backend/):
+    python -m benchmarks.serialization_bench --items 1000 --repeat 20
+"""
+import argparse
+import datetime
+import gzip
+import json
+import random
+import statistics
+import time
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from app.responses import dumps
+from app.schemas.order import OrderOut, OrderPage
+from app.schemas.product import ProductPage
+from app.serializers import product_out_from_doc
+
+WORDS = ["camisola", "casaco", "calças", "vestido", "saia", "algodão", "linho", "verão", "clássico", "slim"]
+SIZES = ["XS", "S", "M", "L", "XL"]
+COLORS = ["preto", "branco", "azul", "verde", "vermelho"]
+
+def product_docs(n: int, rng: random.Random) -> list:
+    docs = []
+    now = datetime.datetime.utcnow()
+    for i in range(n):
+        _id = ObjectId()
+        images = [f"https://res.cloudinary.com/demo/image/upload/v1/mambini_products/{_id}_{k}.jpg" for k in range(3)]
+        docs.append({
+            "_id": _id,
+            "name": " ".join(rng.sample(WORDS, 3)).capitalize() + f" {i}",
+            "description": " ".join(rng.choices(WORDS, k=30)),
+            "price": round(rng.uniform(5, 200), 2),
+            "stock": rng.randint(0, 50),
+            "sizes": SIZES,
+            "available_sizes": rng.sample(SIZES, 3),
+            "gender": rng.choice(["male", "female", "unisex"]),
+            "category": rng.choice(["Tops", "Calças", "Vestidos"]),
+            "colors": COLORS,
+            "available_colors": rng.sample(COLORS, 2),
+            "images": images,
+            "visible_images": images,
+            "created_at": now - datetime.timedelta(minutes=i),
+            "updated_at": now,
+            "version": rng.randint(1, 10),
+        })
+    return docs
+
+def order_models(n: int, rng: random.Random) -> list:
+    orders = []
+    now = datetime.datetime.utcnow()
+    for i in range(n):
+        items = [{
+            "product_id": str(ObjectId()),
+            "product_name": " ".join(rng.sample(WORDS, 3)),
+            "price": round(rng.uniform(5, 200), 2),
+            "quantity": rng.randint(1, 3),
+            "size": rng.choice(SIZES),
+            "color": rng.choice(COLORS),
+            "image": f"https://res.cloudinary.com/demo/image/upload/v1/mambini_products/{i}.jpg",
+        } for _ in range(rng.randint(1, 5))]
+        orders.append(OrderOut(
+            id=str(ObjectId()),
+            user_id=str(ObjectId()),
+            user_email=f"cliente{i}@example.com",
+            user_name=f"Cliente {i}",
+            items=items,
+            total_amount=round(sum(item["price"] * item["quantity"] for item in items), 2),
+            status=rng.choice(["pending", "processing", "shipped"]),
+            shipping_address="Rua de Exemplo 123",
+            shipping_city="Lisboa",
+            shipping_postal_code="1000-001",
+            shipping_country="Portugal",
+            shipping_phone="+351 910 000 000",
+            notes=None,
+            payment_intent_id=f"pi_{i}",
+            payment_status="succeeded",
+            created_at=str(now - datetime.timedelta(minutes=i)),
+            updated_at=str(now),
+        ))
+    return orders
+
+def timed(func, repeat: int) -> float:
+    """Mediana em milissegundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def measure(label: str, page, model, repeat: int) -> dict:
+    adapter = TypeAdapter(model)
+    as_dict = page.model_dump()
+    body = dumps(page)
+
+    result = {
+        "payload": label,
+        "items": len(page.items),
+        "stdlib_ms": timed(lambda: json.dumps(jsonable_encoder(as_dict)).encode(), repeat),
+        "revalidate_ms": timed(lambda: adapter.dump_json(adapter.validate_python(as_dict)), repeat),
+        "direct_ms": timed(lambda: dumps(page), repeat),
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, GZIP_LEVEL)),
+        "gzip_ms": timed(lambda: gzip.compress(body, GZIP_LEVEL), repeat),
+    }
+    if brotli is not None:
+        result["brotli_bytes"] = len(brotli.compress(body, quality=BROTLI_QUALITY))
+        result["brotli_ms"] = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY), repeat)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    products = ProductPage(items=[product_out_from_doc(doc, include_meta=False) for doc in product_docs(args.items, rng)])
+    orders = OrderPage(items=order_models(args.items, rng))
+
+    results = [
+        measure("products", products, ProductPage, args.repeat),
+        measure("orders", orders, OrderPage, args.repeat),
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['payload']} ({r['items']} itens)")
+        print(f"  serialização  stdlib={r['stdlib_ms']:.2f}ms  revalidate={r['revalidate_ms']:.2f}ms  direct={r['direct_ms']:.2f}ms")
+        line = f"  tamanho       json={r['bytes']}B  gzip={r['gzip_bytes']}B ({r['gzip_ms']:.2f}ms)"
+        if "brotli_bytes" in r:
+            line += f"  brotli={r['brotli_bytes']}B ({r['brotli_ms']:.2f}ms)"
+        print(line)
+
+if __name__ == "__main__":
+    main()
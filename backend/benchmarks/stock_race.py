@@ -0,0 +1,68 @@
+"""
+Checkouts concorrentes sobre um único produto com pouco stock: confirma que a
+reserva atómica nunca vende mais do que o stock e mede o débito de reservas.
+
+Uso (a partir da pasta backend/, com um MongoDB local):
+    python -m benchmarks.stock_race --stock 5 --buyers 200
+
+ATENÇÃO: usa a base de dados indicada em BENCH_MONGO_URL.
+A mesma garantia (sem MongoDB real) é verificada em tests/test_stock_reservation.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+BENCH_MONGO_URL = os.getenv("BENCH_MONGO_URL", "mongodb://localhost:27017/mambini_bench")
+# Os módulos da app leem a ligação do ambiente: apontar para a base de benchmark
+os.environ["MONGODB_URI"] = BENCH_MONGO_URL
+
+from app.db import init_db
+from app.models.product import Product
+from app.inventory import reserve_stock, InsufficientStock
+
+async def race(product_id: str, buyers: int, quantity: int) -> int:
+    async def buy():
+        try:
+            await reserve_stock([(product_id, quantity)])
+            return True
+        except InsufficientStock:
+            return False
+
+    results = await asyncio.gather(*(buy() for _ in range(buyers)))
+    return sum(results)
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stock_race")
+    parser.add_argument("--stock", type=int, default=5)
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--quantity", type=int, default=1)
+    args = parser.parse_args()
+    init_db()
+
+    product = Product(name="Produto concorrido", price=10.0, stock=args.stock)
+    product.save()
+    product_id = str(product.id)
+
+    start = time.perf_counter()
+    sold = asyncio.run(race(product_id, args.buyers, args.quantity))
+    elapsed = time.perf_counter() - start
+
+    final_stock = Product.objects(id=product_id).as_pymongo().first()["stock"]
+    product.delete()
+
+    oversold = sold * args.quantity > args.stock or final_stock < 0
+    print(json.dumps({
+        "initial_stock": args.stock,
+        "buyers": args.buyers,
+        "sold": sold,
+        "final_stock": final_stock,
+        "oversold": oversold,
+        "reservations_per_s": round(args.buyers / elapsed, 1),
+    }, indent=2))
+    if oversold:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Testes contra mongomock/mongomock-motor, sem MongoDB real.
+
+Uso (a partir da pasta backend/):
+    pip install pytest mongomock mongomock-motor
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Base de dados de teste (em memória), mesmo que exista um .env com outra ligação
+os.environ["MONGODB_URI"] = "mongodb://localhost:27017/mambini_test"
+
+pytest.importorskip("mongomock")
+pytest.importorskip("mongomock_motor")
+
+# Antes de qualquer import de app.db: os clientes da app passam a ser mongomock
+from benchmarks.mongomock_backend import use_mongomock
+
+use_mongomock()
+
+from fastapi.testclient import TestClient
+from app import cache
+from app.main import app
+from app.models.product import Product
+
+@pytest.fixture
+def client():
+    # Sem "with": não corre o lifespan (ligações já criadas por use_mongomock)
+    return TestClient(app)
+
+@pytest.fixture(autouse=True)
+def clean_products():
+    Product.drop_collection()
+    yield
+    Product.drop_collection()
+
+@pytest.fixture
+def no_cache():
+    """Desliga a cache do catálogo: cada GET vai à base de dados"""
+    previous = cache.get_backend()
+    cache.set_backend(cache.MemoryCache(max_entries=0))
+    yield
+    cache.set_backend(previous)
@@ -0,0 +1,37 @@
+"""O overview conta clientes distintos pelo rollup order_customers, sem agregar os pedidos"""
+import asyncio
+import datetime
+
+import pytest
+
+from app import analytics
+from app.models.analytics import DailySales, DailyProductSales, OrderCustomer
+
+@pytest.fixture(autouse=True)
+def clean_rollups():
+    for model in (DailySales, DailyProductSales, OrderCustomer):
+        model.drop_collection()
+    yield
+    for model in (DailySales, DailyProductSales, OrderCustomer):
+        model.drop_collection()
+
+def order(user_id: str, status: str = "pending") -> dict:
+    return {"user_id": user_id, "status": status, "created_at": datetime.datetime.utcnow(), "total_amount": 10.0, "items": []}
+
+def test_overview_counts_each_customer_once():
+    for doc in (order("a"), order("a"), order("b")):
+        analytics.apply_status_change(doc, None, doc["status"])
+    # Mudanças de estado não voltam a contar o cliente
+    analytics.apply_status_change(order("a"), "pending", "processing")
+
+    overview = asyncio.run(analytics.overview())
+
+    assert overview["orders"] == 3
+    assert overview["customers"] == 2
+
+def test_async_creation_registers_customer():
+    doc = order("c")
+    asyncio.run(analytics.apply_status_change_async(doc, None, doc["status"]))
+
+    assert OrderCustomer.objects.count() == 1
+    assert OrderCustomer.objects.first().first_order_at is not None
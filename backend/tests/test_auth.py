@@ -0,0 +1,61 @@
+"""require_admin decide pelo claim role; a base de dados só confirma a revogação"""
+import pytest
+from mongomock.collection import Collection
+
+from app.auth import _principals, create_access_token, token_claims
+from app.models.user import User
+
+@pytest.fixture
+def user_reads(monkeypatch):
+    """Leituras da coleção de utilizadores"""
+    calls = []
+    original = Collection.find_one
+
+    def find_one(self, *args, **kwargs):
+        if self.name == User._get_collection_name():
+            calls.append(args)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Collection, "find_one", find_one)
+    return calls
+
+@pytest.fixture(autouse=True)
+def clean_users():
+    User.drop_collection()
+    _principals.clear()
+    yield
+    User.drop_collection()
+    _principals.clear()
+
+def bearer(user, role=None, version=None) -> dict:
+    claims = token_claims(user.id, role or user.role, user.token_version if version is None else version)
+    return {"Authorization": f"Bearer {create_access_token(claims)}"}
+
+def create_user(role: str) -> User:
+    user = User(email=f"{role}@teste.pt", name=role, password="x", role=role)
+    user.save()
+    return user
+
+def test_client_token_is_refused_without_reading_users(client, user_reads):
+    user = create_user("client")
+
+    response = client.get("/users/hashing/stats", headers=bearer(user))
+
+    assert response.status_code == 403
+    assert user_reads == []
+
+def test_admin_token_checks_revocation_once(client, user_reads):
+    admin = create_user("admin")
+    headers = bearer(admin)
+
+    for _ in range(3):
+        assert client.get("/users/hashing/stats", headers=headers).status_code == 200
+    # Uma leitura para a cache; os pedidos seguintes usam a cache
+    assert len(user_reads) == 1
+
+def test_demoted_admin_token_is_revoked(client):
+    admin = create_user("admin")
+    old_token = bearer(admin)
+    User.objects(id=admin.id).update(set__role="client", inc__token_version=1)
+
+    assert client.get("/users/hashing/stats", headers=old_token).status_code == 401
@@ -0,0 +1,61 @@
+"""A tarefa upload_images pode ser repetida sem duplicar nem deixar imagens órfãs"""
+import pytest
+from bson import Binary
+from mongomock.collection import Collection
+
+from app import images, jobs
+from app.models.product import Product
+from app.uploads import LocalFilesystemClient, get_client, set_client
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    previous = get_client()
+    set_client(LocalFilesystemClient(directory=str(tmp_path), base_url="/uploads"))
+    # Sem Pillow nos testes: só o original é enviado
+    monkeypatch.setattr(images, "build_derivatives", lambda data, filename=None: (None, []))
+    # Remoções executadas no próprio pedido, como em serverless
+    monkeypatch.setattr(jobs, "JOB_WORKERS", 0)
+    yield tmp_path
+    set_client(previous)
+
+def stored_files(root) -> list:
+    return [path for path in root.rglob("*") if path.is_file()]
+
+def payload_for(product) -> dict:
+    return {"product_id": str(product.id), "batch": "lote-1", "files": [{"filename": "a.jpg", "data": Binary(b"img")}]}
+
+def test_repeated_batch_is_applied_once(storage):
+    product = Product(name="Camisola", price=10)
+    product.save()
+    payload = payload_for(product)
+
+    images.upload_images(payload)
+    images.upload_images(payload)
+
+    product.reload()
+    assert len(product.images) == 1
+    assert product.upload_batches == ["lote-1"]
+    assert len(stored_files(storage)) == 1
+
+def test_failed_write_removes_uploads_and_retry_succeeds(storage, monkeypatch):
+    product = Product(name="Camisola", price=10)
+    product.save()
+    payload = payload_for(product)
+
+    original = Collection.update_one
+    def failing_update(self, *args, **kwargs):
+        raise ConnectionError("ligação perdida")
+    monkeypatch.setattr(Collection, "update_one", failing_update)
+    with pytest.raises(ConnectionError):
+        images.upload_images(payload)
+    monkeypatch.setattr(Collection, "update_one", original)
+
+    product.reload()
+    assert product.images == []
+    assert stored_files(storage) == []
+
+    images.upload_images(payload)
+
+    product.reload()
+    assert len(product.images) == 1
+    assert len(stored_files(storage)) == 1
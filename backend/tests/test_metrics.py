@@ -0,0 +1,44 @@
+"""GET /metrics nunca fica pública e ?profile=1 só conta como parâmetro exato"""
+import pytest
+
+from app.auth import _principals, create_access_token, token_claims
+from app.metrics import _wants_profile
+from app.models.user import User
+from app.routes import metrics as metrics_routes
+
+@pytest.fixture(autouse=True)
+def clean_users():
+    User.drop_collection()
+    _principals.clear()
+    yield
+    User.drop_collection()
+    _principals.clear()
+
+def bearer(role: str) -> dict:
+    user = User(email=f"{role}@teste.pt", name=role, password="x", role=role)
+    user.save()
+    return {"Authorization": f"Bearer {create_access_token(token_claims(user.id, role, 0))}"}
+
+def test_metrics_require_admin_without_token(client, monkeypatch):
+    monkeypatch.setattr(metrics_routes, "METRICS_TOKEN", None)
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=bearer("client")).status_code == 401
+    assert client.get("/metrics", headers=bearer("admin")).status_code == 200
+
+def test_metrics_token_is_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(metrics_routes, "METRICS_TOKEN", "segredo")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer segredo"}).status_code == 200
+
+@pytest.mark.parametrize("query, expected", [
+    (b"profile=1", True),
+    (b"q=x&profile=1", True),
+    (b"profile=10", False),
+    (b"xprofile=1", False),
+    (b"q=profile=1", False),
+    (b"", False),
+])
+def test_wants_profile_parses_query_string(query, expected):
+    assert _wants_profile({"query_string": query}) is expected
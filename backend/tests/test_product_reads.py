@@ -0,0 +1,64 @@
+"""GET /products/{id} é só leitura: pedidos repetidos não escrevem na base de dados"""
+import pytest
+from mongomock.collection import Collection
+
+from app.models.product import Product
+
+WRITE_METHODS = [
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_replace",
+    "find_one_and_delete", "bulk_write",
+]
+
+@pytest.fixture
+def commands(monkeypatch):
+    """Conta as chamadas às coleções (o mongomock-motor delega nas mesmas classes)"""
+    calls = []
+
+    def spy(name):
+        original = getattr(Collection, name)
+
+        def wrapper(self, *args, **kwargs):
+            calls.append((name, self.name))
+            return original(self, *args, **kwargs)
+        return wrapper
+
+    for name in WRITE_METHODS + ["find_one", "find"]:
+        monkeypatch.setattr(Collection, name, spy(name))
+    return calls
+
+def legacy_product() -> str:
+    """Produto antigo, gravado antes de existir visible_images"""
+    doc = {"name": "Camisola antiga", "price": 25.0, "stock": 3, "images": ["/uploads/a.jpg"]}
+    return str(Product._get_collection().insert_one(doc).inserted_id)
+
+def writes(calls) -> list:
+    return [call for call in calls if call[0] in WRITE_METHODS]
+
+@pytest.mark.usefixtures("no_cache")
+def test_repeated_gets_issue_no_writes(client, commands):
+    product_id = legacy_product()
+    commands.clear()
+
+    for _ in range(5):
+        response = client.get(f"/products/{product_id}")
+        assert response.status_code == 200
+        assert response.json()["visible_images"] == ["/uploads/a.jpg"]
+
+    # Sem cache todos os pedidos foram à base de dados, e nenhum escreveu
+    assert sum(1 for name, _ in commands if name.startswith("find")) >= 5
+    assert writes(commands) == []
+    assert "visible_images" not in Product._get_collection().find_one()
+
+def test_cached_gets_issue_no_writes(client, commands):
+    product_id = legacy_product()
+    commands.clear()
+
+    etag = None
+    for _ in range(5):
+        headers = {"If-None-Match": etag} if etag else {}
+        response = client.get(f"/products/{product_id}", headers=headers)
+        assert response.status_code in (200, 304)
+        etag = response.headers["etag"]
+
+    assert writes(commands) == []
@@ -0,0 +1,30 @@
+"""version (ETag do catálogo) só sobe: Product.save não sobrepõe incrementos concorrentes"""
+import asyncio
+
+from app.inventory import reserve_stock
+from app.models.product import Product
+
+def stored_version(product_id) -> int:
+    return Product._get_collection().find_one({"_id": product_id})["version"]
+
+def test_save_after_concurrent_reservation_bumps_past_it():
+    product = Product(name="Casaco", price=50.0, stock=5)
+    product.save()
+    assert stored_version(product.id) == 1
+
+    loaded = Product.objects.get(id=product.id)  # admin abre o produto na versão 1
+    asyncio.run(reserve_stock([(str(product.id), 1)]))  # $inc: versão 2
+    loaded.price = 45.0
+    loaded.save()
+
+    assert stored_version(product.id) == 3
+    assert loaded.version == 3
+    assert "version" not in loaded._get_changed_fields()
+
+def test_repeated_saves_keep_incrementing():
+    product = Product(name="Saia", price=20.0, stock=1)
+    product.save()
+    for expected in (2, 3, 4):
+        product.description = f"v{expected}"
+        product.save()
+        assert stored_version(product.id) == expected
@@ -0,0 +1,125 @@
+"""
+Reserva de stock concorrente: nunca vende mais do que o stock (benchmarks/stock_race.py sem MongoDB).
+
+O mongomock-motor executa cada operação sem ceder o event loop, por isso as corridas
+não aconteceriam; YieldingCollection cede antes de cada operação, como o Motor faz
+ao esperar pela rede, e os compradores intercalam-se entre leituras e escritas.
+"""
+import asyncio
+import inspect
+
+import httpx
+import pytest
+from bson import ObjectId
+
+from app import inventory
+from app.auth import create_access_token, token_claims
+from app.db import async_collection
+from app.inventory import InsufficientStock, reserve_stock
+from app.main import app
+from app.models.order import Order
+from app.models.product import Product
+from app.models.user import User
+
+class YieldingCollection:
+    """Coleção Motor que cede o event loop antes de cada operação (I/O simulado)"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(0)
+            return await attr(*args, **kwargs)
+        return call
+
+@pytest.fixture(autouse=True)
+def yielding_db(monkeypatch):
+    monkeypatch.setattr(inventory, "async_collection", lambda model: YieldingCollection(async_collection(model)))
+
+async def naive_reserve(lines):
+    """Leitura seguida de escrita (a versão antiga): vende a mesma unidade a vários compradores"""
+    collection = YieldingCollection(async_collection(Product))
+    for product_id, quantity in lines:
+        doc = await collection.find_one({"_id": ObjectId(product_id)})
+        if doc["stock"] < quantity:
+            raise InsufficientStock(product_id, quantity)
+        await collection.update_one({"_id": doc["_id"]}, {"$set": {"stock": doc["stock"] - quantity}})
+
+def create_product(stock: int, name: str = "Produto concorrido") -> str:
+    product = Product(name=name, price=10.0, stock=stock)
+    product.save()
+    return str(product.id)
+
+def stock_of(product_id: str) -> int:
+    return Product.objects(id=product_id).as_pymongo().first()["stock"]
+
+async def race(carts, reserve=reserve_stock) -> int:
+    """Reserva todos os carrinhos em simultâneo; devolve quantos conseguiram"""
+    async def buy(lines):
+        try:
+            await reserve(lines)
+            return True
+        except InsufficientStock:
+            return False
+
+    return sum(await asyncio.gather(*(buy(lines) for lines in carts)))
+
+@pytest.mark.parametrize("stock, buyers, quantity", [(5, 200, 1), (7, 100, 2), (0, 20, 1)])
+def test_concurrent_reservations_never_oversell(stock, buyers, quantity):
+    product_id = create_product(stock)
+
+    sold = asyncio.run(race([[(product_id, quantity)]] * buyers))
+
+    assert sold == stock // quantity
+    assert stock_of(product_id) == stock - sold * quantity
+    assert stock_of(product_id) >= 0
+
+def test_naive_reservation_oversells():
+    # Controlo negativo: sem o update condicional a corrida é detetada
+    product_id = create_product(5)
+
+    sold = asyncio.run(race([[(product_id, 1)]] * 50, reserve=naive_reserve))
+
+    assert sold > 5
+
+def test_failed_cart_releases_reserved_lines():
+    plenty = create_product(100, "Com stock")
+    scarce = create_product(3, "Último")
+
+    # Cada carrinho reserva primeiro o produto com stock e depois o escasso
+    sold = asyncio.run(race([[(plenty, 1), (scarce, 1)]] * 50))
+
+    assert sold == 3
+    assert stock_of(scarce) == 0
+    # As linhas já reservadas dos carrinhos recusados voltaram ao stock
+    assert stock_of(plenty) == 100 - sold
+
+def test_parallel_orders_on_low_stock_sku():
+    Order.drop_collection()
+    User.drop_collection()
+    product_id = create_product(4)
+    user = User(email="comprador@teste.pt", name="Comprador", password="x")
+    user.save()
+    headers = {"Authorization": f"Bearer {create_access_token(token_claims(user.id, 'client', 0))}"}
+    body = {
+        "items": [{"product_id": product_id, "product_name": "x", "price": 0, "quantity": 1, "size": "M", "color": "preto"}],
+        "shipping": {"address": "Rua", "city": "Lisboa", "postal_code": "1000-001", "country": "PT"},
+    }
+
+    async def checkout_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.post("/orders/", json=body, headers=headers) for _ in range(30)))
+        return [response.status_code for response in responses]
+
+    statuses = asyncio.run(checkout_all())
+
+    assert statuses.count(201) == 4
+    assert all(code == 400 for code in statuses if code != 201)
+    assert stock_of(product_id) == 0
+    assert Order.objects.count() == 4
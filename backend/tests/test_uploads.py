@@ -0,0 +1,24 @@
+"""O armazenamento local nunca apaga ficheiros fora de UPLOAD_DIR"""
+from app.uploads import LocalFilesystemClient
+
+def test_destroy_removes_uploaded_file(tmp_path):
+    client = LocalFilesystemClient(directory=str(tmp_path / "uploads"), base_url="/uploads")
+    (tmp_path / "uploads" / "produtos").mkdir(parents=True)
+    image = tmp_path / "uploads" / "produtos" / "a.jpg"
+    image.write_bytes(b"x")
+
+    client.destroy("/uploads/produtos/a.jpg")
+
+    assert not image.exists()
+
+def test_destroy_refuses_paths_outside_upload_dir(tmp_path):
+    client = LocalFilesystemClient(directory=str(tmp_path / "uploads"), base_url="/uploads")
+    (tmp_path / "uploads").mkdir()
+    outside = tmp_path / "segredo.txt"
+    outside.write_text("não apagar")
+
+    client.destroy("/uploads/../segredo.txt")
+    client.destroy("/uploads/produtos/../../segredo.txt")
+    client.destroy(f"/uploads/{outside}")
+
+    assert outside.exists()
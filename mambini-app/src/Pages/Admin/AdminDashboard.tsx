@@ -4,8 +4,7 @@ import ProductForm from "./ProductForm";
 import OrderList from "./OrderList";
 import UserList from "./UserList";
 import { AiOutlinePlus, AiOutlineUnorderedList, AiOutlineDollar, AiOutlineSkin, AiOutlineUser, AiOutlineShoppingCart } from "react-icons/ai";
-import { getProducts } from "../../api/productApi";
-import { getAllOrders } from "../../api/orderApi";
+import { getOverview } from "../../api/analyticsApi";
 
 type TabType = "products" | "orders" | "users";
 type ProductViewType = "list" | "form";
@@ -31,26 +30,13 @@ export default function AdminDashboard() {
             try {
                 setLoadingStats(true);
                 
-                // Carregar produtos e encomendas em paralelo
-                const [products, orders] = await Promise.all([
-                    getProducts(),
-                    getAllOrders(),
-                ]);
-
-                // Calcular estatísticas
-                const totalProducts = products.length;
-                
-                // Somar todas as vendas
-                const totalSales = orders.reduce((sum, order) => sum + order.total_amount, 0);
-                
-                // Contar clientes únicos (user_id únicos)
-                const uniqueCustomers = new Set(orders.map(order => order.user_id));
-                const totalCustomers = uniqueCustomers.size;
+                // Totais calculados no servidor (sem descarregar produtos nem encomendas)
+                const overview = await getOverview();
 
                 setStats({
-                    totalProducts,
-                    totalSales,
-                    totalCustomers,
+                    totalProducts: overview.products,
+                    totalSales: overview.revenue,
+                    totalCustomers: overview.customers,
                 });
             } catch (error: any) {
                 console.error("Erro ao carregar estatísticas:", error);
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { getAllOrders, updateOrderStatus, type Order } from "../../api/orderApi";
+import { getAllOrders, updateOrderStatus, type OrderSummary } from "../../api/orderApi";
 import { useNavigate } from "react-router-dom";
 import { AiOutlineEye } from "react-icons/ai";
 
@@ -28,24 +28,26 @@ const statusOptions = [
 ];
 
 export default function OrderList() {
-    const [orders, setOrders] = useState<Order[]>([]);
+    const [orders, setOrders] = useState<OrderSummary[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [updatingStatus, setUpdatingStatus] = useState<string | null>(null);
     const navigate = useNavigate();
 
-    const loadOrders = async () => {
+    // O servidor devolve as encomendas mais recentes primeiro, uma página de cada vez
+    const loadOrders = async (cursor?: string) => {
         try {
-            const data = await getAllOrders();
-            // Ordenar por data mais recente primeiro
-            const sorted = data.sort((a, b) => 
-                new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-            );
-            setOrders(sorted);
+            if (cursor) setLoadingMore(true);
+            const page = await getAllOrders(cursor);
+            setOrders((prev) => (cursor ? [...prev, ...page.items] : page.items));
+            setNextCursor(page.next_cursor || null);
         } catch (err: any) {
             console.error("Erro ao carregar encomendas:", err);
             alert("Erro ao carregar encomendas: " + (err.response?.data?.detail || err.message));
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     };
 
@@ -59,7 +61,7 @@ export default function OrderList() {
             await updateOrderStatus(orderId, newStatus);
             // Atualizar a lista local
             setOrders(orders.map(order => 
-                order.id === orderId ? { ...order, status: newStatus as any } : order
+                order.id === orderId ? { ...order, status: newStatus as OrderSummary["status"] } : order
             ));
         } catch (err: any) {
             console.error("Erro ao atualizar status:", err);
@@ -146,11 +148,11 @@ export default function OrderList() {
                                     </td>
                                     <td className="px-6 py-4">
                                         <div className="text-sm text-gray-600">
-                                            {order.items.length} {order.items.length === 1 ? "item" : "itens"}
+                                            {order.item_count} {order.item_count === 1 ? "item" : "itens"}
                                         </div>
                                         <div className="text-xs text-gray-500 mt-1">
-                                            {order.items.slice(0, 2).map(item => item.product_name).join(", ")}
-                                            {order.items.length > 2 && "..."}
+                                            {order.product_names.slice(0, 2).join(", ")}
+                                            {order.product_names.length > 2 && "..."}
                                         </div>
                                     </td>
                                     <td className="px-6 py-4 whitespace-nowrap">
@@ -191,6 +193,17 @@ export default function OrderList() {
                             ))}
                         </tbody>
                     </table>
+                    {nextCursor && (
+                        <div className="p-4 text-center border-t">
+                            <button
+                                onClick={() => loadOrders(nextCursor)}
+                                disabled={loadingMore}
+                                className="px-4 py-2 text-sm font-medium rounded-lg border border-gray-300 hover:bg-gray-50 disabled:opacity-50"
+                            >
+                                {loadingMore ? "A carregar..." : "Carregar mais"}
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
         </div>
@@ -1,22 +1,28 @@
 import { useEffect, useState } from "react";
-import { fetchProducts, removeProduct } from "../../services/productService";
+import { fetchProductsPage, removeProduct } from "../../services/productService";
 import type { Product } from "../../api/productApi";
 import { useNavigate } from "react-router-dom";
 import { AiOutlineEdit, AiOutlineDelete } from "react-icons/ai";
 
 export default function ProductList() {
     const [products, setProducts] = useState<Product[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const navigate = useNavigate();
 
-    const loadProducts = async () => {
+    // Uma página de cada vez; as seguintes com "Carregar mais"
+    const loadProducts = async (cursor?: string) => {
         try {
-            const data = await fetchProducts();
-            setProducts(data);
+            if (cursor) setLoadingMore(true);
+            const page = await fetchProductsPage(undefined, cursor);
+            setProducts((prev) => (cursor ? [...prev, ...page.items] : page.items));
+            setNextCursor(page.next_cursor || null);
         } catch (err) {
             alert("Erro ao carregar produtos.");
         } finally {
             setLoading(false);
+            setLoadingMore(false);
         }
     };
 
@@ -119,6 +125,17 @@ export default function ProductList() {
                         ))}
                         </tbody>
                     </table>
+                    {nextCursor && (
+                        <div className="p-4 text-center border-t">
+                            <button
+                                onClick={() => loadProducts(nextCursor)}
+                                disabled={loadingMore}
+                                className="px-4 py-2 text-sm font-medium rounded-lg border border-gray-300 hover:bg-gray-50 disabled:opacity-50"
+                            >
+                                {loadingMore ? "A carregar..." : "Carregar mais"}
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
         </div>
@@ -5,6 +5,11 @@ import Footer from "../components/Footer";
 import { getProductById, type Product } from "../api/productApi"; // ✅ Usa apenas a interface central
 import { useCart } from "../context/CartContext";
 
+// O checkout só aceita o que está em available_sizes / available_colors; uma lista
+// vazia não restringe, e aí mostram-se todos os tamanhos/cores do produto
+const variantOptions = (available?: string[], all?: string[]) =>
+    available && available.length > 0 ? available : all ?? [];
+
 export default function DetailPage() {
     const { id } = useParams<{ id: string }>();
     const { addToCart, cart } = useCart();
@@ -39,9 +44,11 @@ export default function DetailPage() {
                 setProduct(productWithImages);
                 setMainImage(imageUrls[0]); // Define a primeira imagem como principal
 
-                // Pré-selecionar o primeiro tamanho e cor se existirem
-                if (data.sizes?.length) setSelectedSize(data.sizes[0]);
-                if (data.colors?.length) setSelectedColor(data.colors[0]);
+                // Pré-selecionar o primeiro tamanho e cor disponíveis
+                const sizes = variantOptions(data.available_sizes, data.sizes);
+                const colors = variantOptions(data.available_colors, data.colors);
+                if (sizes.length) setSelectedSize(sizes[0]);
+                if (colors.length) setSelectedColor(colors[0]);
 
             } catch (error) {
                 console.error("Erro ao buscar produto:", error);
@@ -54,6 +61,7 @@ export default function DetailPage() {
     }, [id]);
 
     // Calcular quantidade já no carrinho para este produto e tamanho
+    // ("Único"/"Padrão" só quando o produto não tem tamanhos/cores: o checkout não os restringe)
     const sizeToCheck = selectedSize || "Único";
     const existingCartItem = product 
         ? cart.find((item) => item.id === product.id && item.size === sizeToCheck)
@@ -79,15 +87,18 @@ export default function DetailPage() {
 
     if (loading || !product) return <p className="text-center py-20">A carregar produto...</p>;
 
+    const sizeOptions = variantOptions(product.available_sizes, product.sizes);
+    const colorOptions = variantOptions(product.available_colors, product.colors);
+
     const handleAddToCart = () => {
         // Validação de Tamanho
-        if (product.sizes && product.sizes.length > 0 && !selectedSize) {
+        if (sizeOptions.length > 0 && !selectedSize) {
             alert("Por favor, seleciona um tamanho.");
             return;
         }
 
         // Validação de Cor (Opcional, mas boa prática)
-        if (product.colors && product.colors.length > 0 && !selectedColor) {
+        if (colorOptions.length > 0 && !selectedColor) {
             alert("Por favor, seleciona uma cor.");
             return;
         }
@@ -168,11 +179,11 @@ export default function DetailPage() {
                         </p>
 
                         {/* ✅ SECÇÃO DE CORES (Reinserida) */}
-                        {product.colors && product.colors.length > 0 && (
+                        {colorOptions.length > 0 && (
                             <div className="mb-6">
                                 <h4 className="text-sm font-medium mb-2 text-gray-700">Cor</h4>
                                 <div className="flex gap-3">
-                                    {product.colors.map((c) => (
+                                    {colorOptions.map((c) => (
                                         <button
                                             key={c}
                                             onClick={() => setSelectedColor(c)}
@@ -190,13 +201,13 @@ export default function DetailPage() {
                         )}
 
                         {/* Secção de Tamanhos */}
-                        {product.sizes && product.sizes.length > 0 && (
+                        {sizeOptions.length > 0 && (
                             <div className="mb-6">
                                 <div className="flex justify-between items-center mb-2">
                                     <h4 className="text-sm font-medium text-gray-700">Tamanho</h4>
                                 </div>
                                 <div className="flex flex-wrap gap-3">
-                                    {product.sizes.map((s) => (
+                                    {sizeOptions.map((s) => (
                                         <button
                                             key={s}
                                             onClick={() => setSelectedSize(s)}
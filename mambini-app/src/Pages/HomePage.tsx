@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import heroImg from '../assets/hero.jpg';
-import { fetchProducts } from "../services/productService"; // ou "../api/productApi"
+import { fetchProductsPage } from "../services/productService";
 import type { Product } from "../api/productApi";
 
 export default function HomePage() {
@@ -12,8 +12,9 @@ export default function HomePage() {
     useEffect(() => {
         const loadData = async () => {
             try {
-                const data = await fetchProducts();
-                setProducts(data);
+                // Só os 8 produtos mais recentes (a listagem vem ordenada do mais novo para o mais antigo)
+                const page = await fetchProductsPage(undefined, undefined, 8);
+                setProducts(page.items);
             } catch (error) {
                 console.error("Erro ao carregar produtos:", error);
             } finally {
@@ -40,11 +41,11 @@ export default function HomePage() {
     };
 
     // Lógica simples para separar categorias (Podes ajustar conforme a necessidade)
-    // Featured: Os primeiros 4 produtos
-    const featuredProducts = products.slice(0, 4);
+    // New Arrivals: os 4 produtos mais recentes
+    const newArrivals = products.slice(0, 4);
 
-    // New Arrivals: Os últimos 4 produtos (assumindo que novos entram no fim da lista)
-    const newArrivals = products.slice(-4).reverse();
+    // Featured: os 4 seguintes
+    const featuredProducts = products.slice(4, 8);
 
     if (loading) {
         return <div className="min-h-screen flex items-center justify-center">Loading...</div>;
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { getMyOrders, type Order } from "../api/orderApi";
+import { getMyOrders, type OrderSummary } from "../api/orderApi";
 
 const statusLabels: Record<string, string> = {
     pending: "Pendente",
@@ -19,23 +19,29 @@ const statusColors: Record<string, string> = {
 };
 
 export default function OrdersPage() {
-    const [orders, setOrders] = useState<Order[]>([]);
+    const [orders, setOrders] = useState<OrderSummary[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const navigate = useNavigate();
 
-    useEffect(() => {
-        const loadOrders = async () => {
-            try {
-                const data = await getMyOrders();
-                setOrders(data);
-            } catch (error) {
-                console.error("Erro ao carregar pedidos:", error);
-                alert("Erro ao carregar pedidos. Tenta novamente.");
-            } finally {
-                setLoading(false);
-            }
-        };
+    // Uma página de cada vez; as seguintes só com "Ver mais pedidos"
+    const loadOrders = async (cursor?: string) => {
+        try {
+            if (cursor) setLoadingMore(true);
+            const page = await getMyOrders(cursor);
+            setOrders((prev) => (cursor ? [...prev, ...page.items] : page.items));
+            setNextCursor(page.next_cursor || null);
+        } catch (error) {
+            console.error("Erro ao carregar pedidos:", error);
+            alert("Erro ao carregar pedidos. Tenta novamente.");
+        } finally {
+            setLoading(false);
+            setLoadingMore(false);
+        }
+    };
 
+    useEffect(() => {
         loadOrders();
     }, []);
 
@@ -99,7 +105,7 @@ export default function OrdersPage() {
                                     <div className="flex justify-between items-center mb-2">
                                         <div>
                                             <p className="text-sm text-gray-600">
-                                                {order.items.length} item(s)
+                                                {order.item_count} item(s)
                                             </p>
                                             {order.shipping_city && (
                                                 <p className="text-sm text-gray-500">
@@ -113,32 +119,31 @@ export default function OrdersPage() {
                                     </div>
 
                                     <div className="mt-4 flex gap-2 flex-wrap">
-                                        {order.items.slice(0, 3).map((item, idx) => (
-                                            <div
-                                                key={idx}
-                                                className="flex items-center gap-2 text-sm text-gray-600"
-                                            >
-                                                {item.image && (
-                                                    <img
-                                                        src={item.image}
-                                                        alt={item.product_name}
-                                                        className="w-10 h-10 object-cover rounded"
-                                                    />
-                                                )}
-                                                <span>
-                                                    {item.product_name} x{item.quantity}
-                                                </span>
-                                            </div>
+                                        {order.product_names.slice(0, 3).map((name, idx) => (
+                                            <span key={idx} className="text-sm text-gray-600">
+                                                {name}
+                                            </span>
                                         ))}
-                                        {order.items.length > 3 && (
+                                        {order.product_names.length > 3 && (
                                             <span className="text-sm text-gray-500">
-                                                +{order.items.length - 3} mais
+                                                +{order.product_names.length - 3} mais
                                             </span>
                                         )}
                                     </div>
                                 </div>
                             </div>
                         ))}
+                        {nextCursor && (
+                            <div className="text-center pt-4">
+                                <button
+                                    onClick={() => loadOrders(nextCursor)}
+                                    disabled={loadingMore}
+                                    className="px-6 py-2 rounded-lg border border-gray-300 bg-white hover:bg-gray-50 disabled:opacity-50"
+                                >
+                                    {loadingMore ? "A carregar..." : "Ver mais pedidos"}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 )}
             </div>
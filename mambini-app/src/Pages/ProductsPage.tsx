@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { useSearchParams } from "react-router-dom";
-import { fetchProducts } from "../services/productService";
+import { fetchProductsPage } from "../services/productService";
 import type {Product} from "../api/productApi";
 import ProductCard from "../components/ProductCard";
 import NavBar from "../components/NavBar";
@@ -8,22 +8,37 @@ import Footer from "../components/Footer";
 
 function ProductsPage() {
     const [products, setProducts] = useState<Product[]>([]);
-    const [sort, setSort] = useState("name");
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [searchParams] = useSearchParams();
     const searchQuery = searchParams.get("q") || "";
 
     useEffect(() => {
         setLoading(true);
-        fetchProducts(searchQuery || undefined)
-            .then(setProducts)
+        fetchProductsPage(searchQuery || undefined)
+            .then((page) => {
+                setProducts(page.items);
+                setNextCursor(page.next_cursor || null);
+            })
             .catch((error) => console.error("Erro ao carregar produtos:", error))
             .finally(() => setLoading(false));
     }, [searchQuery]);
 
-    const sortedProducts = [...products].sort((a, b) =>
-        sort === "name" ? a.name.localeCompare(b.name) : a.price - b.price
-    );
+    const loadMore = () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        fetchProductsPage(searchQuery || undefined, nextCursor)
+            .then((page) => {
+                setProducts((prev) => [...prev, ...page.items]);
+                setNextCursor(page.next_cursor || null);
+            })
+            .catch((error) => console.error("Erro ao carregar produtos:", error))
+            .finally(() => setLoadingMore(false));
+    };
+
+    // Mais páginas por carregar: o total mostrado é um mínimo
+    const countLabel = `${products.length}${nextCursor ? "+" : ""}`;
 
     if (loading) {
         return (
@@ -48,23 +63,12 @@ function ProductsPage() {
                         </h1>
                         {searchQuery && (
                             <p className="text-sm text-gray-600 mt-1">
-                                {products.length} {products.length === 1 ? "produto encontrado" : "produtos encontrados"}
+                                {countLabel} {products.length === 1 && !nextCursor ? "produto encontrado" : "produtos encontrados"}
                             </p>
                         )}
                     </div>
                     <div className="text-gray-500 mt-3 md:mt-0">
-                        {!searchQuery && `${products.length} products found`}
-                    </div>
-                    <div className="mt-3 md:mt-0">
-                        <label className="mr-2 text-gray-600 font-medium">Sort by:</label>
-                        <select
-                            value={sort}
-                            onChange={(e) => setSort(e.target.value)}
-                            className="border border-gray-300 rounded-md px-3 py-1 focus:outline-none focus:ring-2 focus:ring-gray-400"
-                        >
-                            <option value="name">Name</option>
-                            <option value="price">Price</option>
-                        </select>
+                        {!searchQuery && `${countLabel} products found`}
                     </div>
                 </div>
 
@@ -78,11 +82,25 @@ function ProductsPage() {
                     </div>
                 ) : (
                     <div className="grid sm:grid-cols-2 lg:grid-cols-3 gap-6">
-                        {sortedProducts.map((product) => (
+                        {/* Ordem da API (mais recentes primeiro, ou relevância na pesquisa): ordenar
+                            só as páginas carregadas daria uma ordem errada entre páginas */}
+                        {products.map((product) => (
                             <ProductCard key={product.id} product={product} />
                         ))}
                     </div>
                 )}
+
+                {nextCursor && (
+                    <div className="text-center mt-10">
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="px-6 py-2 rounded-md border border-gray-300 bg-white hover:bg-gray-100 disabled:opacity-50"
+                        >
+                            {loadingMore ? "A carregar..." : "Carregar mais"}
+                        </button>
+                    </div>
+                )}
             </main>
         </div>
     );
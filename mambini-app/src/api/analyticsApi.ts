@@ -0,0 +1,14 @@
+import api from "./axiosInstance";
+
+/** Totais do dashboard do admin (calculados no servidor a partir dos rollups) */
+export interface Overview {
+    products: number;
+    orders: number;
+    revenue: number;
+    customers: number;
+}
+
+export const getOverview = async (): Promise<Overview> => {
+    const res = await api.get<Overview>("/analytics/overview");
+    return res.data;
+};
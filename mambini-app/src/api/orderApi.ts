@@ -50,16 +50,41 @@ export const createOrder = async (data: CreateOrderRequest): Promise<Order> => {
     return res.data;
 };
 
-export const getMyOrders = async (): Promise<Order[]> => {
-    const res = await api.get<Order[]>("/orders/");
-    return res.data;
-};
+/** Resumo de um pedido nas listagens (sem os itens completos) */
+export interface OrderSummary {
+    id: string;
+    user_id: string;
+    user_email: string;
+    user_name?: string;
+    item_count: number;
+    product_names: string[];
+    total_amount: number;
+    status: Order["status"];
+    payment_status?: string;
+    shipping_city?: string;
+    created_at: string;
+    updated_at: string;
+}
 
-export const getAllOrders = async (): Promise<Order[]> => {
-    const res = await api.get<Order[]>("/orders/all");
+export interface OrderSummaryPage {
+    items: OrderSummary[];
+    next_cursor?: string | null;
+}
+
+/** Uma página de resumos (paginação por cursor); a página seguinte só é pedida quando o utilizador a quiser ver */
+const getSummaryPage = async (url: string, cursor?: string, limit = 20): Promise<OrderSummaryPage> => {
+    const params: Record<string, string | number> = { view: "summary", limit };
+    if (cursor) params.cursor = cursor;
+    const res = await api.get<OrderSummaryPage>(url, { params });
     return res.data;
 };
 
+export const getMyOrders = async (cursor?: string): Promise<OrderSummaryPage> =>
+    getSummaryPage("/orders/", cursor);
+
+export const getAllOrders = async (cursor?: string): Promise<OrderSummaryPage> =>
+    getSummaryPage("/orders/all", cursor);
+
 export const getOrderById = async (id: string): Promise<Order> => {
     const res = await api.get<Order>(`/orders/${id}`);
     return res.data;
@@ -15,11 +15,26 @@ export interface Product {
     images: (File | string)[];
     visible_images?: string[];
     created_at?: string;
+    card_image?: string | null; // Variante reduzida da primeira imagem visível (listagem)
+    placeholder?: string | null; // LQIP em data URI
 }
 
-export const getProducts = async (searchQuery?: string): Promise<Product[]> => {
-    const params = searchQuery ? { q: searchQuery } : {};
-    const res = await api.get<Product[]>("/products/", { params });
+export interface ProductPage {
+    items: Product[];
+    next_cursor?: string | null;
+}
+
+/** Uma página da listagem (paginação por cursor) */
+export const getProductsPage = async (
+    searchQuery?: string,
+    cursor?: string,
+    limit?: number
+): Promise<ProductPage> => {
+    const params: Record<string, string | number> = {};
+    if (searchQuery) params.q = searchQuery;
+    if (cursor) params.cursor = cursor;
+    if (limit) params.limit = limit;
+    const res = await api.get<ProductPage>("/products/", { params });
     return res.data;
 };
 
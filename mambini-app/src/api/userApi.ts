@@ -63,7 +63,12 @@ export const updateUser = async (userId: string, data: UserUpdate): Promise<User
 
 export const updateMyProfile = async (data: UserUpdate): Promise<User> => {
     const res = await api.put("/users/me", data);
-    return res.data;
+    // Ao mudar a password o token antigo deixa de ser aceite
+    const { access_token, ...user } = res.data;
+    if (access_token) {
+        localStorage.setItem("token", access_token);
+    }
+    return user;
 };
 
 export const deleteUser = async (userId: string): Promise<void> => {
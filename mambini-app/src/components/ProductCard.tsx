@@ -12,10 +12,12 @@ const ProductCard: FC<ProductCardProps> = ({ product }) => {
     const [imageUrl, setImageUrl] = useState("/placeholder.png");
 
     useEffect(() => {
-        // Usar visible_images se disponível, senão usar images
-        const imagesToUse = (product.visible_images && product.visible_images.length > 0) 
-            ? product.visible_images 
-            : product.images;
+        // Usar a variante reduzida (card_image), senão visible_images, senão images
+        const imagesToUse = product.card_image
+            ? [product.card_image]
+            : (product.visible_images && product.visible_images.length > 0)
+                ? product.visible_images
+                : product.images;
         
         if (imagesToUse && imagesToUse.length > 0) {
             const img = imagesToUse[0];
@@ -1,5 +1,5 @@
 import {
-    getProducts,
+    getProductsPage,
     getProductById,
     createProduct,
     updateProduct,
@@ -7,7 +7,9 @@ import {
     type Product,
 } from "../api/productApi";
 
-export const fetchProducts = async (searchQuery?: string) => await getProducts(searchQuery);
+// Uma página de cada vez (cursor); a página seguinte só é pedida em "Carregar mais"
+export const fetchProductsPage = async (searchQuery?: string, cursor?: string, limit?: number) =>
+    await getProductsPage(searchQuery, cursor, limit);
 export const fetchProductById = async (id: string) => await getProductById(id);
 export const addProduct = async (data: Product) => await createProduct(data);
 export const editProduct = async (id: string, data: Product) => await updateProduct(id, data);